@@ -0,0 +1,302 @@
+# archive.py - Архив длинных записей с ключевыми кадрами и быстрым переходом к любому тику
+
+# Импортируем стандартные модули и игровые модули
+import argparse
+import mmap
+import struct
+import time
+from bisect import bisect_right
+from core import GameCore, GameSnapshot  # Импортируем игровую логику и снимки
+from board import BoardSnapshot, empty_colors  # Импортируем снимок поля
+from piece import Piece  # Импортируем логику фигуры
+from replay import InputLog, Session, UNDO, END, write_varint, read_varint  # Импортируем сессию и записи
+
+# Заголовок архива: сигнатура, версия формата, seed, ширина и высота поля
+ARCHIVE_MAGIC = b'TTRA'
+ARCHIVE_VERSION = 2
+ARCHIVE_HEADER = struct.Struct('<4sBQHH')
+
+# Ключевой кадр: тик, текущая фигура (форма, x, y, поворот), следующая форма, счет,
+# уровень, линии, фигуры, скорость падения, тики с последнего падения, конец игры
+# и количество сохраненных строк. Пустые строки над стопкой не сохраняются: следом
+# идут маски только нижних строк (по (width + 7) // 8 байт), их цвета (по width байт)
+# и состояние генератора
+KEYFRAME = struct.Struct('<QBhhBBQIIIdIBI')
+RNG_HEADER = struct.Struct('<BBBd')  # Есть ли состояние, версия, есть ли gauss, gauss
+RNG_WORDS_SIZE = 625 * 4  # Слова Mersenne Twister, упакованные pack_rng_state
+
+# Запись индекса: тик ключевого кадра, смещение кадра и смещение его ходов
+INDEX_ENTRY = struct.Struct('<QQQ')
+# Хвост файла: смещение индекса, последний тик, количество кадров, сигнатура
+TRAILER = struct.Struct('<QQI4s')
+TRAILER_MAGIC = b'TTRI'
+
+# Интервал между ключевыми кадрами в тиках по умолчанию (10 секунд игры)
+KEYFRAME_INTERVAL = 600
+
+
+def row_bytes(width):
+    """Размер маски строки поля ширины width в байтах"""
+    return (width + 7) // 8
+
+
+def encode_keyframe(snapshot, tick, width, height):
+    """Двоичное представление снимка игры на тике tick"""
+    shape_idx, x, y, rotation = snapshot.piece
+    rows = snapshot.board.rows
+    top = next((i for i, row in enumerate(rows) if row), height)  # Первая непустая строка
+    data = bytearray(KEYFRAME.pack(tick, shape_idx, x, y, rotation, snapshot.next_shape,
+                                   snapshot.score, snapshot.level, snapshot.lines_cleared,
+                                   snapshot.pieces, snapshot.fall_speed, snapshot.fall_ticks,
+                                   snapshot.game_over, height - top))
+    size = row_bytes(width)
+    for row in rows[top:]:
+        data += row.to_bytes(size, 'little')
+    for row in snapshot.board.colors[top:]:
+        data += row
+    if snapshot.rng_state is None:
+        data += RNG_HEADER.pack(0, 0, 0, 0.0) + bytes(RNG_WORDS_SIZE)
+    else:
+        version, internal, gauss = snapshot.rng_state
+        data += RNG_HEADER.pack(1, version, gauss is not None, gauss or 0.0) + internal
+    return data
+
+
+def decode_keyframe(data, offset, width, height):
+    """Чтение ключевого кадра; возвращает пару (тик, GameSnapshot)"""
+    (tick, shape_idx, x, y, rotation, next_shape, score, level, lines, pieces,
+     fall_speed, fall_ticks, game_over, stored) = KEYFRAME.unpack_from(data, offset)
+    offset += KEYFRAME.size
+    top = height - stored
+    size = row_bytes(width)
+    rows = (0,) * top + tuple(int.from_bytes(data[offset + i * size:offset + (i + 1) * size], 'little')
+                              for i in range(stored))
+    offset += stored * size
+    colors = (empty_colors(width),) * top + tuple(bytes(data[offset + i * width:offset + (i + 1) * width])
+                                                  for i in range(stored))
+    offset += stored * width
+    has_state, version, has_gauss, gauss = RNG_HEADER.unpack_from(data, offset)
+    offset += RNG_HEADER.size
+    rng_state = None
+    if has_state:
+        rng_state = (version, bytes(data[offset:offset + RNG_WORDS_SIZE]), gauss if has_gauss else None)
+    snapshot = GameSnapshot(BoardSnapshot(rows, colors), (shape_idx, x, y, rotation), next_shape,
+                            score, level, lines, pieces, fall_speed, fall_ticks, bool(game_over),
+                            rng_state)
+    return tick, snapshot
+
+
+class ArchiveWriter:
+    """
+    Запись игры сессии в архив. Действия хранятся как в InputLog (разница тиков
+    и байт действия), а каждые interval тиков и после каждой отмены хода
+    записывается полный ключевой кадр. В конце файла - индекс кадров, по
+    которому читатель находит ближайший кадр без чтения всего файла.
+    """
+
+    def __init__(self, path, session, interval=KEYFRAME_INTERVAL):
+        """
+        Начало записи
+        path: файл архива
+        session: сессия, через которую идет игра (уже начатая reset)
+        interval: интервал между ключевыми кадрами в тиках
+        """
+        self.session = session
+        self.interval = interval
+        self.file = open(path, 'wb')
+        core = session.core
+        self.file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, session.seed,
+                                            core.width, core.height))
+        self.index = bytearray()  # Записи INDEX_ENTRY
+        self.count = 0  # Количество ключевых кадров
+        self.moves = bytearray()  # Ходы текущего отрезка, еще не записанные в файл
+        self.last_tick = 0  # Тик последнего хода или кадра отрезка
+        self.keyframe_tick = 0  # Тик последнего ключевого кадра
+        self.keyframe()
+
+    def keyframe(self):
+        """Запись ключевого кадра текущего состояния и начало нового отрезка ходов"""
+        self.file.write(self.moves)
+        self.moves.clear()
+        session = self.session
+        core = session.core
+        data = encode_keyframe(core.snapshot(), session.ticks, core.width, core.height)
+        offset = self.file.tell()
+        self.file.write(data)
+        self.index += INDEX_ENTRY.pack(session.ticks, offset, offset + len(data))
+        self.count += 1
+        self.last_tick = self.keyframe_tick = session.ticks
+
+    def apply(self, action):
+        """Действие игрока через сессию с записью в архив; возвращает события"""
+        write_varint(self.moves, self.session.ticks - self.last_tick)
+        self.moves.append(action)
+        self.last_tick = self.session.ticks
+        events = self.session.apply(action)
+        # Отмена хода опирается на историю, которой нет у читателя, поэтому ее
+        # результат сразу сохраняется ключевым кадром
+        if action == UNDO:
+            self.keyframe()
+        return events
+
+    def tick(self):
+        """Игровой тик через сессию; при необходимости записывается ключевой кадр"""
+        events = self.session.tick()
+        if self.session.ticks - self.keyframe_tick >= self.interval:
+            self.keyframe()
+        return events
+
+    def close(self):
+        """Запись последних ходов, индекса и хвоста файла"""
+        if self.file is None:
+            return
+        self.file.write(self.moves)
+        index_offset = self.file.tell()
+        self.file.write(self.index)
+        self.file.write(TRAILER.pack(index_offset, self.session.ticks, self.count, TRAILER_MAGIC))
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class KeyframeTicks:
+    """Последовательность тиков ключевых кадров прямо из индекса в отображенном файле (для bisect)"""
+
+    def __init__(self, data, offset, count):
+        self.data = data
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return INDEX_ENTRY.unpack_from(self.data, self.offset + i * INDEX_ENTRY.size)[0]
+
+
+class ArchiveReader:
+    """
+    Чтение архива через отображение файла в память: в память попадают только
+    нужные страницы. Переход к тику - двоичный поиск ближайшего кадра по индексу,
+    восстановление кадра и проигрывание не более interval тиков его отрезка.
+    """
+
+    def __init__(self, path, piece_factory=Piece):
+        """
+        Открытие архива
+        piece_factory: класс фигур восстановленной игры
+        """
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, self.width, self.height = ARCHIVE_HEADER.unpack_from(self.data)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError("Неизвестный формат архива")
+        self.index_offset, self.end_tick, self.count, trailer_magic = TRAILER.unpack_from(
+            self.data, len(self.data) - TRAILER.size)
+        if trailer_magic != TRAILER_MAGIC:
+            raise ValueError("Архив не закрыт: нет индекса ключевых кадров")
+        self.ticks = KeyframeTicks(self.data, self.index_offset, self.count)
+        self.session = Session(GameCore(self.width, self.height, piece_factory), record=False)
+
+    def entry(self, i):
+        """Запись индекса i: (тик, смещение кадра, смещение ходов, конец ходов)"""
+        tick, keyframe_offset, moves_offset = INDEX_ENTRY.unpack_from(
+            self.data, self.index_offset + i * INDEX_ENTRY.size)
+        if i + 1 < self.count:
+            moves_end = INDEX_ENTRY.unpack_from(self.data, self.index_offset + (i + 1) * INDEX_ENTRY.size)[1]
+        else:
+            moves_end = self.index_offset
+        return tick, keyframe_offset, moves_offset, moves_end
+
+    def seek(self, tick):
+        """
+        Восстановление игры на тике tick: после tick тиков и всех действий,
+        сделанных на тиках не позже tick
+        Возвращает сессию (одну и ту же для всех вызовов)
+        """
+        tick = max(0, min(tick, self.end_tick))
+        i = bisect_right(self.ticks, tick) - 1
+        _, keyframe_offset, moves_offset, moves_end = self.entry(i)
+        keyframe_tick, snapshot = decode_keyframe(self.data, keyframe_offset, self.width, self.height)
+        session = self.session
+        session.restore(snapshot, keyframe_tick)
+
+        data = self.data
+        move_tick = keyframe_tick
+        position = moves_offset
+        while position < moves_end:
+            delta, position = read_varint(data, position)
+            move_tick += delta
+            if move_tick > tick:
+                break
+            while session.ticks < move_tick:
+                session.tick()
+            session.apply(data[position])
+            position += 1
+        while session.ticks < tick:
+            session.tick()
+        return session
+
+    def close(self):
+        """Закрытие отображения и файла"""
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def archive_log(log, path, interval=KEYFRAME_INTERVAL):
+    """Перевод записи InputLog в архив с ключевыми кадрами"""
+    session = Session(GameCore(log.width, log.height), record=False)
+    session.reset(log.seed)
+    with ArchiveWriter(path, session, interval) as writer:
+        for tick, action in log.inputs():
+            while session.ticks < tick:
+                writer.tick()
+            if action == END:
+                break
+            writer.apply(action)
+    return session
+
+
+def main():
+    """Создание архива из записи и переход к тику из командной строки"""
+    parser = argparse.ArgumentParser(description="Архив записей игры Тетрис")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="перевести запись .ttr в архив")
+    convert.add_argument('log', help="файл записи")
+    convert.add_argument('archive', help="файл архива")
+    convert.add_argument('--interval', type=int, default=KEYFRAME_INTERVAL, help="тиков между кадрами")
+    seek = commands.add_parser('seek', help="показать состояние игры на тике")
+    seek.add_argument('archive', help="файл архива")
+    seek.add_argument('tick', type=int, help="номер тика")
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        session = archive_log(InputLog.load(args.log), args.archive, args.interval)
+        print(f"Тиков: {session.ticks}, фигур: {session.core.pieces}")
+        return
+
+    with ArchiveReader(args.archive) as reader:
+        start = time.perf_counter()
+        core = reader.seek(args.tick).core
+        elapsed = time.perf_counter() - start
+        print(f"Тик {args.tick} из {reader.end_tick} ({reader.count} кадров), "
+              f"переход за {elapsed * 1000:.2f} мс")
+        print(f"Счет: {core.score}, линии: {core.lines_cleared}, фигур: {core.pieces}")
+        for y in range(core.height):
+            print(''.join('#' if core.board.is_filled(x, y) else '.' for x in range(core.width)))
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# batch.py - Пакетный симулятор: тысячи игровых полей в массивах NumPy
+
+# Импортируем NumPy для векторных операций и игровые модули
+import numpy as np
+from constants import GRID_WIDTH, GRID_HEIGHT  # Импортируем размеры поля
+from rotations import ROTATIONS  # Импортируем таблицы поворотов
+from core import LEFT, RIGHT, DOWN, ROTATE, HARD_DROP, LINE_SCORES  # Действия и таблица очков
+
+# Действие "ничего не делать" для полей, которые пропускают шаг
+NOOP = -1
+
+# Очки за 0, 1, 2, 3 и 4 линии (умножаются на уровень), как в GameCore.clear_lines
+SCORE_TABLE = np.array((0,) + LINE_SCORES, dtype=np.int64)
+
+
+def build_tables():
+    """
+    Построение таблиц фигур для векторных проверок
+    Возвращает массивы масок строк (фигура, поворот, dy) и границ занятых столбцов
+    """
+    shapes = len(ROTATIONS)
+    masks = np.zeros((shapes, 4, 4), dtype=np.int64)  # Маски строк (0 - пустая строка)
+    left = np.zeros((shapes, 4), dtype=np.int64)  # Крайний левый занятый столбец
+    right = np.zeros((shapes, 4), dtype=np.int64)  # Крайний правый занятый столбец
+    for s, states in enumerate(ROTATIONS):
+        for r, state in enumerate(states):
+            for dy, mask in state.row_masks:
+                masks[s, r, dy] = mask
+            columns = [dx for dx, _ in state.cells]
+            left[s, r] = min(columns)
+            right[s, r] = max(columns)
+    return masks, left, right
+
+
+MASKS, LEFT_COLUMN, RIGHT_COLUMN = build_tables()
+DY = np.arange(4)  # Смещения строк фигуры
+
+
+class BatchSimulator:
+    """
+    Одновременная симуляция count игр по правилам GameCore.
+    Поле каждой игры хранится как строка масок в массиве rows формы (count, height).
+    Гравитация задается действием DOWN - симулятор не использует время.
+    """
+
+    def __init__(self, count, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        """
+        Инициализация симулятора
+        count: количество одновременных игр
+        width, height: размеры поля (ширина не больше 62 столбцов)
+        seed: начальное значение генератора фигур
+        """
+        if width > 62:
+            raise ValueError("Ширина поля пакетного симулятора не может превышать 62 столбца")
+        self.count = count  # Количество игр
+        self.width = width  # Ширина поля
+        self.height = height  # Высота поля
+        self.full_mask = (1 << width) - 1  # Маска заполненной строки
+        self.rng = np.random.default_rng(seed)  # Генератор фигур
+        self.reset()
+
+    def reset(self, which=None):
+        """
+        Сброс игр к начальному состоянию
+        which: булев массив игр для сброса (если None, сбрасываются все игры)
+        """
+        if which is None:
+            which = np.ones(self.count, dtype=bool)
+            self.rows = np.zeros((self.count, self.height), dtype=np.int64)
+            self.shape = np.zeros(self.count, dtype=np.int64)
+            self.next_shape = self.rng.integers(0, len(ROTATIONS), self.count)
+            self.rotation = np.zeros(self.count, dtype=np.int64)
+            self.x = np.zeros(self.count, dtype=np.int64)
+            self.y = np.zeros(self.count, dtype=np.int64)
+            self.score = np.zeros(self.count, dtype=np.int64)
+            self.level = np.ones(self.count, dtype=np.int64)
+            self.lines = np.zeros(self.count, dtype=np.int64)
+            self.pieces = np.zeros(self.count, dtype=np.int64)
+            self.done = np.zeros(self.count, dtype=bool)
+
+        idx = np.flatnonzero(which)
+        self.rows[idx] = 0
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.lines[idx] = 0
+        self.pieces[idx] = 0
+        self.done[idx] = False
+        self.spawn(idx)
+
+    def spawn(self, idx):
+        """Следующая фигура становится текущей, проверяется окончание игры"""
+        self.shape[idx] = self.next_shape[idx]
+        self.next_shape[idx] = self.rng.integers(0, len(ROTATIONS), len(idx))
+        self.rotation[idx] = 0
+        self.x[idx] = self.width // 2 - 1
+        self.y[idx] = 0
+        fits = self.fits(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        self.done[idx[~fits]] = True
+
+    def shifted_masks(self, idx, rotation, x):
+        """Маски строк фигур, сдвинутые на столбец x (форма (n, 4))"""
+        masks = MASKS[self.shape[idx], rotation]
+        shift = x[:, None]
+        return np.where(shift >= 0,
+                        masks << np.maximum(shift, 0),
+                        masks >> np.maximum(-shift, 0))
+
+    def fits(self, idx, rotation, x, y):
+        """
+        Векторная проверка допустимости позиций фигур
+        idx: индексы игр, rotation, x, y: проверяемые состояния фигур
+        Возвращает булев массив той же длины, что idx
+        """
+        shape = self.shape[idx]
+        # Проверка левой и правой границ
+        ok = (x + LEFT_COLUMN[shape, rotation] >= 0) & (x + RIGHT_COLUMN[shape, rotation] < self.width)
+        masks = self.shifted_masks(idx, rotation, x)
+        row = y[:, None] + DY
+        occupied = masks != 0
+        # Проверка нижней границы
+        ok &= ~(occupied & (row >= self.height)).any(axis=1)
+        # Проверка пересечений (строки выше поля не проверяются)
+        inside = occupied & (row >= 0) & (row < self.height)
+        board = self.rows[idx[:, None], np.clip(row, 0, self.height - 1)]
+        ok &= ~(inside & ((board & masks) != 0)).any(axis=1)
+        return ok
+
+    def step(self, actions):
+        """
+        Применение действий ко всем играм одновременно
+        actions: целочисленный массив длины count (LEFT, RIGHT, DOWN, ROTATE, HARD_DROP или NOOP)
+        Возвращает массив количества линий, очищенных каждой игрой на этом шаге
+        """
+        actions = np.asarray(actions)
+        active = ~self.done
+        cleared = np.zeros(self.count, dtype=np.int64)
+
+        # Сдвиги влево и вправо
+        for action, dx in ((LEFT, -1), (RIGHT, 1)):
+            idx = np.flatnonzero(active & (actions == action))
+            if len(idx):
+                nx = self.x[idx] + dx
+                ok = self.fits(idx, self.rotation[idx], nx, self.y[idx])
+                self.x[idx[ok]] = nx[ok]
+
+        # Поворот без смещения (как в GameCore.rotate_piece)
+        idx = np.flatnonzero(active & (actions == ROTATE))
+        if len(idx):
+            nr = (self.rotation[idx] + 1) % 4
+            ok = self.fits(idx, nr, self.x[idx], self.y[idx])
+            self.rotation[idx[ok]] = nr[ok]
+
+        # Сдвиг вниз: фигуры, которые не могут опуститься, фиксируются
+        lock = np.zeros(self.count, dtype=bool)
+        idx = np.flatnonzero(active & (actions == DOWN))
+        if len(idx):
+            ny = self.y[idx] + 1
+            ok = self.fits(idx, self.rotation[idx], self.x[idx], ny)
+            self.y[idx[ok]] = ny[ok]
+            lock[idx[~ok]] = True
+
+        # Мгновенное падение: все фигуры опускаются одновременно, пока могут
+        idx = np.flatnonzero(active & (actions == HARD_DROP))
+        falling = idx
+        while len(falling):
+            ny = self.y[falling] + 1
+            ok = self.fits(falling, self.rotation[falling], self.x[falling], ny)
+            falling = falling[ok]
+            self.y[falling] += 1
+        lock[idx] = True
+
+        idx = np.flatnonzero(lock)
+        if len(idx):
+            cleared[idx] = self.lock(idx)
+        return cleared
+
+    def lock(self, idx):
+        """Фиксация фигур, очистка линий, начисление очков и выдача новых фигур"""
+        masks = self.shifted_masks(idx, self.rotation[idx], self.x[idx])
+        row = self.y[idx][:, None] + DY
+        # Для одного dy пары (игра, строка) не повторяются, поэтому присваивание безопасно
+        for dy in range(4):
+            sel = (masks[:, dy] != 0) & (row[:, dy] >= 0)
+            self.rows[idx[sel], row[sel, dy]] |= masks[sel, dy]
+        self.pieces[idx] += 1
+
+        # Поиск заполненных строк
+        rows = self.rows[idx]
+        full = rows == self.full_mask
+        count = full.sum(axis=1)
+        has_lines = count > 0
+        if has_lines.any():
+            sub = np.flatnonzero(has_lines)
+            # Устойчивая сортировка ставит заполненные строки наверх, сохраняя порядок остальных
+            order = np.argsort(~full[sub], axis=1, kind='stable')
+            compacted = np.take_along_axis(rows[sub], order, axis=1)
+            compacted[np.arange(self.height) < count[sub, None]] = 0
+            self.rows[idx[sub]] = compacted
+
+            # Начисление очков и пересчет уровня
+            self.score[idx] += SCORE_TABLE[np.minimum(count, 4)] * self.level[idx]
+            self.lines[idx] += count
+            self.level[idx] = self.lines[idx] // 10 + 1
+
+        self.spawn(idx)
+        return count
+
+    def cells(self):
+        """Поля всех игр в виде массива (count, height, width) из 0 и 1"""
+        bits = np.arange(self.width)
+        return ((self.rows[:, :, None] >> bits) & 1).astype(np.uint8)
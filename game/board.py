@@ -0,0 +1,241 @@
+# board.py - Битовое игровое поле для Тетриса
+
+# Импортируем необходимые модули и константы
+from collections import namedtuple
+from constants import GRID_WIDTH, GRID_HEIGHT, COLORS_3D
+
+# Неизменяемый снимок поля: кортежи масок строк и строк цветов (None у копий без цветов).
+# Строки - неизменяемые объекты, поэтому снимки и поле разделяют их без копирования
+BoardSnapshot = namedtuple('BoardSnapshot', ['rows', 'colors'])
+
+# Общие строки цветов пустых строк: ширина -> bytes из нулей
+EMPTY_COLORS = {}
+
+
+def empty_colors(width):
+    """Строка цветов пустой строки ширины width (один объект на все поля и снимки)"""
+    row = EMPTY_COLORS.get(width)
+    if row is None:
+        row = EMPTY_COLORS[width] = bytes(width)
+    return row
+
+
+class Board:
+    """
+    Игровое поле, хранящее каждую строку как целое число-битовую маску.
+    Бит x строки y установлен, если ячейка (x, y) занята.
+    Цвета хранятся отдельно: для каждой строки - bytes с индексами цветов
+    (0 - пустая ячейка, i + 1 - цвет COLORS_3D[i]). Строки цветов не изменяются
+    на месте, а заменяются целиком, поэтому копии и снимки поля разделяют
+    неизменившиеся строки. У копий для поиска ходов цвета не хранятся (colors = None).
+    Пустые строки хранятся разреженно: маска 0 и общая строка empty_colors(width),
+    поэтому пустая часть даже очень большого поля стоит по ссылке на строку.
+    Высоты столбцов и количество занятых ячеек обновляются при каждой фиксации
+    и очистке линий, поэтому дыры и расстояние падения считаются без обхода поля.
+    Количество занятых ячеек строки - rows[y].bit_count().
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        """
+        Инициализация пустого поля
+        width: ширина поля в ячейках
+        height: высота поля в ячейках
+        """
+        self.width = width  # Ширина поля
+        self.height = height  # Высота поля
+        self.full_mask = (1 << width) - 1  # Маска полностью заполненной строки
+        self.rows = [0] * height  # Битовые маски строк (сверху вниз)
+        self.colors = [empty_colors(width)] * height  # Индексы цветов ячеек
+        self.heights = [0] * width  # Высоты столбцов (0 - пустой столбец)
+        self.filled = 0  # Количество занятых ячеек
+
+    def fits(self, row_masks, x, y):
+        """
+        Проверка, помещается ли фигура на поле
+        row_masks: последовательность пар (dy, mask) - маски непустых строк фигуры
+        x, y: позиция левого верхнего угла фигуры
+        Возвращает True, если фигура не выходит за границы и не пересекается с занятыми ячейками
+        """
+        rows = self.rows
+        for dy, mask in row_masks:
+            # Сдвигаем маску строки фигуры на нужный столбец
+            if x >= 0:
+                shifted = mask << x
+            else:
+                # Ячейки левее нулевого столбца выходят за левую границу
+                if mask & ((1 << -x) - 1):
+                    return False
+                shifted = mask >> -x
+            # Ячейки правее последнего столбца выходят за правую границу
+            if shifted > self.full_mask:
+                return False
+            row = y + dy
+            # Выход за нижнюю границу
+            if row >= self.height:
+                return False
+            # Пересечение с занятыми ячейками (строки выше поля не проверяются)
+            if row >= 0 and rows[row] & shifted:
+                return False
+        return True
+
+    def place(self, row_masks, x, y, color_idx):
+        """
+        Фиксация фигуры на поле
+        color_idx: индекс цвета фигуры в COLORS_3D
+        Возвращает список индексов строк, которые заполнились полностью
+        """
+        full = []
+        code = color_idx + 1  # 0 зарезервирован для пустой ячейки
+        heights = self.heights
+        for dy, mask in row_masks:
+            row = y + dy
+            # Ячейки выше поля не сохраняются
+            if row < 0:
+                continue
+            shifted = mask << x if x >= 0 else mask >> -x
+            self.rows[row] |= shifted
+            self.filled += shifted.bit_count()
+            if self.colors is not None:
+                self.write_colors(row, shifted, code)
+            if self.rows[row] == self.full_mask:
+                full.append(row)
+            # Обновляем высоты столбцов, занятых этой строкой фигуры
+            level = self.height - row
+            cells = shifted
+            while cells:
+                low = cells & -cells
+                column = low.bit_length() - 1
+                if heights[column] < level:
+                    heights[column] = level
+                cells ^= low
+        full.sort()
+        return full
+
+    def write_colors(self, row, mask, code):
+        """Запись кода цвета в ячейки строки row, отмеченные битами mask (строка заменяется новой)"""
+        colors = bytearray(self.colors[row])
+        while mask:
+            low = mask & -mask  # Младший установленный бит
+            colors[low.bit_length() - 1] = code
+            mask ^= low
+        self.colors[row] = bytes(colors)
+
+    def full_rows(self):
+        """Возвращает индексы всех полностью заполненных строк"""
+        full_mask = self.full_mask
+        return [i for i, row in enumerate(self.rows) if row == full_mask]
+
+    def clear_rows(self, lines):
+        """
+        Удаление заполненных строк со сдвигом верхних строк вниз
+        lines: отсортированный по возрастанию список индексов строк
+        """
+        if not lines:
+            return
+        # Удаляем строки снизу вверх, чтобы индексы оставшихся не сдвигались
+        for line in reversed(lines):
+            del self.rows[line]
+        # Добавляем пустые строки сверху
+        count = len(lines)
+        self.rows[0:0] = [0] * count
+        self.filled -= count * self.width
+
+        # Очищенные строки полные, поэтому верх каждого столбца не ниже самой верхней из них.
+        # Столбцы с ячейками выше нее просто опускаются, остальные ищут новый верх
+        top_line = self.height - lines[0]
+        rows = self.rows
+        for x, level in enumerate(self.heights):
+            if level > top_line:
+                self.heights[x] = level - count
+            else:
+                bit = 1 << x
+                y = lines[0] + 1
+                while y < self.height and not rows[y] & bit:
+                    y += 1
+                self.heights[x] = self.height - y
+
+        if self.colors is not None:
+            for line in reversed(lines):
+                del self.colors[line]
+            self.colors[0:0] = [empty_colors(self.width)] * count
+
+    def copy(self, colors=True):
+        """
+        Копия поля
+        colors: копировать ли цвета (без цветов копия подходит только для поиска ходов)
+        """
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
+        board.full_mask = self.full_mask
+        board.rows = self.rows[:]
+        board.heights = self.heights[:]
+        board.filled = self.filled
+        if colors and self.colors is not None:
+            board.colors = self.colors[:]  # Строки цветов неизменяемы и разделяются
+        else:
+            board.colors = None
+        return board
+
+    def snapshot(self):
+        """Неизменяемый снимок поля (копируются только ссылки на строки)"""
+        colors = tuple(self.colors) if self.colors is not None else None
+        return BoardSnapshot(tuple(self.rows), colors)
+
+    def restore(self, snapshot):
+        """Возврат поля к снимку snapshot"""
+        self.rows = list(snapshot.rows)
+        self.colors = list(snapshot.colors) if snapshot.colors is not None else None
+        self.reindex()
+
+    def reindex(self):
+        """Пересчет высот столбцов и количества занятых ячеек по маскам строк"""
+        self.heights = [0] * self.width
+        self.filled = 0
+        covered = 0  # Столбцы, в которых уже встретилась занятая ячейка
+        for y, row in enumerate(self.rows):
+            self.filled += row.bit_count()
+            new = row & ~covered
+            while new:
+                low = new & -new
+                self.heights[low.bit_length() - 1] = self.height - y
+                new ^= low
+            covered |= row
+
+    def top(self):
+        """Индекс самой верхней строки с занятыми ячейками (height, если поле пусто)"""
+        return self.height - max(self.heights)
+
+    def holes(self):
+        """Количество пустых ячеек под занятыми"""
+        return sum(self.heights) - self.filled
+
+    def drop_y(self, state, x, y):
+        """
+        Строка, на которой остановится падающая фигура
+        state: состояние поворота PieceState, x, y: текущая позиция (допустимая)
+        Над стопкой расстояние считается по высотам столбцов за O(ширина фигуры);
+        под навесом фигура опускается по одной строке
+        """
+        landing = self.height
+        heights = self.heights
+        for dx, bottom in state.bottoms:
+            landing = min(landing, self.height - heights[x + dx] - 1 - bottom)
+        if landing >= y:
+            return landing
+        while self.fits(state.row_masks, x, y + 1):
+            y += 1
+        return y
+
+    def key(self):
+        """Неизменяемый ключ заполнения поля (для таблиц транспозиций)"""
+        return tuple(self.rows)
+
+    def is_filled(self, x, y):
+        """Проверка, занята ли ячейка (x, y)"""
+        return (self.rows[y] >> x) & 1 == 1
+
+    def color_at(self, x, y):
+        """Возвращает пару (цвет, тень) для ячейки (x, y) или 0, если ячейка пуста"""
+        code = self.colors[y][x]
+        return COLORS_3D[code - 1] if code else 0
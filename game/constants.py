@@ -1,12 +1,10 @@
 # constants.py - Файл с константами и цветами для игры Тетрис
 
-# Импортируем модуль pygame для работы с графикой
-import pygame
-
 # Размеры игровой сетки: ширина и высота в ячейках
 GRID_WIDTH = 10    # Ширина игрового поля в ячейках (10 столбцов)
 GRID_HEIGHT = 20   # Высота игрового поля в ячейках (20 строк)
 SIDEBAR_WIDTH = 200  # Ширина боковой панели в пикселях
+MIN_CELL_SIZE = 8  # Наименьший размер ячейки в пикселях (большое поле показывается частями)
 
 # Цвета RGB для различных элементов интерфейса
 BLACK = (0, 0, 0)        # Черный цвет
@@ -0,0 +1,276 @@
+# core.py - Игровая логика Тетриса без графики, звука и частиц
+
+# Импортируем стандартные модули и игровые модули
+import random
+from array import array
+from collections import namedtuple
+from constants import GRID_WIDTH, GRID_HEIGHT  # Импортируем размеры поля
+from board import Board  # Импортируем битовое игровое поле
+from piece import Piece  # Импортируем логику фигуры
+
+# Имена, которые экспортирует "from core import *": действия, события, частота тиков и логика игры
+__all__ = ['LEFT', 'RIGHT', 'DOWN', 'ROTATE', 'HARD_DROP', 'ACTIONS',
+           'EVENT_MOVE', 'EVENT_ROTATE', 'EVENT_LOCK', 'EVENT_LINE_CLEAR', 'EVENT_GAME_OVER',
+           'TICK_RATE', 'Event', 'GameSnapshot', 'GameCore']
+
+# Действия игрока, которые принимает GameCore.step()
+LEFT = 0  # Сдвиг влево
+RIGHT = 1  # Сдвиг вправо
+DOWN = 2  # Сдвиг вниз (ускоренное падение или гравитация)
+ROTATE = 3  # Поворот по часовой стрелке
+HARD_DROP = 4  # Мгновенное падение
+ACTIONS = (LEFT, RIGHT, DOWN, ROTATE, HARD_DROP)
+
+# Типы событий, которые возвращает GameCore.step()
+EVENT_MOVE = 'move'  # Попытка сдвига по горизонтали, data - успешен ли сдвиг
+EVENT_ROTATE = 'rotate'  # Попытка поворота, data - успешен ли поворот
+EVENT_LOCK = 'lock'  # Фигура зафиксирована на поле, data - зафиксированная фигура
+EVENT_LINE_CLEAR = 'line_clear'  # Очищены линии, data - список пар (строка, цвет)
+EVENT_GAME_OVER = 'game_over'  # Новая фигура не помещается на поле
+
+# Частота игровых тиков в секунду: время падения отсчитывается тиками,
+# а не реальными секундами, поэтому игра воспроизводима по записи действий
+TICK_RATE = 60
+
+# Событие игровой логики: тип и связанные данные
+Event = namedtuple('Event', ['kind', 'data'])
+
+# Снимок состояния игры: снимок поля, (форма, x, y, поворот) текущей фигуры,
+# форма следующей фигуры, статистика, параметры падения и состояние генератора
+GameSnapshot = namedtuple('GameSnapshot', ['board', 'piece', 'next_shape', 'score', 'level',
+                                           'lines_cleared', 'pieces', 'fall_speed', 'fall_ticks',
+                                           'game_over', 'rng_state'])
+
+
+def pack_rng_state(rng):
+    """
+    Компактное состояние генератора для снимка: 624 слова Mersenne Twister
+    хранятся одной строкой байтов (в 10 раз меньше кортежа чисел).
+    Для глобального модуля random возвращается None - его состояние общее
+    с эффектами и не восстанавливается.
+    """
+    if rng is random:
+        return None
+    version, internal, gauss = rng.getstate()
+    return version, array('I', internal).tobytes(), gauss
+
+
+def unpack_rng_state(rng, state):
+    """Восстановление состояния генератора, сохраненного pack_rng_state"""
+    if state is not None:
+        version, internal, gauss = state
+        rng.setstate((version, tuple(array('I', internal)), gauss))
+
+
+# Очки за одновременно очищенные 1, 2, 3 и 4 линии (умножаются на уровень)
+LINE_SCORES = (100, 300, 500, 800)
+
+
+class GameCore:
+    """
+    Состояние и правила игры без зависимости от pygame.
+    Каждое действие возвращает список событий, по которым слой отображения
+    проигрывает звуки и создает эффекты.
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, piece_factory=Piece, seed=None):
+        """
+        Инициализация игровой логики
+        width, height: размеры поля в ячейках
+        piece_factory: класс фигур (Piece или его наследник с отрисовкой)
+        seed: начальное значение генератора фигур (если None, используется глобальный random)
+        """
+        self.width = width  # Ширина поля
+        self.height = height  # Высота поля
+        self.piece_factory = piece_factory  # Класс создаваемых фигур
+        # Собственный генератор делает последовательность фигур воспроизводимой
+        self.rng = random.Random(seed) if seed is not None else random
+        self.next_piece = None  # Следующая фигура создается при первом сбросе
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        Сброс игры к начальному состоянию
+        seed: новое начальное значение генератора (если задано, следующая фигура
+        тоже создается заново, и игра полностью определяется этим значением)
+        """
+        if seed is not None:
+            self.rng = random.Random(seed)
+            self.next_piece = None
+
+        # Создаем пустое игровое поле
+        self.board = Board(self.width, self.height)
+
+        # Создаем первую игровую фигуру (следующая фигура сохраняется между играми)
+        self.current_piece = self.new_piece()
+        if self.next_piece is None:
+            self.next_piece = self.new_piece()
+
+        # Сбрасываем игровую статистику
+        self.score = 0  # Счет игрока
+        self.level = 1  # Уровень сложности
+        self.lines_cleared = 0  # Количество очищенных линий
+        self.pieces = 0  # Количество зафиксированных фигур
+
+        # Параметры падения фигур
+        self.fall_speed = 0.5  # Скорость падения в секундах
+        self.fall_ticks = 0  # Тиков с последнего падения
+
+        self.game_over = False  # Признак окончания игры
+
+    def new_piece(self):
+        """Создание новой фигуры в центре верхней части поля"""
+        return self.piece_factory(self.width // 2 - 1, 0, self.rng)
+
+    def snapshot(self):
+        """
+        Снимок состояния игры для отмены ходов и ветвления поиска
+        Поле в снимке разделяет строки с текущим полем, поэтому снимок почти не занимает памяти
+        """
+        piece = self.current_piece
+        return GameSnapshot(self.board.snapshot(), (piece.shape_idx, piece.x, piece.y, piece.rotation),
+                            self.next_piece.shape_idx, self.score, self.level, self.lines_cleared,
+                            self.pieces, self.fall_speed, self.fall_ticks, self.game_over,
+                            pack_rng_state(self.rng))
+
+    def restore(self, snapshot):
+        """Возврат игры к снимку snapshot (фигуры создаются заново с теми же формами)"""
+        self.board.restore(snapshot.board)
+        shape_idx, x, y, rotation = snapshot.piece
+        self.current_piece = self.piece_factory(x, y, self.rng, shape_idx)
+        self.current_piece.set_rotation(rotation)
+        self.next_piece = self.piece_factory(self.width // 2 - 1, 0, self.rng, snapshot.next_shape)
+        self.score = snapshot.score
+        self.level = snapshot.level
+        self.lines_cleared = snapshot.lines_cleared
+        self.pieces = snapshot.pieces
+        self.fall_speed = snapshot.fall_speed
+        self.fall_ticks = snapshot.fall_ticks
+        self.game_over = snapshot.game_over
+        unpack_rng_state(self.rng, snapshot.rng_state)
+
+    def valid_position(self, piece=None):
+        """
+        Проверка, является ли позиция фигуры допустимой
+        piece: фигура для проверки (если None, проверяется текущая фигура)
+        """
+        if piece is None:
+            piece = self.current_piece
+        return self.board.fits(piece.state.row_masks, piece.x, piece.y)
+
+    def step(self, action):
+        """
+        Применение одного действия игрока
+        action: одна из констант LEFT, RIGHT, DOWN, ROTATE, HARD_DROP
+        Возвращает список событий Event
+        """
+        events = []
+        if self.game_over:
+            return events
+
+        if action == LEFT:
+            self.move(-1, 0, events)
+        elif action == RIGHT:
+            self.move(1, 0, events)
+        elif action == DOWN:
+            self.move(0, 1, events)
+        elif action == ROTATE:
+            self.rotate_piece(events)
+        elif action == HARD_DROP:
+            self.hard_drop(events)
+        return events
+
+    def tick(self):
+        """
+        Один игровой тик (1 / TICK_RATE секунды)
+        Возвращает список событий (пустой, если фигура не сдвинулась)
+        """
+        if self.game_over:
+            return []
+        self.fall_ticks += 1
+        # Если прошло достаточно тиков, фигура опускается на одну строку
+        if self.fall_ticks >= round(self.fall_speed * TICK_RATE):
+            self.fall_ticks = 0
+            return self.step(DOWN)
+        return []
+
+    def move(self, dx, dy, events):
+        """
+        Перемещение текущей фигуры
+        dx: смещение по горизонтали, dy: смещение по вертикали
+        events: список, в который добавляются события
+        """
+        piece = self.current_piece
+        piece.x += dx
+        piece.y += dy
+
+        if self.valid_position(piece):
+            moved = True
+        else:
+            # Возвращаем фигуру в предыдущее положение
+            piece.x -= dx
+            piece.y -= dy
+            moved = False
+            # Если фигура не может опуститься, она фиксируется
+            if dy > 0:
+                self.lock_piece(events)
+                return
+
+        if dx != 0:
+            events.append(Event(EVENT_MOVE, moved))
+
+    def rotate_piece(self, events):
+        """Поворот текущей фигуры (если новое положение допустимо)"""
+        piece = self.current_piece
+        original_rotation = piece.rotation
+        piece.set_rotation(piece.rotate())
+        rotated = self.valid_position(piece)
+        if not rotated:
+            # Возвращаем исходное состояние поворота
+            piece.set_rotation(original_rotation)
+        events.append(Event(EVENT_ROTATE, rotated))
+
+    def hard_drop(self, events):
+        """Мгновенное падение фигуры вниз до первого препятствия"""
+        piece = self.current_piece
+        # Строка остановки берется из высот столбцов поля
+        piece.y = self.board.drop_y(piece.state, piece.x, piece.y)
+        self.lock_piece(events)
+
+    def lock_piece(self, events):
+        """Фиксация текущей фигуры, очистка линий и выдача следующей фигуры"""
+        piece = self.current_piece
+        full_lines = self.board.place(piece.state.row_masks, piece.x, piece.y, piece.shape_idx)
+        self.pieces += 1
+        events.append(Event(EVENT_LOCK, piece))
+
+        if full_lines:
+            self.clear_lines(full_lines, events)
+
+        # Следующая фигура становится текущей
+        self.current_piece = self.next_piece
+        self.next_piece = self.new_piece()
+
+        # Если новая фигура не помещается на поле - игра окончена
+        if not self.valid_position():
+            self.game_over = True
+            events.append(Event(EVENT_GAME_OVER, None))
+
+    def clear_lines(self, lines, events):
+        """
+        Очистка заполненных линий и начисление очков
+        lines: отсортированный список индексов заполненных строк
+        """
+        # Цвет первой ячейки каждой линии нужен для эффектов
+        cleared = [(line, self.board.color_at(0, line)) for line in lines]
+        self.board.clear_rows(lines)
+        events.append(Event(EVENT_LINE_CLEAR, cleared))
+
+        count = len(lines)
+        self.lines_cleared += count
+        # Очки зависят от числа одновременно очищенных линий и уровня
+        self.score += LINE_SCORES[min(count - 1, 3)] * self.level
+        # Уровень повышается каждые 10 линий
+        self.level = self.lines_cleared // 10 + 1
+        # Скорость падения растет с уровнем (но не быстрее 0.05 секунд)
+        self.fall_speed = max(0.05, 0.5 - (self.level - 1) * 0.05)
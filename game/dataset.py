@@ -0,0 +1,418 @@
+# dataset.py - Потоковая выгрузка обучающих примеров из игр в шарды .npz
+
+# Импортируем NumPy, стандартные модули и игровые модули
+import argparse
+import glob
+import os
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool, Queue, cpu_count
+import numpy as np
+from constants import GRID_WIDTH, GRID_HEIGHT  # Импортируем размеры поля
+from core import GameCore, HARD_DROP, EVENT_LOCK  # Импортируем игровую логику, действие падения и событие фиксации
+from movegen import generate_placements  # Импортируем генератор положений
+from planner import Planner  # Импортируем планировщик
+from replay import InputLog, Session, replay_events  # Импортируем записи игр и их воспроизведение
+from runner import policy_rng  # Импортируем генератор случайных решений стратегии
+
+# Стратегии выбора положения при самостоятельной игре
+POLICIES = ('random', 'planner')
+
+# Наибольшее количество примеров в одном наборе массивов, который процесс пула
+# передает на запись: память процесса не растет с длиной игры
+CHUNK_SAMPLES = 4096
+
+# Очередь готовых наборов массивов в процессе пула (задается при запуске процесса)
+chunk_queue = None
+
+
+def row_dtype(width):
+    """Наименьший беззнаковый тип NumPy, в который помещается битовая маска строки"""
+    for dtype in (np.uint16, np.uint32, np.uint64):
+        if width <= np.dtype(dtype).itemsize * 8:
+            return dtype
+    raise ValueError(f"Слишком широкое поле для битовых масок строк: {width}")
+
+
+def int_dtype(limit):
+    """Наименьший знаковый тип NumPy, в который помещаются значения от -limit до limit"""
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        if limit <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"Слишком большое значение: {limit}")
+
+
+def uint_dtype(limit):
+    """Наименьший беззнаковый тип NumPy, в который помещаются значения от 0 до limit"""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if limit <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"Слишком большое значение: {limit}")
+
+
+def empty_batch(count, width, height):
+    """
+    Массивы для count примеров:
+    boards (count, height) - битовые маски строк поля перед ходом,
+    pieces (count, 2) - формы текущей и следующей фигур,
+    placements (count, 3) - поворот, x и y выбранного положения,
+    rewards (count,) - прирост счета за ход
+    Типы масок и координат подбираются по размерам поля, чтобы значения не переполнялись
+    """
+    return {
+        'boards': np.zeros((count, height), dtype=row_dtype(width)),
+        'pieces': np.zeros((count, 2), dtype=np.int8),
+        'placements': np.zeros((count, 3), dtype=int_dtype(max(width, height))),
+        'rewards': np.zeros(count, dtype=np.int32),
+    }
+
+
+def sample_batch(samples, width, height):
+    """
+    Массивы в формате empty_batch из списка примеров
+    samples: кортежи (маски строк, (текущая, следующая фигура), (поворот, x, y), награда)
+    """
+    batch = empty_batch(len(samples), width, height)
+    if samples:
+        boards, pieces, placements, rewards = zip(*samples)
+        batch['boards'][:] = boards
+        batch['pieces'][:] = pieces
+        batch['placements'][:] = placements
+        batch['rewards'][:] = rewards
+    return batch
+
+
+def batch_features(boards, width):
+    """
+    Признаки полей, посчитанные сразу для всего массива масок строк
+    boards: массив (n, height) битовых масок
+    Возвращает словарь: heights (n, width) - высоты столбцов, holes (n,) - пустые
+    ячейки под занятыми, row_transitions (n,) - смены занятой и пустой ячейки
+    вдоль строк (стены считаются занятыми)
+    """
+    height = boards.shape[1]
+    cells = ((boards[:, :, None] >> np.arange(width, dtype=boards.dtype)) & 1).astype(bool)
+    has_cells = cells.any(axis=1)
+    top = cells.argmax(axis=1)  # Первая сверху занятая строка каждого столбца
+    heights = np.where(has_cells, height - top, 0).astype(uint_dtype(height))
+    # Счетчики не больше количества переходов (width + 1) * height
+    count_dtype = int_dtype((width + 1) * height)
+    covered = np.logical_or.accumulate(cells, axis=1)
+    holes = (covered & ~cells).sum(axis=(1, 2), dtype=count_dtype)
+    walled = np.pad(cells, ((0, 0), (0, 0), (1, 1)), constant_values=True)
+    transitions = (walled[:, :, 1:] != walled[:, :, :-1]).sum(axis=(1, 2), dtype=count_dtype)
+    return {'heights': heights, 'holes': holes, 'row_transitions': transitions}
+
+
+class ShardWriter:
+    """
+    Запись примеров в шарды фиксированного размера.
+    Примеры копируются в заранее выделенные массивы на chunk_size примеров;
+    заполненный буфер сохраняется в отдельный файл .npz и переиспользуется,
+    поэтому память не растет с длиной запуска.
+    """
+
+    def __init__(self, directory, chunk_size=100000, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 features=False, compress=False, prefix='shard'):
+        """
+        Инициализация записи
+        directory: каталог для шардов (создается при необходимости)
+        chunk_size: количество примеров в одном шарде
+        features: добавлять ли в шарды признаки batch_features
+        compress: сжимать ли шарды (медленнее, но меньше на диске)
+        prefix: начало имен файлов шардов
+        Поля шире 64 столбцов не помещаются в маски строк - для них ValueError
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.width = width
+        self.height = height
+        self.features = features
+        self.compress = compress
+        self.prefix = prefix
+        self.buffer = empty_batch(chunk_size, width, height)
+        self.count = 0  # Примеров в текущем буфере
+        self.shards = 0  # Записанных шардов
+        self.samples = 0  # Всего принятых примеров
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, rows, current, next_piece, placement, reward):
+        """
+        Добавление одного примера
+        rows: битовые маски строк поля (например, Board.rows)
+        current, next_piece: формы текущей и следующей фигур
+        placement: (поворот, x, y) выбранного положения
+        """
+        i = self.count
+        buffer = self.buffer
+        buffer['boards'][i] = rows
+        buffer['pieces'][i] = (current, next_piece)
+        buffer['placements'][i] = placement[:3]
+        buffer['rewards'][i] = reward
+        self.count += 1
+        self.samples += 1
+        if self.count == self.chunk_size:
+            self.flush()
+
+    def add_batch(self, batch):
+        """Добавление массивов примеров в формате empty_batch (копируются частями по месту в буфере)"""
+        total = len(batch['rewards'])
+        done = 0
+        while done < total:
+            take = min(total - done, self.chunk_size - self.count)
+            for name, array in self.buffer.items():
+                array[self.count:self.count + take] = batch[name][done:done + take]
+            self.count += take
+            done += take
+            if self.count == self.chunk_size:
+                self.flush()
+        self.samples += total
+
+    def flush(self):
+        """Сохранение накопленных примеров в очередной шард"""
+        if self.count == 0:
+            return
+        arrays = {name: array[:self.count] for name, array in self.buffer.items()}
+        if self.features:
+            arrays.update(batch_features(arrays['boards'], self.width))
+        arrays['width'] = np.int16(self.width)
+
+        path = os.path.join(self.directory, f"{self.prefix}-{self.shards:05d}.npz")
+        tmp_path = path + '.tmp'
+        save = np.savez_compressed if self.compress else np.savez
+        with open(tmp_path, 'wb') as f:
+            save(f, **arrays)
+        # Замена файла целиком, чтобы прерывание не оставило недописанный шард
+        os.replace(tmp_path, path)
+        self.shards += 1
+        self.count = 0
+
+    def close(self):
+        """Запись последнего неполного шарда"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_shards(directory, prefix='shard'):
+    """Чтение шардов по порядку; генерирует словари массивов"""
+    for path in sorted(glob.glob(os.path.join(directory, f"{prefix}-*.npz"))):
+        with np.load(path) as shard:
+            yield {name: shard[name] for name in shard.files}
+
+
+def play_samples(seed, policy='random', max_pieces=None, chunk_size=CHUNK_SAMPLES):
+    """
+    Одна игра с записью примеров
+    seed: начальное значение генератора фигур, policy: стратегия из POLICIES,
+    max_pieces: лимит фигур (None - до конца игры)
+    Генерирует массивы примеров в формате empty_batch не больше чем по chunk_size
+    """
+    core = GameCore(seed=seed)
+    rng = policy_rng(seed)
+    planner = Planner(depth=1) if policy == 'planner' else None
+    samples = []
+
+    while not core.game_over and (max_pieces is None or core.pieces < max_pieces):
+        piece = core.current_piece
+        start = (piece.x, piece.y, piece.rotation)
+        if planner is not None:
+            queue = [piece.shape_idx, core.next_piece.shape_idx]
+            placement = planner.best_placement(core.board, queue, start)
+        else:
+            # Случайное положение выбирается генератором стратегии, а не генератором фигур,
+            # поэтому примеры зависят только от seed, а фигуры - те же, что у планировщика
+            options = generate_placements(core.board, piece.shape_idx, *start)
+            placement = options[rng.randrange(len(options))] if options else None
+        if placement is None:
+            core.step(HARD_DROP)
+            continue
+
+        rows = core.board.rows[:]
+        pieces = (piece.shape_idx, core.next_piece.shape_idx)
+        score = core.score
+        count = core.pieces
+        for action in placement.actions:
+            core.step(action)
+            if core.pieces != count:
+                break
+        samples.append((rows, pieces, placement[:3], core.score - score))
+        if len(samples) == chunk_size:
+            yield sample_batch(samples, core.width, core.height)
+            samples = []
+
+    if samples:
+        yield sample_batch(samples, core.width, core.height)
+
+
+def replay_samples(path, chunk_size=CHUNK_SAMPLES):
+    """
+    Примеры из записи игры path (.ttr): поле и фигуры на начало каждой фигуры,
+    положение, в котором фигура зафиксирована, и прирост счета за нее.
+    Фигуры, ходы которых игрок отменил, в примеры не попадают; пример выдается,
+    когда до его фигуры уже нельзя вернуться отменой (ее снимок вытеснен из
+    истории сессии), поэтому в памяти не больше UNDO_DEPTH отложенных примеров
+    Генерирует массивы примеров в формате empty_batch не больше чем по chunk_size
+    """
+    log = InputLog.load(path)
+    session = Session(GameCore(log.width, log.height), record=False)
+    session.reset(log.seed)
+    core = session.core
+    pending = deque()  # Примеры, которые еще можно отменить: (номер фигуры, пример)
+    samples = []
+
+    def piece_start():
+        """Номер текущей фигуры, маски строк поля, формы фигур и счет на ее начало"""
+        return (core.pieces, core.board.rows[:], (core.current_piece.shape_idx, core.next_piece.shape_idx),
+                core.score)
+
+    start = piece_start()
+    for events in replay_events(session, log):
+        if core.pieces < start[0]:
+            # Отмена: примеры отмененных фигур отбрасываются
+            while pending and pending[-1][0] >= core.pieces:
+                pending.pop()
+            start = piece_start()
+            continue
+        for event in events:
+            if event.kind != EVENT_LOCK:
+                continue
+            piece = event.data
+            index, rows, pieces, score = start
+            pending.append((index, (rows, pieces, (piece.rotation, piece.x, piece.y), core.score - score)))
+            start = piece_start()
+
+            oldest = session.history[0].pieces  # Раньше этой фигуры отмена не вернет
+            while pending and pending[0][0] < oldest:
+                samples.append(pending.popleft()[1])
+                if len(samples) == chunk_size:
+                    yield sample_batch(samples, log.width, log.height)
+                    samples = []
+
+    samples.extend(sample for _, sample in pending)
+    for i in range(0, len(samples), chunk_size):
+        yield sample_batch(samples[i:i + chunk_size], log.width, log.height)
+
+
+def init_worker(queue):
+    """Запуск процесса пула: запоминаем очередь, в которую отправляются примеры"""
+    global chunk_queue
+    chunk_queue = queue
+
+
+def run_task(task):
+    """
+    Задача в процессе пула: task - (номер задачи, источник, аргументы источника)
+    Массивы примеров отправляются в очередь по мере готовности, а в конце -
+    (номер задачи, None), даже если источник завершился ошибкой
+    """
+    task_id, source, args = task
+    try:
+        for batch in source(*args):
+            chunk_queue.put((task_id, batch))
+    finally:
+        chunk_queue.put((task_id, None))
+
+
+def export_samples(writer, source, tasks, workers=None):
+    """
+    Запись примеров источника source (play_samples или replay_samples) для всех
+    наборов аргументов tasks в пуле процессов
+    Процессы передают примеры частями через очередь ограниченного размера
+    (если запись не успевает, процессы ждут), а задач одновременно выполняется
+    не больше, чем процессов, поэтому память не зависит ни от длины игр, ни
+    от их количества. Возвращает количество записанных примеров.
+    """
+    workers = workers or cpu_count()
+    queue = Queue(2 * workers)
+    tasks = enumerate(tasks)
+    running = {}  # Номер задачи -> результат задачи в пуле
+    written = 0
+    with Pool(workers, init_worker, (queue,)) as pool:
+
+        def submit(count):
+            """Запуск следующих count задач"""
+            for task_id, args in islice(tasks, count):
+                running[task_id] = pool.apply_async(run_task, ((task_id, source, args),))
+
+        submit(workers)
+        while running:
+            task_id, batch = queue.get()
+            if batch is None:
+                running.pop(task_id).get()  # Ошибка задачи поднимается здесь
+                submit(1)
+                continue
+            writer.add_batch(batch)
+            written += len(batch['rewards'])
+    return written
+
+
+def export_self_play(writer, seeds, policy='random', workers=None, max_pieces=None):
+    """Запись примеров самостоятельной игры для всех seeds; возвращает количество примеров"""
+    return export_samples(writer, play_samples, ((seed, policy, max_pieces) for seed in seeds), workers)
+
+
+def replay_paths(paths):
+    """Файлы записей из списка файлов и каталогов (из каталога берутся все файлы .ttr)"""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, '*.ttr')))
+        else:
+            yield path
+
+
+def export_replays(writer, paths, workers=None):
+    """Запись примеров из записей игр paths; возвращает количество примеров"""
+    return export_samples(writer, replay_samples, ((path,) for path in paths), workers)
+
+
+def main():
+    """Выгрузка примеров самостоятельной игры или записей игр из командной строки"""
+    parser = argparse.ArgumentParser(description="Выгрузка обучающих примеров Тетриса")
+    parser.add_argument('--out', default='dataset', help="каталог для шардов")
+    parser.add_argument('--games', type=int, default=100, help="количество игр")
+    parser.add_argument('--seed', type=int, default=0, help="начальное значение для первой игры")
+    parser.add_argument('--policy', choices=POLICIES, default='random', help="стратегия выбора хода")
+    parser.add_argument('--max-pieces', type=int, default=1000, help="лимит фигур в одной игре")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="примеров в одном шарде")
+    parser.add_argument('--features', action='store_true', help="добавить признаки полей")
+    parser.add_argument('--compress', action='store_true', help="сжимать шарды")
+    parser.add_argument('--workers', type=int, default=None, help="количество процессов")
+    parser.add_argument('--replays', nargs='+', default=None,
+                        help="файлы записей .ttr или каталоги с ними (вместо самостоятельной игры)")
+    args = parser.parse_args()
+
+    width, height = GRID_WIDTH, GRID_HEIGHT
+    if args.replays is not None:
+        paths = list(replay_paths(args.replays))
+        if not paths:
+            parser.error("записи игр не найдены")
+        # Все примеры шардов - с поля одного размера
+        try:
+            sizes = {(log.width, log.height) for log in map(InputLog.load, paths)}
+        except (OSError, ValueError) as e:
+            parser.error(f"не удалось прочитать запись: {e}")
+        if len(sizes) > 1:
+            parser.error("записи сделаны на полях разных размеров")
+        width, height = sizes.pop()
+
+    start = time.perf_counter()
+    with ShardWriter(args.out, args.chunk_size, width, height,
+                     features=args.features, compress=args.compress) as writer:
+        if args.replays is not None:
+            samples = export_replays(writer, paths, args.workers)
+        else:
+            samples = export_self_play(writer, range(args.seed, args.seed + args.games),
+                                       args.policy, args.workers, args.max_pieces)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Примеров: {samples}, шардов: {writer.shards}, примеров/мин: {samples * 60 / elapsed:.0f}")
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# env.py - Среда в стиле Gym для обучения агентов и ее векторный вариант
+
+# Импортируем NumPy, стандартные модули и игровые модули
+import numpy as np
+import weakref
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+from constants import GRID_WIDTH, GRID_HEIGHT  # Импортируем размеры поля
+from core import GameCore, ACTIONS  # Импортируем игровую логику и действия
+
+# Значения ячеек в наблюдении
+EMPTY_CELL = 0  # Пустая ячейка
+FILLED_CELL = 1  # Зафиксированная ячейка
+PIECE_CELL = 2  # Ячейка падающей фигуры
+
+# Наибольшая ширина поля, строки которого помещаются в int64 целиком
+INT64_ROW_WIDTH = 63
+
+
+def write_observation(core, board_out, pieces_out):
+    """
+    Запись наблюдения в готовые массивы без создания новых
+    board_out: массив (height, width) uint8, pieces_out: массив из 2 элементов int8
+    """
+    width = core.width
+    if width <= INT64_ROW_WIDTH:
+        bits = np.arange(width)
+        rows = np.array(core.board.rows, dtype=np.int64)
+        board_out[:] = (rows[:, None] >> bits) & 1
+    else:
+        # Широкие строки не помещаются в int64: раскладываем их по байтам
+        size = (width + 7) // 8
+        data = b''.join(row.to_bytes(size, 'little') for row in core.board.rows)
+        cells = np.frombuffer(data, dtype=np.uint8).reshape(core.height, size)
+        board_out[:] = np.unpackbits(cells, axis=1, bitorder='little')[:, :width]
+    if not core.game_over:
+        piece = core.current_piece
+        for x, y in piece.get_positions():
+            if 0 <= y < core.height:
+                board_out[y, x] = PIECE_CELL
+    pieces_out[0] = core.current_piece.shape_idx
+    pieces_out[1] = core.next_piece.shape_idx
+
+
+class TetrisEnv:
+    """
+    Среда с интерфейсом reset/step поверх GameCore.
+    Наблюдение - словарь с полем 'board' (height, width) из значений
+    EMPTY_CELL, FILLED_CELL, PIECE_CELL и полем 'pieces' (текущая и следующая фигуры).
+    Награда - прирост счета за шаг.
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        """
+        Инициализация среды
+        width, height: размеры поля
+        seed: начальное значение генератора фигур
+        """
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.action_count = len(ACTIONS)  # Количество возможных действий
+        self.board = np.zeros((height, width), dtype=np.uint8)  # Буфер наблюдения поля
+        self.pieces = np.zeros(2, dtype=np.int8)  # Буфер наблюдения фигур
+        self.core = None
+
+    def reset(self, seed=None):
+        """
+        Начало новой игры
+        seed: начальное значение генератора (если None, используется seed среды)
+        Возвращает наблюдение
+        """
+        if seed is None:
+            seed = self.seed
+        self.core = GameCore(self.width, self.height, seed=seed)
+        return self.observe()
+
+    def step(self, action):
+        """
+        Применение действия
+        action: индекс действия из core.ACTIONS
+        Возвращает (наблюдение, награда, игра окончена, информация)
+        """
+        core = self.core
+        score = core.score
+        core.step(ACTIONS[action])
+        info = {'lines': core.lines_cleared, 'level': core.level, 'pieces': core.pieces}
+        return self.observe(), core.score - score, core.game_over, info
+
+    def observe(self):
+        """Заполнение буферов наблюдения текущим состоянием игры"""
+        write_observation(self.core, self.board, self.pieces)
+        return {'board': self.board, 'pieces': self.pieces}
+
+
+def buffer_layout(count, width, height):
+    """
+    Расположение массивов векторной среды в одном блоке общей памяти
+    Возвращает словарь имя -> (форма, тип, смещение) и общий размер в байтах
+    """
+    fields = (
+        ('boards', (count, height, width), np.uint8),
+        ('pieces', (count, 2), np.int8),
+        ('rewards', (count,), np.float32),
+        ('dones', (count,), np.bool_),
+        ('actions', (count,), np.int8),
+    )
+    layout = {}
+    offset = 0
+    for name, shape, dtype in fields:
+        # Выравниваем каждый массив по 8 байтам
+        offset = (offset + 7) // 8 * 8
+        layout[name] = (shape, dtype, offset)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, offset
+
+
+def map_buffers(shm, layout):
+    """Создание массивов NumPy поверх общей памяти (без копирования)"""
+    return {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for name, (shape, dtype, offset) in layout.items()}
+
+
+def vec_worker(conn, shm_name, layout, index, width, height, seed):
+    """
+    Процесс векторной среды: ждет команды и пишет наблюдения в общую память
+    Команды: 'reset', 'step' (действие берется из общего массива actions) и 'close'
+    """
+    shm = SharedMemory(name=shm_name)
+    buffers = map_buffers(shm, layout)
+    env = TetrisEnv(width, height)
+    env.board = buffers['boards'][index]
+    env.pieces = buffers['pieces'][index]
+    games = 0  # Количество начатых игр (для seed следующей игры)
+
+    try:
+        while True:
+            command = conn.recv()
+            if command == 'reset' or (command == 'step' and env.core is None):
+                env.reset(None if seed is None else seed + games)
+                games += 1
+                buffers['rewards'][index] = 0
+                buffers['dones'][index] = False
+            elif command == 'step':
+                _, reward, done, _ = env.step(int(buffers['actions'][index]))
+                buffers['rewards'][index] = reward
+                buffers['dones'][index] = done
+                # Законченная игра сразу начинается заново, флаг done остается до следующего шага
+                if done:
+                    env.reset(None if seed is None else seed + games)
+                    games += 1
+            elif command == 'close':
+                conn.send(True)
+                break
+            conn.send(True)  # Сигнал о том, что данные записаны
+    finally:
+        del env, buffers
+        shm.close()
+
+
+def release_vec_env(shm, connections, processes):
+    """
+    Остановка процессов векторной среды и удаление блока общей памяти
+    Вызывается один раз: из close() или сборщиком мусора, если среду не закрыли
+    """
+    for conn in connections:
+        try:
+            conn.send('close')
+        except OSError:
+            pass  # Процесс уже завершился
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for conn in connections:
+        conn.close()
+    shm.close()
+    shm.unlink()
+
+
+class VecTetrisEnv:
+    """
+    Векторная среда из count процессов. Поля, фигуры, награды и флаги окончания
+    всех сред лежат в одном блоке общей памяти, поэтому наблюдения не копируются
+    между процессами: step() возвращает представления этих массивов.
+    Среду нужно закрыть (close() или блок with); если этого не сделать, процессы
+    и общая память освобождаются, когда среда удаляется сборщиком мусора.
+    Массивы из reset() и step() действительны, только пока среда открыта.
+    """
+
+    def __init__(self, count, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        """
+        Инициализация векторной среды
+        count: количество сред (и процессов)
+        seed: начальное значение; среда i использует seed + i * 1000000
+        """
+        self.count = count
+        layout, size = buffer_layout(count, width, height)
+        self.shm = SharedMemory(create=True, size=size)
+        self.buffers = map_buffers(self.shm, layout)
+        self.connections = []
+        self.processes = []
+        # Финализатор держит сами списки, поэтому видит и процессы, запущенные ниже
+        self.finalizer = weakref.finalize(self, release_vec_env, self.shm, self.connections, self.processes)
+        try:
+            for i in range(count):
+                parent, child = Pipe()
+                env_seed = None if seed is None else seed + i * 1000000
+                process = Process(target=vec_worker,
+                                  args=(child, self.shm.name, layout, i, width, height, env_seed),
+                                  daemon=True)
+                process.start()
+                self.connections.append(parent)
+                self.processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def broadcast(self, command):
+        """Отправка команды всем процессам и ожидание их ответов"""
+        for conn in self.connections:
+            conn.send(command)
+        for conn in self.connections:
+            conn.recv()
+
+    def reset(self):
+        """Начало новых игр во всех средах; возвращает (поля, фигуры)"""
+        self.broadcast('reset')
+        return self.buffers['boards'], self.buffers['pieces']
+
+    def step(self, actions):
+        """
+        Шаг во всех средах
+        actions: массив индексов действий длины count
+        Возвращает (поля, фигуры, награды, флаги окончания) - представления общей памяти,
+        которые перезаписываются следующим шагом
+        """
+        self.buffers['actions'][:] = actions
+        self.broadcast('step')
+        b = self.buffers
+        return b['boards'], b['pieces'], b['rewards'], b['dones']
+
+    def close(self):
+        """Завершение процессов и освобождение общей памяти (повторный вызов ничего не делает)"""
+        self.buffers = None
+        self.finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,45 @@
+# fonts.py - Реестр шрифтов с ленивой загрузкой по ступеням размера
+
+# Импортируем необходимые модули
+import pygame
+
+# Шаг ступеней размера шрифта в пунктах: близкие размеры используют один объект Font
+FONT_SIZE_STEP = 2
+
+
+class FontRegistry:
+    """
+    Реестр шрифтов одного семейства. Файл шрифта ищется один раз (поиск
+    системных шрифтов просматривает весь их список и заметно задерживает
+    кадр), а объекты Font создаются при первом запросе размера и хранятся
+    по ступеням FONT_SIZE_STEP, поэтому изменение размера окна не создает
+    шрифты заново.
+    """
+
+    def __init__(self, name=None, step=FONT_SIZE_STEP):
+        """
+        Инициализация реестра
+        name: имя системного шрифта (None - встроенный шрифт pygame)
+        step: шаг ступеней размера
+        """
+        self.name = name
+        self.step = step
+        self.path = None  # Файл шрифта (None - встроенный шрифт)
+        self.resolved = False  # Выполнен ли поиск файла шрифта
+        self.fonts = {}  # Ступень размера -> Font
+
+    def bucket(self, size):
+        """Ступень, к которой относится размер size"""
+        return max(self.step, round(size / self.step) * self.step)
+
+    def get(self, size):
+        """Шрифт размера size (округленного до ступени); загружается при первом запросе"""
+        size = self.bucket(size)
+        font = self.fonts.get(size)
+        if font is None:
+            if not self.resolved:
+                # Встроенный шрифт не требует поиска среди системных
+                self.path = pygame.font.match_font(self.name) if self.name else None
+                self.resolved = True
+            font = self.fonts[size] = pygame.font.Font(self.path, size)
+        return font
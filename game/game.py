@@ -1,20 +1,72 @@
 # game.py - Основной класс игры Тетрис с всей игровой логикой и эффектами
 
 # Импортируем необходимые модули
+import os
 import sys
+import time
 from tetromino import Tetromino  # Импортируем класс тетрамино
 from constants import *  # Импортируем все константы
 from ui import UI  # Импортируем класс интерфейса
 from sound_manager import SoundManager  # Импортируем менеджер звуков
-from particle import ParticleSystem  # Импортируем систему частиц
+from particle import create_particle_system  # Импортируем систему частиц
+from sprites import CellAtlas  # Импортируем атлас спрайтов ячеек
+from core import *  # Импортируем игровую логику, действия и события
+from solver import Solver  # Импортируем поиск очистки поля для подсказок
+from rotations import ROTATIONS  # Импортируем таблицы поворотов
+from replay import Session, UNDO, END  # Импортируем игровую сессию с записью действий
+from paths import user_data_dir  # Импортируем каталог данных пользователя
 import pygame
 
+# Звуки, которые проигрываются для событий игровой логики
+EVENT_SOUNDS = {
+    EVENT_MOVE: 'move',
+    EVENT_ROTATE: 'rotate',
+    EVENT_LOCK: 'drop',
+    EVENT_LINE_CLEAR: 'line_clear',
+}
+
+# Лимит узлов поиска подсказки
+HINT_NODES = 2000
+
+# Сколько узлов поиска подсказки просматривается за один кадр: узел с перебором
+# положений стоит до полумиллисекунды, поэтому поиск распределяется по кадрам
+# (кадр занимает до 5 мс, подсказка появляется в среднем через 3 кадра, не позже 13)
+HINT_SLICE = 4
+
+# Каталог для записей законченных игр (в данных пользователя, а не в текущем каталоге)
+REPLAY_DIR = os.path.join(user_data_dir(), 'replays')
+
+# Запас слоя поля вокруг видимой области с каждой стороны (доля ее размера)
+LAYER_MARGIN = 0.25
+
+# Сколько последних записей хранится (более старые удаляются)
+MAX_REPLAYS = 100
+
+# Длительность игрового тика в секундах
+TICK_SECONDS = 1 / TICK_RATE
+
+
+def prune_replays(directory, keep):
+    """Удаление записей в directory, кроме keep самых новых (имена начинаются с даты и времени)"""
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.ttr'))
+    for name in names[:max(0, len(names) - keep)]:
+        os.remove(os.path.join(directory, name))
+
 
 class TetrisGame:
     """Основной класс игры Тетрис"""
 
-    def __init__(self):
-        """Инициализация игры Тетрис"""
+    def __init__(self, seed=None, replay=None, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 record=True, replay_dir=REPLAY_DIR, max_replays=MAX_REPLAYS):
+        """
+        Инициализация игры Тетрис
+        seed: начальное значение генератора фигур каждой игры (None - случайное для каждой игры)
+        replay: запись InputLog для воспроизведения вместо управления с клавиатуры
+        width, height: размеры поля в ячейках (у записи берутся из нее)
+        record: записывать ли действия игрока и сохранять ли записи игр
+        replay_dir: каталог для записей
+        max_replays: сколько последних записей хранить (None - все)
+        """
         # Получаем информацию о текущем экране для определения его размеров
         info = pygame.display.Info()
         self.screen_width = info.current_w  # Ширина текущего экрана
@@ -34,285 +86,446 @@ class TetrisGame:
         self.sound_manager = SoundManager()
 
         # Создаем систему частиц
-        self.particle_system = ParticleSystem()
+        self.particle_system = create_particle_system()
+
+        # Создаем игровую логику с фигурами, умеющими себя рисовать, и сессию,
+        # которая отсчитывает тики и записывает действия игрока
+        self.replay = replay
+        if replay is not None:
+            self.core = GameCore(replay.width, replay.height, Tetromino)
+        else:
+            self.core = GameCore(width, height, Tetromino)
+        self.session = Session(self.core, record=record and replay is None)
+        self.replay_dir = replay_dir
+        self.max_replays = max_replays
+        self.seed = seed
+        self.tick_time = 0  # Накопленное время, еще не превращенное в тики
 
         # Инициализируем игровое состояние
         self.reset_game()  # Сбрасываем игру к начальному состоянию
-        self.game_state = "menu"  # Устанавливаем начальное состояние - главное меню
-        self.next_piece = self.new_piece()  # Создаем первую следующую фигуру
+        # Запись воспроизводится сразу, обычная игра начинается с главного меню
+        self.game_state = "playing" if replay is not None else "menu"
 
         # Переменные для масштабирования игрового поля
+        self.show_hints = False  # Показывать ли подсказки (переключается клавишей H)
         self.grid_size = 30  # Размер одной ячейки сетки
+        self.cell_sprites = CellAtlas(self.grid_size)  # Готовые спрайты ячеек для этого размера
+        self.board_layer = None  # Нарисованный фон, сетка и упавшие фигуры (None - перерисовать)
+        self.board_layer_key = None  # Размер ячейки и размеры слоя в ячейках
+        self.layer_col = 0  # Первый столбец поля в слое
+        self.layer_row = 0  # Первая строка поля в слое
+        self.grid_pattern_surface = None  # Готовый фон с сеткой
+        self.grid_pattern_key = None  # Размер ячейки и размеры фона с сеткой в ячейках
+
+        # Частичное обновление экрана
+        self.background = None  # Кадр игры без подвижных элементов (None - нарисовать заново)
+        self.background_key = None  # Размеры окна и статистика, для которых нарисован фон
+        self.background_view = None  # Первые видимые столбец и строка поля в фоне
+        self.dirty_rects = []  # Прямоугольники подвижных элементов прошлого кадра
+        self.overlay_key = None  # Состояние и размеры последнего кадра меню, паузы или конца игры
+        self.buttons = ()  # Кнопки последнего кадра меню, паузы или конца игры
         self.play_area_x = 0  # Горизонтальная позиция игрового поля
         self.play_area_y = 0  # Вертикальная позиция игрового поля
         self.sidebar_x = 0  # Горизонтальная позиция боковой панели
 
+        # Видимая область поля: большое поле не помещается на экран целиком,
+        # поэтому показывается окно из view_cols x view_rows ячеек вокруг фигуры
+        self.viewport_x = 0  # Горизонтальная позиция видимой области на экране
+        self.viewport_y = 0  # Вертикальная позиция видимой области на экране
+        self.view_col = 0  # Первый видимый столбец
+        self.view_row = 0  # Первая видимая строка
+        self.view_cols = self.core.width  # Количество видимых столбцов
+        self.view_rows = self.core.height  # Количество видимых строк
+
     def reset_game(self):
         """Сброс игры к начальному состоянию"""
-        # Создаем пустую игровую сетку (20 строк по 10 столбцов)
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-
-        # Создаем первую игровую фигуру
-        self.current_piece = self.new_piece()
-
-        # Сбрасываем игровую статистику
-        self.score = 0  # Счет игрока
-        self.level = 1  # Уровень сложности
-        self.lines_cleared = 0  # Количество очищенных линий
-
-        # Параметры падения фигур
-        self.fall_speed = 0.5  # Скорость падения в секундах
-        self.fall_time = 0  # Время с последнего падения
+        # Сохраняем запись прерванной игры
+        self.save_replay()
+
+        # Сбрасываем поле, фигуры и статистику в игровой логике
+        if self.replay is not None:
+            self.session.reset(self.replay.seed)
+            self.replay_inputs = self.replay.inputs()  # Еще не примененные действия записи
+            self.replay_next = next(self.replay_inputs, None)  # Ближайшее действие записи
+        else:
+            self.session.reset(self.seed)
+        self.tick_time = 0
+        self.board_layer = None  # Поле новой игры пустое - слой поля перерисовывается
 
         # Состояние паузы
         self.paused = False
 
-    def new_piece(self):
-        """Создание новой фигуры"""
-        # Создаем новую фигуру в центре верхней части игрового поля
-        return Tetromino(GRID_WIDTH // 2 - 1, 0)
+        # Подсказка: положение текущей фигуры и ее описание для сайдбара
+        self.hint = None
+        self.hint_label = "нет"
+        self.hint_key = None  # Состояние игры, для которого ищется подсказка
+        self.hint_steps = None  # Незаконченный пошаговый поиск подсказки
 
-    def valid_position(self, piece=None):
+    def apply_action(self, action):
         """
-        Проверка, является ли позиция фигуры допустимой (не выходит за границы и не пересекается с другими фигурами)
-        piece: фигура для проверки (если None, проверяется текущая фигура)
-        Возвращает True, если позиция допустима, иначе False
+        Применение действия игрока к игровой логике
+        action: одна из констант LEFT, RIGHT, DOWN, ROTATE, HARD_DROP или UNDO
         """
-        # Если фигура не указана, используем текущую фигуру
-        if piece is None:
-            piece = self.current_piece
-
-        # Получаем все позиции ячеек фигуры
-        for x, y in piece.get_positions():
-            # Проверяем, не выходит ли фигура за границы игрового поля по горизонтали
-            if x < 0 or x >= GRID_WIDTH:
-                return False  # Вышла за левую или правую границу
-
-            # Проверяем, не выходит ли фигура за нижнюю границу
-            if y >= GRID_HEIGHT:
-                return False  # Вышла за нижнюю границу
-
-            # Проверяем, не пересекается ли фигура с уже упавшими фигурами
-            # (только для ячеек внутри игрового поля)
-            if y >= 0 and self.grid[y][x]:
-                return False  # Пересекается с другой фигурой
-
-        return True  # Позиция допустима
-
-    def merge_piece(self):
-        """Объединение фигуры с игровым полем (фиксация фигуры на поле)"""
-        # Получаем все позиции ячеек текущей фигуры
-        for x, y in self.current_piece.get_positions():
-            # Проверяем, что ячейка находится внутри игрового поля
-            if y >= 0:
-                # Помещаем цвет фигуры в соответствующую ячейку игрового поля
-                self.grid[y][x] = self.current_piece.color
-
-    # Замени эту функцию в game.py на следующую:
-
-    def clear_lines(self):
-        """Очистка заполненных линий с эффектами"""
-        lines_to_clear = []  # Список для хранения индексов заполненных линий
-
-        # Проходим по каждой строке игрового поля
-        for i, row in enumerate(self.grid):
-            # Проверяем, заполнена ли строка (все ячейки не равны 0)
-            if all(cell != 0 for cell in row):
-                lines_to_clear.append(i)  # Добавляем индекс заполненной строки
-
-        # Если есть заполненные строки для очистки
-        if lines_to_clear:
-            # Воспроизводим звук очистки линий
-            self.sound_manager.play_sound('line_clear')
-
-            # Создаем эффекты частиц для каждой очищенной линии
-            for line in lines_to_clear:
-                # Получаем цвет первой ячейки в линии для эффекта частиц
-                color = self.grid[line][0] if self.grid[line][0] else ((255, 255, 255), (200, 200, 200))
-                # Добавляем эффект частиц по центру очищенной линии
-                y_pos = self.play_area_y + line * self.grid_size + self.grid_size // 2
-                self.particle_system.add_line_clear_effect(
-                    self.play_area_x + GRID_WIDTH * self.grid_size // 2,
-                    y_pos,
-                    color
-                )
-
-            # Создаем новую сетку без заполненных линий
-            new_grid = []
-            cleared_count = 0
-
-            # Подсчитываем количество очищенных линий
-            cleared_count = len(lines_to_clear)
-
-            # Добавляем пустые строки сверху (количество равно числу очищенных линий)
-            for _ in range(cleared_count):
-                new_grid.append([0 for _ in range(GRID_WIDTH)])
-
-            # Добавляем неочищенные строки
-            for i, row in enumerate(self.grid):
-                if i not in lines_to_clear:
-                    new_grid.append(row)
-
-            self.grid = new_grid
-
-        # Обновление счета, если были очищены линии
-        if lines_to_clear:
-            # Увеличиваем счетчик очищенных линий
-            self.lines_cleared += len(lines_to_clear)
-
-            # Начисляем очки в зависимости от количества одновременно очищенных линий
-            # 1 линия - 100 очков, 2 линии - 300 очков, 3 линии - 500 очков, 4 линии - 800 очков
-            # Умножаем на текущий уровень для увеличения сложности
-            self.score += [100, 300, 500, 800][min(len(lines_to_clear) - 1, 3)] * self.level
-
-            # Увеличиваем уровень каждые 10 очищенных линий
-            self.level = self.lines_cleared // 10 + 1
-
-            # Увеличиваем скорость падения с каждым уровнем (но не меньше 0.05 секунд)
-            self.fall_speed = max(0.05, 0.5 - (self.level - 1) * 0.05)
-
-    def move(self, dx, dy):
+        # Во время воспроизведения действия берутся только из записи
+        if self.replay is not None:
+            return
+        self.handle_core_events(self.session.apply(action))
+        # Отмена хода возвращает поле без событий игровой логики
+        if action == UNDO:
+            self.board_layer = None
+
+    def save_replay(self):
         """
-        Перемещение текущей фигуры
-        dx: смещение по горизонтали (-1 - влево, 1 - вправо, 0 - без смещения)
-        dy: смещение по вертикали (1 - вниз, 0 - без смещения)
+        Сохранение записи текущей игры в replay_dir (если в ней были действия)
+        Запись сохраняется, когда игру покидают, а не при проигрыше: после
+        проигрыша ход можно отменить и продолжить ту же игру
         """
-        # Изменяем координаты фигуры
-        self.current_piece.x += dx
-        self.current_piece.y += dy
+        log = self.session.log
+        if log is None or self.session.finished or not log.data:
+            return
+        self.session.finish()
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{log.seed}.ttr"
+        try:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            log.save(os.path.join(self.replay_dir, name))
+            if self.max_replays is not None:
+                prune_replays(self.replay_dir, self.max_replays)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка сохранения записи: {e}")
+
+    def quit(self):
+        """Выход из игры с сохранением записи"""
+        self.save_replay()
+        pygame.quit()
+        sys.exit()
+
+    def feed_replay(self):
+        """Применение действий записи, которые приходятся на текущий тик"""
+        while self.replay_next is not None and self.replay_next[0] <= self.session.ticks:
+            _, action = self.replay_next
+            if action == END:
+                # Запись закончилась - показываем итог
+                self.replay_next = None
+                self.game_state = "game_over"
+                return
+            self.handle_core_events(self.session.apply(action))
+            if action == UNDO:
+                self.board_layer = None
+            # Отмена хода после проигрыша возвращает в игру, как и во время записи
+            if self.game_state == "game_over" and not self.core.game_over:
+                self.game_state = "playing"
+            self.replay_next = next(self.replay_inputs, None)
+
+    def handle_core_events(self, events):
+        """Проигрывание звуков и эффектов для событий игровой логики"""
+        for event in events:
+            # Фиксация фигуры и очистка линий меняют упавшие фигуры - слой поля перерисовывается
+            if event.kind in (EVENT_LOCK, EVENT_LINE_CLEAR):
+                self.board_layer = None
+
+            # Воспроизводим звук, соответствующий событию
+            sound = EVENT_SOUNDS.get(event.kind)
+            if sound:
+                self.sound_manager.play_sound(sound)
+
+            if event.kind == EVENT_ROTATE:
+                # Анимация поворота запускается только при успешном повороте
+                if event.data:
+                    self.core.current_piece.start_rotation_animation()
+
+            elif event.kind == EVENT_LINE_CLEAR:
+                # Создаем эффекты частиц для каждой очищенной линии
+                for line, color in event.data:
+                    # Для пустой ячейки используем белый цвет
+                    color = color or ((255, 255, 255), (200, 200, 200))
+                    # Добавляем эффект частиц по центру очищенной линии
+                    y_pos = self.play_area_y + line * self.grid_size + self.grid_size // 2
+                    self.particle_system.add_line_clear_effect(
+                        self.viewport_x + self.play_area_width // 2,
+                        y_pos,
+                        color
+                    )
 
-        # Проверяем, допустима ли новая позиция
-        if not self.valid_position():
-            # Если позиция недопустима, возвращаем фигуру в предыдущее положение
-            self.current_piece.x -= dx
-            self.current_piece.y -= dy
+            elif event.kind == EVENT_GAME_OVER:
+                # Новая фигура не помещается - игра окончена
+                self.game_state = "game_over"
 
-            # Если перемещение было вниз (падение)
-            if dy > 0:
-                # Воспроизводим звук падения
-                self.sound_manager.play_sound('drop')
-                # Фиксируем фигуру на игровом поле
-                self.merge_piece()
-                # Проверяем и очищаем заполненные линии
-                self.clear_lines()
-                # Создаем новую текущую фигуру из следующей
-                self.current_piece = self.next_piece
-                # Генерируем новую следующую фигуру
-                self.next_piece = self.new_piece()
-                # Проверяем, может ли новая фигура появиться на поле
-                if not self.valid_position():
-                    # Если не может - игра окончена
-                    self.game_state = "game_over"
-            else:
-                # Воспроизводим звук перемещения
-                if dx != 0:
-                    self.sound_manager.play_sound('move')
-        else:
-            # Воспроизводим звук перемещения
-            if dx != 0:
-                self.sound_manager.play_sound('move')
-
-    def rotate_piece(self):
-        """Поворот текущей фигуры с анимацией"""
-        # Сохраняем оригинальную форму на случай, если поворот будет недопустим
-        original_shape = self.current_piece.shape
-        # Применяем поворот к фигуре
-        self.current_piece.shape = self.current_piece.rotate()
-        # Начинаем анимацию поворота
-        self.current_piece.start_rotation_animation()
-        # Воспроизводим звук поворота
-        self.sound_manager.play_sound('rotate')
-        # Проверяем, допустима ли новая форма
-        if not self.valid_position():
-            # Если недопустима, возвращаем оригинальную форму
-            self.current_piece.shape = original_shape
-            # Отменяем анимацию поворота
-            self.current_piece.rotation_animation = 0
-
-    def hard_drop(self):
-        """Мгновенное падение фигуры вниз до первого препятствия"""
-        # Падаем вниз, пока позиция допустима
-        while self.valid_position():
-            self.current_piece.y += 1  # Перемещаем фигуру вниз
-
-        # Возвращаем фигуру на одну позицию вверх (последняя допустимая позиция)
-        self.current_piece.y -= 1
-
-        # Воспроизводим звук падения
-        self.sound_manager.play_sound('drop')
-        # Фиксируем фигуру на игровом поле
-        self.merge_piece()
-        # Проверяем и очищаем заполненные линии
-        self.clear_lines()
-        # Создаем новую текущую фигуру из следующей
-        self.current_piece = self.next_piece
-        # Генерируем новую следующую фигуру
-        self.next_piece = self.new_piece()
-        # Проверяем, может ли новая фигура появиться на поле
-        if not self.valid_position():
-            # Если не может - игра окончена
-            self.game_state = "game_over"
+    def update_hint(self):
+        """
+        Поиск подсказки для текущей фигуры: сначала идеальная очистка поля
+        текущей и следующей фигурами, затем очистка хотя бы одной линии.
+        Поиск начинается один раз для каждой новой фигуры и продвигается на
+        HINT_SLICE узлов за кадр, подсказка появляется, когда он закончен.
+        """
+        core = self.core
+        key = (core.pieces, core.board.key())
+        if key != self.hint_key:
+            self.hint_key = key
+            piece = core.current_piece
+            queue = [piece.shape_idx, core.next_piece.shape_idx]
+            start = (piece.x, piece.y, piece.rotation)
+            # Старое положение относится к прошлой фигуре, а описание в сайдбаре
+            # остается до конца поиска, чтобы не перерисовывать фон лишний раз
+            self.hint = None
+            self.hint_steps = self.hint_search(core.board.copy(colors=False), queue, start)
+        if self.hint_steps is not None:
+            try:
+                next(self.hint_steps)
+            except StopIteration:
+                self.hint_steps = None
+
+    def hint_search(self, board, queue, start):
+        """
+        Генератор поиска подсказки: каждый шаг просматривает до HINT_SLICE
+        узлов, по окончании заполняются hint и hint_label
+        """
+        for lines, label in ((None, "идеальная очистка"), (1, "линия")):
+            solver = Solver(board, queue, lines, start, HINT_NODES)
+            yield from solver.steps(HINT_SLICE)
+            if solver.result:
+                self.hint = solver.result[0]
+                self.hint_label = label
+                return
+        self.hint = None
+        self.hint_label = "нет"
+
+    def draw_hint(self):
+        """
+        Отрисовка контура подсказанного положения текущей фигуры
+        Возвращает список измененных прямоугольников экрана
+        """
+        rects = []
+        if not self.show_hints or self.hint is None:
+            return rects
+        piece = self.core.current_piece
+        color = piece.color[0]
+        self.screen.set_clip(self.viewport_rect())
+        for dx, dy in ROTATIONS[piece.shape_idx][self.hint.rotation].cells:
+            x, y = self.hint.x + dx, self.hint.y + dy
+            if y >= 0:
+                rects.append(pygame.draw.rect(self.screen, color,
+                                 (self.play_area_x + x * self.grid_size,
+                                  self.play_area_y + y * self.grid_size,
+                                  self.grid_size,
+                                  self.grid_size),
+                                 max(2, self.grid_size // 10)))  # Только контур ячейки
+        self.screen.set_clip(None)
+        return rects
 
     def calculate_dimensions(self):
         """Пересчет размеров элементов для заполнения всего экрана по высоте"""
+        width, height = self.core.width, self.core.height
+        field_width = max(1, self.screen_width - SIDEBAR_WIDTH)  # Место для поля слева от сайдбара
         # Вычисляем размер ячейки так, чтобы игровое поле заполнило всю высоту экрана
-        self.grid_size = self.screen_height // GRID_HEIGHT
+        # (и поместилось по ширине); у большого поля ячейки не меньше MIN_CELL_SIZE,
+        # а на экране видна только его часть
+        self.grid_size = max(MIN_CELL_SIZE, min(self.screen_height // height, field_width // width))
+        # Спрайты ячеек перерисовываются только при смене размера
+        self.cell_sprites.resize(self.grid_size)
+
+        # Количество видимых столбцов и строк
+        self.view_cols = min(width, max(1, field_width // self.grid_size))
+        self.view_rows = min(height, max(1, self.screen_height // self.grid_size))
 
-        # Вычисляем размеры игрового поля в пикселях
-        self.play_area_width = GRID_WIDTH * self.grid_size  # Ширина игрового поля
-        self.play_area_height = GRID_HEIGHT * self.grid_size  # Высота игрового поля
+        # Вычисляем размеры видимой области поля в пикселях
+        self.play_area_width = self.view_cols * self.grid_size  # Ширина игрового поля
+        self.play_area_height = self.view_rows * self.grid_size  # Высота игрового поля
 
         # Вычисляем позиции элементов (центрируем по горизонтали)
         # Игровое поле размещается по центру, боковая панель справа
-        self.play_area_x = (self.screen_width - SIDEBAR_WIDTH - self.play_area_width) // 2
-        self.play_area_y = 0  # Начинаем с верха экрана
-        self.sidebar_x = self.play_area_x + self.play_area_width  # Боковая панель справа от игрового поля
+        self.viewport_x = (self.screen_width - SIDEBAR_WIDTH - self.play_area_width) // 2
+        self.viewport_y = 0  # Начинаем с верха экрана
+        self.sidebar_x = self.viewport_x + self.play_area_width  # Боковая панель справа от игрового поля
+        self.update_viewport()
 
-    def draw_grid(self):
-        """Отрисовка игрового поля"""
-        # Отрисовка фона игрового поля (с небольшим отступом для создания рамки)
-        pygame.draw.rect(self.screen, DARK_GRAY,
-                         (self.play_area_x - 5,  # X-координата с отступом
-                          self.play_area_y - 5,  # Y-координата с отступом
-                          self.play_area_width + 10,  # Ширина с учетом отступов
-                          self.play_area_height + 10))  # Высота с учетом отступов
-
-        # Отрисовка сетки игрового поля
-        for x in range(GRID_WIDTH):  # Проходим по всем столбцам
-            for y in range(GRID_HEIGHT):  # Проходим по всем строкам
-                # Рисуем границы ячейки
-                pygame.draw.rect(self.screen, GRID_COLOR,
-                                 (self.play_area_x + x * self.grid_size,  # X-координата ячейки
-                                  self.play_area_y + y * self.grid_size,  # Y-координата ячейки
-                                  self.grid_size,  # Ширина ячейки
-                                  self.grid_size),  # Высота ячейки
-                                 1)  # Толщина линии границы = 1 пиксель
-
-                # Отрисовка заполненных ячеек (уже упавших фигур)
-                if self.grid[y][x]:  # Если ячейка заполнена
-                    color, shadow = self.grid[y][x]  # Получаем цвет и тень
-
-                    # Создаем прямоугольник для отрисовки ячейки
-                    rect = pygame.Rect(self.play_area_x + x * self.grid_size,  # X-координата
-                                       self.play_area_y + y * self.grid_size,  # Y-координата
-                                       self.grid_size,  # Ширина
-                                       self.grid_size)  # Высота
+    def update_viewport(self):
+        """
+        Сдвиг видимой области к текущей фигуре (в пределах поля)
+        play_area_x и play_area_y - экранные координаты ячейки (0, 0), поэтому
+        ячейка (x, y) рисуется в play_area_x + x * grid_size при любом сдвиге
+        """
+        piece = self.core.current_piece
+        if self.view_cols < self.core.width:
+            center = piece.x + piece.state.width // 2
+            self.view_col = max(0, min(center - self.view_cols // 2, self.core.width - self.view_cols))
+        else:
+            self.view_col = 0
+        if self.view_rows < self.core.height:
+            center = piece.y + piece.state.height // 2
+            self.view_row = max(0, min(center - self.view_rows // 2, self.core.height - self.view_rows))
+        else:
+            self.view_row = 0
+        self.play_area_x = self.viewport_x - self.view_col * self.grid_size
+        self.play_area_y = self.viewport_y - self.view_row * self.grid_size
 
+    def viewport_rect(self):
+        """Прямоугольник видимой области поля на экране (для ограничения отрисовки)"""
+        return pygame.Rect(self.viewport_x, self.viewport_y, self.play_area_width, self.play_area_height)
+
+    def draw_grid(self, surface=None):
+        """
+        Отрисовка видимой части игрового поля с рамкой
+        surface: поверхность для отрисовки (по умолчанию - экран)
+        """
+        surface = surface or self.screen
+        self.update_board_layer()
+        viewport = self.viewport_rect()
+        # Рамка вокруг поля (отступ 5 пикселей с каждой стороны)
+        surface.fill(DARK_GRAY, viewport.inflate(10, 10).clip(surface.get_rect()))
+        # Видимая область вырезается из слоя, нарисованного с запасом вокруг нее
+        area = pygame.Rect((self.view_col - self.layer_col) * self.grid_size,
+                           (self.view_row - self.layer_row) * self.grid_size,
+                           viewport.width, viewport.height)
+        surface.blit(self.board_layer, viewport, area)
+
+    def update_board_layer(self):
+        """
+        Перерисовка слоя поля, если он устарел; возвращает True, если слой перерисован
+        Фон, сетка и упавшие фигуры меняются только при фиксации фигуры, очистке
+        линий, отмене хода, новой игре и смене размеров, поэтому в остальных
+        кадрах выводится готовый слой. Слой покрывает видимую область с запасом
+        LAYER_MARGIN с каждой стороны: пока видимая область, следующая за фигурой,
+        остается внутри него, слой не меняется, а при выходе за него прежний слой
+        сдвигается и рисуются только открывшиеся строки и столбцы.
+        """
+        grid_size = self.grid_size
+        width, height = self.core.width, self.core.height
+        cols = min(width, self.view_cols + 2 * max(1, int(self.view_cols * LAYER_MARGIN)))
+        rows = min(height, self.view_rows + 2 * max(1, int(self.view_rows * LAYER_MARGIN)))
+        key = (grid_size, cols, rows)
+        old = self.board_layer
+        if (old is not None and key == self.board_layer_key
+                and self.layer_col <= self.view_col and self.view_col + self.view_cols <= self.layer_col + cols
+                and self.layer_row <= self.view_row and self.view_row + self.view_rows <= self.layer_row + rows):
+            return False
+
+        # Новое положение слоя - видимая область посередине (в пределах поля)
+        col = max(0, min(self.view_col - (cols - self.view_cols) // 2, width - cols))
+        row = max(0, min(self.view_row - (rows - self.view_rows) // 2, height - rows))
+        layer = pygame.Surface((cols * grid_size, rows * grid_size)).convert()
+        dx, dy = self.layer_col - col, self.layer_row - row
+        if old is not None and key == self.board_layer_key and abs(dx) < cols and abs(dy) < rows:
+            # Совпадающая часть переносится из прежнего слоя
+            layer.blit(old, (dx * grid_size, dy * grid_size))
+            strips = []  # Открывшиеся полосы: (столбец, строка, ширина, высота) в ячейках слоя
+            if dy > 0:
+                strips.append((0, 0, cols, dy))
+            elif dy < 0:
+                strips.append((0, rows + dy, cols, -dy))
+            if dx > 0:
+                strips.append((0, 0, dx, rows))
+            elif dx < 0:
+                strips.append((cols + dx, 0, -dx, rows))
+        else:
+            strips = [(0, 0, cols, rows)]
+
+        pattern = self.grid_pattern(cols, rows)
+        for x, y, strip_cols, strip_rows in strips:
+            area = pygame.Rect(x * grid_size, y * grid_size, strip_cols * grid_size, strip_rows * grid_size)
+            layer.blit(pattern, area, area)  # Фон и сетка - из готового узора
+            self.draw_board_cells(layer, col, row, col + x, row + y, strip_cols, strip_rows)
+
+        self.board_layer = layer
+        self.board_layer_key = key
+        self.layer_col = col
+        self.layer_row = row
+        return True
+
+    def grid_pattern(self, cols, rows):
+        """
+        Фон с сеткой на cols x rows ячеек: ячейка с рамкой рисуется один раз и
+        размножается копированием уже готовой части (удвоением), а не отдельным
+        прямоугольником на каждую ячейку
+        """
+        grid_size = self.grid_size
+        key = (grid_size, cols, rows)
+        if key == self.grid_pattern_key:
+            return self.grid_pattern_surface
+        pattern = pygame.Surface((cols * grid_size, rows * grid_size)).convert()
+        pattern.fill(DARK_GRAY, (0, 0, grid_size, grid_size))
+        pygame.draw.rect(pattern, GRID_COLOR, (0, 0, grid_size, grid_size), 1)  # Границы ячейки
+        done = 1
+        while done < cols:
+            count = min(done, cols - done)
+            pattern.blit(pattern, (done * grid_size, 0), (0, 0, count * grid_size, grid_size))
+            done += count
+        done = 1
+        while done < rows:
+            count = min(done, rows - done)
+            pattern.blit(pattern, (0, done * grid_size), (0, 0, cols * grid_size, count * grid_size))
+            done += count
+        self.grid_pattern_surface = pattern
+        self.grid_pattern_key = key
+        return pattern
+
+    def draw_board_cells(self, layer, layer_col, layer_row, col, row, cols, rows):
+        """
+        Отрисовка заполненных ячеек (уже упавших фигур) участка поля на слой
+        layer_col, layer_row: ячейка поля в левом верхнем углу слоя
+        col, row, cols, rows: участок поля в ячейках
+        """
+        grid_size = self.grid_size
+        board = self.core.board
+        # Координаты ячейки (0, 0) внутри слоя
+        origin_x = -layer_col * grid_size
+        origin_y = -layer_row * grid_size
+        mask = ((1 << cols) - 1) << col  # Маска столбцов участка
+        border = max(1, grid_size // 15)
+        for y in range(row, row + rows):
+            # Обходим только установленные биты строки, пустые строки пропускаются сразу
+            cells = board.rows[y] & mask
+            while cells:
+                low = cells & -cells
+                cells ^= low
+                x = low.bit_length() - 1
+                cell = board.color_at(x, y)  # Получаем цвет ячейки
+                if cell:
+                    color, shadow = cell  # Получаем цвет и тень
+                    rect = pygame.Rect(origin_x + x * grid_size, origin_y + y * grid_size, grid_size, grid_size)
                     # Рисуем основной цвет ячейки
-                    pygame.draw.rect(self.screen, color, rect)
+                    pygame.draw.rect(layer, color, rect)
                     # Рисуем тень для создания 3D-эффекта
-                    pygame.draw.rect(self.screen, shadow, rect, max(1, self.grid_size // 15))
+                    pygame.draw.rect(layer, shadow, rect, border)
+
+    def draw_ghost_piece(self):
+        """
+        Отрисовка тени текущей фигуры в месте, где она остановится
+        Возвращает список измененных прямоугольников экрана
+        """
+        rects = []
+        piece = self.core.current_piece
+        # Строка остановки берется из высот столбцов поля, без пошагового спуска
+        ghost_y = self.core.board.drop_y(piece.state, piece.x, piece.y)
+        shadow = piece.color[1]
+        self.screen.set_clip(self.viewport_rect())
+        for dx, dy in piece.state.cells:
+            y = ghost_y + dy
+            if y >= 0:
+                rects.append(pygame.draw.rect(self.screen, shadow,
+                                 (self.play_area_x + (piece.x + dx) * self.grid_size,
+                                  self.play_area_y + y * self.grid_size,
+                                  self.grid_size,
+                                  self.grid_size),
+                                 max(1, self.grid_size // 15)))  # Только контур ячейки
+        self.screen.set_clip(None)
+        return rects
 
     def draw_current_piece(self):
-        """Отрисовка текущей фигуры с анимациями"""
+        """
+        Отрисовка текущей фигуры с анимациями
+        Возвращает список измененных прямоугольников экрана
+        """
+        rects = []
         # Обновляем анимации фигуры
         dt = self.clock.get_time() / 1000.0  # Время в секундах
-        self.current_piece.update_animation(dt)
+        self.core.current_piece.update_animation(dt)
 
         # Рисуем текущую фигуру только во время игры или паузы
         if self.game_state == "playing" or self.game_state == "paused":
+            # Ячейки у края видимой области обрезаются по ее границе
+            self.screen.set_clip(self.viewport_rect())
             # Получаем все позиции ячеек текущей фигуры
-            for x, y in self.current_piece.get_positions():
+            for x, y in self.core.current_piece.get_positions():
                 # Рисуем только ячейки, которые находятся внутри игрового поля
                 if y >= 0:
                     # Вычисляем координаты для отрисовки
@@ -320,19 +533,21 @@ class TetrisGame:
                     screen_y = self.play_area_y + y * self.grid_size
 
                     # Применяем анимацию поворота если она активна
-                    if self.current_piece.rotation_animation > 0:
+                    if self.core.current_piece.rotation_animation > 0:
                         # Добавляем небольшое смещение для анимации поворота
-                        rotation_progress = self.current_piece.rotation_animation / 15.0
+                        rotation_progress = self.core.current_piece.rotation_animation / 15.0
                         screen_x += self.grid_size * 0.1 * rotation_progress
                         screen_y += self.grid_size * 0.1 * rotation_progress
 
                     # Рисуем ячейку фигуры с эффектами
-                    self.current_piece.draw_cell(
+                    rects.append(self.core.current_piece.draw_cell(
                         self.screen,
                         screen_x,
                         screen_y,
-                        self.grid_size
-                    )
+                        self.cell_sprites
+                    ))
+            self.screen.set_clip(None)
+        return rects
 
     def draw_next_piece(self):
         """Отрисовка следующей фигуры в сайдбаре"""
@@ -355,12 +570,13 @@ class TetrisGame:
                          2)  # Толщина рамки = 2 пикселя
 
         # Отрисовка заголовка "Следующая:"
-        next_text = self.ui.font.render("Следующая:", True, WHITE)  # Создаем белый текст
+        next_text = self.ui.text(self.ui.font, "Следующая:", WHITE)  # Создаем белый текст
         self.screen.blit(next_text, (self.sidebar_x + 20, 40))  # Отображаем текст с отступами
 
         # Отрисовка следующей фигуры
-        shape = self.next_piece.shape  # Получаем форму следующей фигуры
-        color, shadow = self.next_piece.color  # Получаем цвет следующей фигуры
+        shape = self.core.next_piece.shape  # Получаем форму следующей фигуры
+        # Ячейка с тенью и блеском - готовый спрайт из атласа
+        block = self.cell_sprites.block(self.core.next_piece.shape_idx)
 
         # Вычисляем размеры фигуры в пикселях
         piece_width = len(shape[0]) * self.grid_size  # Ширина фигуры
@@ -374,34 +590,7 @@ class TetrisGame:
         for y, row in enumerate(shape):  # Проходим по строкам фигуры
             for x, cell in enumerate(row):  # Проходим по ячейкам строки
                 if cell:  # Если ячейка занята
-                    # Создаем прямоугольник для отрисовки ячейки
-                    rect = pygame.Rect(start_x + x * self.grid_size,  # X-координата
-                                       start_y + y * self.grid_size,  # Y-координата
-                                       self.grid_size,  # Ширина
-                                       self.grid_size)  # Высота
-
-                    # Рисуем основной цвет ячейки
-                    pygame.draw.rect(self.screen, color, rect)
-                    # Рисуем тень для создания 3D-эффекта
-                    pygame.draw.rect(self.screen, shadow, rect, max(1, self.grid_size // 15))
-
-                    # Добавляем эффект блеска для следующей фигуры
-                    if self.grid_size > 10:
-                        shine_size = max(1, self.grid_size // 8)
-                        # Используем светлый оттенок основного цвета вместо белого
-                        shine_color = (
-                            min(255, color[0] + 50),
-                            min(255, color[1] + 50),
-                            min(255, color[2] + 50),
-                            180  # Прозрачность
-                        )
-                        # Создаем поверхность для блеска с прозрачностью
-                        shine_surface = pygame.Surface((shine_size * 2, shine_size * 2), pygame.SRCALPHA)
-                        pygame.draw.ellipse(shine_surface, shine_color,
-                                            (0, 0, shine_size * 2, shine_size * 2))
-                        self.screen.blit(shine_surface,
-                                         (start_x + x * self.grid_size + self.grid_size // 4 - shine_size // 2,
-                                          start_y + y * self.grid_size + self.grid_size // 4 - shine_size // 2))
+                    self.screen.blit(block, (start_x + x * self.grid_size, start_y + y * self.grid_size))
 
     def draw_sidebar(self):
         """Отрисовка сайдбара с информацией"""
@@ -425,15 +614,15 @@ class TetrisGame:
                          2)  # Толщина рамки
 
         # Отрисовка счета игрока
-        score_text = self.ui.font.render(f"Счет: {self.score}", True, WHITE)  # Создаем текст со счетом
+        score_text = self.ui.text(self.ui.font, f"Счет: {self.core.score}", WHITE)  # Создаем текст со счетом
         self.screen.blit(score_text, (self.sidebar_x + 20, sidebar_top + 20))  # Отображаем с отступом
 
         # Отрисовка текущего уровня
-        level_text = self.ui.font.render(f"Уровень: {self.level}", True, WHITE)  # Создаем текст с уровнем
+        level_text = self.ui.text(self.ui.font, f"Уровень: {self.core.level}", WHITE)  # Создаем текст с уровнем
         self.screen.blit(level_text, (self.sidebar_x + 20, sidebar_top + 70))  # Отображаем ниже счета
 
         # Отрисовка количества очищенных линий
-        lines_text = self.ui.font.render(f"Линии: {self.lines_cleared}", True, WHITE)  # Создаем текст с линиями
+        lines_text = self.ui.text(self.ui.font, f"Линии: {self.core.lines_cleared}", WHITE)  # Создаем текст с линиями
         self.screen.blit(lines_text, (self.sidebar_x + 20, sidebar_top + 120))  # Отображаем ниже уровня
 
         # Отрисовка инструкции управления
@@ -446,29 +635,49 @@ class TetrisGame:
             "S - Вниз",  # Ускоренное падение
             "W - Поворот",  # Поворот фигуры
             "Пробел - Сброс",  # Мгновенное падение
+            "H - Подсказка",  # Показ подсказки
+            "U - Отмена",  # Отмена хода
             "ESC - Меню"  # Открытие меню паузы
         ]
+        # Описание найденной подсказки
+        if self.show_hints:
+            controls.append(f"Подсказка: {self.hint_label}")
 
         # Отрисовываем каждый элемент управления
         for i, text in enumerate(controls):
-            ctrl_text = self.ui.small_font.render(text, True, WHITE)  # Создаем текст белым цветом
+            ctrl_text = self.ui.text(self.ui.small_font, text, WHITE)  # Создаем текст белым цветом
             # Отображаем с вертикальным отступом между элементами
             self.screen.blit(ctrl_text, (self.sidebar_x + 20, controls_y + i * 35))
 
+    def resize(self, size):
+        """Изменение размера окна"""
+        # Обновляем размеры экрана
+        self.screen_width, self.screen_height = size
+        # Изменяем размер окна
+        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
+        # Пересчитываем размеры элементов
+        self.calculate_dimensions()
+        # Обновляем размеры экрана в UI
+        self.ui.screen_width = self.screen_width
+        self.ui.screen_height = self.screen_height
+        # Шрифты обновятся, когда размер окна перестанет меняться
+        self.ui.request_font_update()
+        # Новое окно рисуется целиком
+        self.background = None
+        self.overlay_key = None
+
     def handle_menu_events(self, play_button, quit_button):
         """Обработка событий в главном меню"""
         # Обрабатываем все события в очереди
         for event in pygame.event.get():
             # Закрытие окна игры
             if event.type == pygame.QUIT:
-                pygame.quit()  # Завершаем pygame
-                sys.exit()  # Завершаем программу
+                self.quit()  # Завершаем pygame и программу
 
             # Нажатие клавиш
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    pygame.quit()  # Закрываем игру по ESC
-                    sys.exit()
+                    self.quit()  # Закрываем игру по ESC
 
             # Нажатие кнопок мыши
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -480,22 +689,11 @@ class TetrisGame:
                         return True  # Возвращаем True, чтобы указать, что событие обработано
                     # Проверяем, попал ли клик по кнопке "ЗАКРЫТЬ"
                     elif quit_button.collidepoint(event.pos):
-                        pygame.quit()  # Закрываем игру
-                        sys.exit()
+                        self.quit()  # Закрываем игру
 
             # Изменение размера окна
             if event.type == pygame.VIDEORESIZE:
-                # Обновляем размеры экрана
-                self.screen_width, self.screen_height = event.size
-                # Изменяем размер окна
-                self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
-                # Пересчитываем размеры элементов
-                self.calculate_dimensions()
-                # Обновляем размеры экрана в UI
-                self.ui.screen_width = self.screen_width
-                self.ui.screen_height = self.screen_height
-                # Обновляем шрифты
-                self.ui.update_fonts()
+                self.resize(event.size)
 
         return False  # Возвращаем False, если событие не обработано
 
@@ -505,8 +703,7 @@ class TetrisGame:
         for event in pygame.event.get():
             # Закрытие окна игры
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit()
 
             # Нажатие клавиш
             if event.type == pygame.KEYDOWN:
@@ -518,19 +715,25 @@ class TetrisGame:
                 # Обработка управления во время игры
                 if self.game_state == "playing":
                     if event.key == pygame.K_a:
-                        self.move(-1, 0)  # Движение влево
+                        self.apply_action(LEFT)  # Движение влево
                         return True
                     elif event.key == pygame.K_d:
-                        self.move(1, 0)  # Движение вправо
+                        self.apply_action(RIGHT)  # Движение вправо
                         return True
                     elif event.key == pygame.K_s:
-                        self.move(0, 1)  # Ускоренное падение вниз
+                        self.apply_action(DOWN)  # Ускоренное падение вниз
                         return True
                     elif event.key == pygame.K_w:
-                        self.rotate_piece()  # Поворот фигуры
+                        self.apply_action(ROTATE)  # Поворот фигуры
                         return True
                     elif event.key == pygame.K_SPACE:
-                        self.hard_drop()  # Мгновенное падение
+                        self.apply_action(HARD_DROP)  # Мгновенное падение
+                        return True
+                    elif event.key == pygame.K_h:
+                        self.show_hints = not self.show_hints  # Включение и выключение подсказок
+                        return True
+                    elif event.key in (pygame.K_u, pygame.K_BACKSPACE):
+                        self.apply_action(UNDO)  # Отмена хода
                         return True
 
             # Нажатие кнопок мыши
@@ -540,17 +743,7 @@ class TetrisGame:
 
             # Изменение размера окна
             if event.type == pygame.VIDEORESIZE:
-                # Обновляем размеры экрана
-                self.screen_width, self.screen_height = event.size
-                # Изменяем размер окна
-                self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
-                # Пересчитываем размеры элементов
-                self.calculate_dimensions()
-                # Обновляем размеры экрана в UI
-                self.ui.screen_width = self.screen_width
-                self.ui.screen_height = self.screen_height
-                # Обновляем шрифты
-                self.ui.update_fonts()
+                self.resize(event.size)
 
         return False  # Возвращаем False, если событие не обработано
 
@@ -560,8 +753,7 @@ class TetrisGame:
         for event in pygame.event.get():
             # Закрытие окна игры
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit()
 
             # Нажатие клавиш
             if event.type == pygame.KEYDOWN:
@@ -584,17 +776,7 @@ class TetrisGame:
 
             # Изменение размера окна
             if event.type == pygame.VIDEORESIZE:
-                # Обновляем размеры экрана
-                self.screen_width, self.screen_height = event.size
-                # Изменяем размер окна
-                self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
-                # Пересчитываем размеры элементов
-                self.calculate_dimensions()
-                # Обновляем размеры экрана в UI
-                self.ui.screen_width = self.screen_width
-                self.ui.screen_height = self.screen_height
-                # Обновляем шрифты
-                self.ui.update_fonts()
+                self.resize(event.size)
 
         return False  # Возвращаем False, если событие не обработано
 
@@ -604,14 +786,19 @@ class TetrisGame:
         for event in pygame.event.get():
             # Закрытие окна игры
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit()
 
             # Нажатие клавиш
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.game_state = "menu"  # Переход в главное меню по ESC
                     return True  # Возвращаем True, чтобы указать, что событие обработано
+                # Отмена последней фигуры возвращает в игру (запись игры продолжается)
+                if event.key in (pygame.K_u, pygame.K_BACKSPACE) and self.replay is None:
+                    self.apply_action(UNDO)
+                    if not self.core.game_over:
+                        self.game_state = "playing"
+                    return True
 
             # Нажатие кнопок мыши
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -628,17 +815,7 @@ class TetrisGame:
 
             # Изменение размера окна
             if event.type == pygame.VIDEORESIZE:
-                # Обновляем размеры экрана
-                self.screen_width, self.screen_height = event.size
-                # Изменяем размер окна
-                self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
-                # Пересчитываем размеры элементов
-                self.calculate_dimensions()
-                # Обновляем размеры экрана в UI
-                self.ui.screen_width = self.screen_width
-                self.ui.screen_height = self.screen_height
-                # Обновляем шрифты
-                self.ui.update_fonts()
+                self.resize(event.size)
 
         return False  # Возвращаем False, если событие не обработано
 
@@ -647,62 +824,132 @@ class TetrisGame:
         # Обновляем систему частиц
         self.particle_system.update()
 
+        # Проигрыш в записи мог быть отменен - применяем действия, сделанные после него
+        if self.replay is not None and self.game_state == "game_over":
+            self.feed_replay()
+
         # Обновляем только во время активной игры
         if self.game_state == "playing":
-            # Добавляем время, прошедшее с последнего обновления
-            self.fall_time += self.clock.get_time() / 1000  # Преобразуем миллисекунды в секунды
-
-            # Если прошло достаточно времени для падения фигуры
-            if self.fall_time >= self.fall_speed:
-                self.move(0, 1)  # Перемещаем фигуру вниз
-                self.fall_time = 0  # Сбрасываем таймер
+            # Реальное время превращается в целое число игровых тиков фиксированной длины,
+            # поэтому ход игры зависит только от действий и тиков, на которых они сделаны
+            self.tick_time += self.clock.get_time() / 1000  # Преобразуем миллисекунды в секунды
+            while self.tick_time >= TICK_SECONDS and self.game_state == "playing":
+                self.tick_time -= TICK_SECONDS
+                if self.replay is not None:
+                    self.feed_replay()
+                    if self.game_state != "playing":
+                        break
+                self.handle_core_events(self.session.tick())
+
+            # Подсказка пересчитывается для каждой новой фигуры
+            if self.show_hints and self.game_state == "playing":
+                self.update_hint()
 
     def draw(self):
         """Отрисовка всего экрана"""
-        # Заполняем экран черным цветом
-        self.screen.fill(BLACK)
-
-        # Отрисовка в зависимости от текущего состояния игры
-        if self.game_state == "menu":
-            # Отображаем главное меню
-            play_button, quit_button = self.ui.draw_menu(self.score)
-            pygame.display.flip()  # Обновляем экран
-            self.handle_menu_events(play_button, quit_button)  # Обрабатываем события меню
+        # Новые шрифты после изменения размера окна - кадр рисуется целиком
+        if self.ui.poll_fonts():
+            self.background = None
+            self.overlay_key = None
 
-        elif self.game_state == "playing":
-            # Отображаем игровой процесс
-            self.draw_grid()  # Рисуем игровое поле
-            self.draw_current_piece()  # Рисуем текущую фигуру
-            self.draw_next_piece()  # Рисуем следующую фигуру
-            self.draw_sidebar()  # Рисуем боковую панель
-            # Рисуем частицы
-            self.particle_system.draw(self.screen)
+        if self.game_state == "playing":
+            self.draw_playing()
+            return
+
+        # Экраны меню, паузы и окончания игры неподвижны: кадр рисуется и
+        # выводится заново, только пока меняется их содержимое (или летят частицы)
+        key = (self.game_state, self.screen_width, self.screen_height, self.core.score)
+        if key != self.overlay_key or len(self.particle_system):
+            self.overlay_key = key
+            self.background = None  # После экрана меню игровой кадр рисуется целиком
+            # Заполняем экран черным цветом
+            self.screen.fill(BLACK)
+
+            # Отрисовка в зависимости от текущего состояния игры
+            if self.game_state == "menu":
+                # Отображаем главное меню
+                self.buttons = self.ui.draw_menu(self.core.score)
+
+            elif self.game_state == "paused":
+                # Отображаем меню паузы
+                self.draw_grid()  # Рисуем игровое поле
+                self.draw_hint()  # Рисуем подсказку
+                self.draw_ghost_piece()  # Рисуем тень фигуры
+                self.draw_current_piece()  # Рисуем текущую фигуру
+                self.draw_next_piece()  # Рисуем следующую фигуру
+                self.draw_sidebar()  # Рисуем боковую панель
+                # Рисуем частицы
+                self.particle_system.draw(self.screen)
+                self.buttons = self.ui.draw_pause_menu()  # Рисуем меню паузы
+
+            elif self.game_state == "game_over":
+                # Отображаем экран окончания игры
+                self.draw_grid()  # Рисуем игровое поле
+                self.draw_current_piece()  # Рисуем текущую фигуру
+                self.draw_next_piece()  # Рисуем следующую фигуру
+                self.draw_sidebar()  # Рисуем боковую панель
+                # Рисуем частицы
+                self.particle_system.draw(self.screen)
+                self.buttons = self.ui.draw_game_over(
+                    self.core.score)  # Рисуем экран окончания игры с текущим счетом
             pygame.display.flip()  # Обновляем экран
 
+        # Обрабатываем события экрана с кнопками последнего нарисованного кадра
+        if self.game_state == "menu":
+            self.handle_menu_events(*self.buttons)
         elif self.game_state == "paused":
-            # Отображаем меню паузы
-            self.draw_grid()  # Рисуем игровое поле
-            self.draw_current_piece()  # Рисуем текущую фигуру
-            self.draw_next_piece()  # Рисуем следующую фигуру
-            self.draw_sidebar()  # Рисуем боковую панель
-            # Рисуем частицы
-            self.particle_system.draw(self.screen)
-            resume_button, menu_button = self.ui.draw_pause_menu()  # Рисуем меню паузы
-            pygame.display.flip()  # Обновляем экран
-            self.handle_pause_events(resume_button, menu_button)  # Обрабатываем события паузы
-
+            self.handle_pause_events(*self.buttons)
         elif self.game_state == "game_over":
-            # Отображаем экран окончания игры
+            self.handle_game_over_events(*self.buttons)
+
+    def draw_playing(self):
+        """
+        Отрисовка игрового процесса с обновлением только измененных частей экрана
+        Поле, следующая фигура и сайдбар хранятся готовым фоном. В обычном кадре
+        фон восстанавливается под прошлым положением фигуры, тени, подсказки и
+        частиц, они рисуются заново, и на дисплей выводятся только эти
+        прямоугольники. Фон перерисовывается целиком (с выводом всего экрана),
+        когда меняются поле, статистика, следующая фигура или размеры окна, а при
+        сдвиге видимой области в нем обновляется только поле.
+        """
+        core = self.core
+        key = (self.screen_width, self.screen_height, core.score, core.level, core.lines_cleared,
+               core.next_piece.shape_idx, self.show_hints, self.hint_label)
+        view = (self.view_col, self.view_row)
+        if self.board_layer is None or self.background is None or key != self.background_key:
+            # Заполняем экран черным цветом
+            self.screen.fill(BLACK)
             self.draw_grid()  # Рисуем игровое поле
-            self.draw_current_piece()  # Рисуем текущую фигуру
             self.draw_next_piece()  # Рисуем следующую фигуру
             self.draw_sidebar()  # Рисуем боковую панель
-            # Рисуем частицы
-            self.particle_system.draw(self.screen)
-            restart_button, menu_button = self.ui.draw_game_over(
-                self.score)  # Рисуем экран окончания игры с текущим счетом
+            self.background = self.screen.copy()
+            self.background_key = key
+            self.background_view = view
+            full = True
+        else:
+            if view != self.background_view:
+                # Видимая область сдвинулась за фигурой: в фоне меняется только поле,
+                # и на дисплей выводится только оно
+                self.draw_grid(self.background)
+                self.background_view = view
+                self.dirty_rects.append(self.viewport_rect())
+            # Стираем подвижные элементы прошлого кадра
+            for rect in self.dirty_rects:
+                self.screen.blit(self.background, rect, rect)
+            full = False
+
+        rects = self.draw_hint()  # Рисуем подсказку
+        rects += self.draw_ghost_piece()  # Рисуем тень фигуры
+        rects += self.draw_current_piece()  # Рисуем текущую фигуру
+        # Рисуем частицы
+        rects += self.particle_system.draw(self.screen)
+
+        if full:
             pygame.display.flip()  # Обновляем экран
-            self.handle_game_over_events(restart_button, menu_button)  # Обрабатываем события окончания игры
+        else:
+            # Выводим места прошлого и нового положения подвижных элементов
+            pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects
 
     def run(self):
         """Основной игровой цикл"""
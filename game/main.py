@@ -1,17 +1,45 @@
 # main.py - Точка входа в игру Тетрис
 
 # Импортируем необходимые модули
+import argparse
 import pygame  # Основной модуль pygame для графики и событий
-from game import TetrisGame  # Импортируем основной класс игры
+from constants import GRID_WIDTH, GRID_HEIGHT  # Импортируем размеры поля по умолчанию
+from game import TetrisGame, REPLAY_DIR, MAX_REPLAYS  # Импортируем основной класс игры и параметры записей
+from replay import SEED_LIMIT  # Импортируем границу seed в файле записи
+
+
+def seed_type(text):
+    """Тип аргумента --seed: целое число, которое помещается в заголовок записи"""
+    seed = int(text)
+    if not 0 <= seed < SEED_LIMIT:
+        raise argparse.ArgumentTypeError(f"seed должен быть от 0 до {SEED_LIMIT - 1}")
+    return seed
 
 
 def main():
     """Точка входа в игру - функция, которая запускает игру"""
+    # Размеры поля и seed можно задать из командной строки
+    parser = argparse.ArgumentParser(description="Игра Тетрис")
+    parser.add_argument('--width', type=int, default=GRID_WIDTH, help="ширина поля в ячейках")
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT, help="высота поля в ячейках")
+    parser.add_argument('--seed', type=seed_type, default=None, help="начальное значение генератора фигур")
+    parser.add_argument('--no-record', action='store_true', help="не записывать игры")
+    parser.add_argument('--replay-dir', default=REPLAY_DIR, help="каталог для записей игр")
+    parser.add_argument('--keep-replays', type=int, default=MAX_REPLAYS,
+                        help="сколько последних записей хранить (0 - все)")
+    args = parser.parse_args()
+    # Фигура появляется в столбцах width // 2 - 1 ... width // 2 + 2 и занимает до 4 строк
+    if not 5 <= args.width <= 0xFFFF or not 4 <= args.height <= 0xFFFF:
+        parser.error("ширина поля должна быть от 5, высота - от 4 (обе не больше 65535)")
+    if args.keep_replays < 0:
+        parser.error("количество хранимых записей не может быть отрицательным")
+
     # Инициализируем pygame (подготавливаем к работе)
     pygame.init()
 
     # Создаем экземпляр игры Тетрис
-    game = TetrisGame()
+    game = TetrisGame(args.seed, width=args.width, height=args.height, record=not args.no_record,
+                      replay_dir=args.replay_dir, max_replays=args.keep_replays or None)
 
     # Запускаем основной игровой цикл
     game.run()
@@ -20,4 +48,4 @@ def main():
 # Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
 if __name__ == "__main__":
     # Если файл запущен напрямую, вызываем функцию main()
-    main()
\ No newline at end of file
+    main()
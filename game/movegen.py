@@ -0,0 +1,335 @@
+# movegen.py - Генератор всех достижимых положений фиксации фигуры
+
+# Импортируем стандартные модули и игровые модули
+from collections import deque, namedtuple
+from rotations import ROTATIONS  # Импортируем таблицы поворотов
+from core import LEFT, RIGHT, DOWN, ROTATE, HARD_DROP  # Импортируем действия
+
+# Конечное положение фигуры: индекс поворота, координаты и кратчайшая
+# последовательность действий, которая приводит к фиксации в этом положении
+Placement = namedtuple('Placement', ['rotation', 'x', 'y', 'actions'])
+
+
+# Кэш сдвинутых масок: (индекс формы, ширина поля) -> таблица по поворотам и столбцам
+SHIFTED_CACHE = {}
+
+
+def shifted_masks(shape_idx, width):
+    """
+    Маски строк каждого поворота, заранее сдвинутые на каждый столбец:
+    результат[r][px + 3] - кортеж пар (dy, mask) или None, если фигура выходит за границы
+    """
+    key = (shape_idx, width)
+    table = SHIFTED_CACHE.get(key)
+    if table is None:
+        table = []
+        for state in ROTATIONS[shape_idx]:
+            columns = [dx for dx, _ in state.cells]
+            row = []
+            for px in range(-3, width):
+                if px + min(columns) < 0 or px + max(columns) >= width:
+                    row.append(None)
+                else:
+                    row.append(tuple((dy, mask << px if px >= 0 else mask >> -px)
+                                     for dy, mask in state.row_masks))
+            table.append(tuple(row))
+        table = SHIFTED_CACHE[key] = tuple(table)
+    return table
+
+
+def placement_cells(shape_idx, width, placement):
+    """
+    Итоговое заполнение поля положением placement: (строка, маски строк фигуры).
+    У симметричных фигур (I, S, Z, O) разные повороты дают одно заполнение, и
+    generate_placements с flood_placements могут выбрать для него разные индексы
+    поворота, поэтому положения сравниваются по заполнению, а не по повороту
+    """
+    return placement.y, shifted_masks(shape_idx, width)[placement.rotation][placement.x + 3]
+
+
+# Кэш свободных столбцов: (маска строки фигуры, строка поля, ширина) -> битовая маска px + 3
+FREE_CACHE = {}
+
+
+def free_columns(mask, row, width):
+    """Битовая маска столбцов px (бит px + 3), в которых строка фигуры mask не задевает строку поля row"""
+    key = (mask, row, width)
+    result = FREE_CACHE.get(key)
+    if result is None:
+        result = 0
+        for px in range(-3, width):
+            shifted = mask << px if px >= 0 else mask >> -px
+            if not row & shifted:
+                result |= 1 << (px + 3)
+        FREE_CACHE[key] = result
+    return result
+
+
+def generate_placements(board, shape_idx, x=None, y=0, rotation=0, paths=True):
+    """
+    Поиск всех различных положений, в которых фигура может зафиксироваться
+    Обход в ширину по состояниям (поворот, x, y) с ходами GameCore: сдвиги,
+    шаг вниз и поворот без смещения. Поэтому находятся и положения,
+    достижимые только подсовыванием фигуры под навес.
+    board: игровое поле Board
+    shape_idx: индекс формы фигуры в SHAPES
+    x, y, rotation: начальное состояние фигуры (по умолчанию - точка появления)
+    paths: восстанавливать ли последовательности действий (без них actions = None
+    и используется более быстрый flood_placements)
+    Возвращает список Placement, по одному на каждое итоговое заполнение поля
+    """
+    if x is None:
+        x = board.width // 2 - 1
+    if not paths:
+        return flood_placements(board, shape_idx, x, y, rotation)
+    states = ROTATIONS[shape_idx]
+    count = len(states)
+    rows = board.rows
+    height = board.height
+    width = board.width
+
+    shifted = shifted_masks(shape_idx, width)
+
+    def fits(r, px, py):
+        """Проверка положения фигуры на поле по предвычисленным маскам"""
+        if px < -3 or px >= width:
+            return False
+        masks = shifted[r][px + 3]
+        if masks is None:
+            return False
+        for dy, mask in masks:
+            row = py + dy
+            if row >= height or (row >= 0 and rows[row] & mask):
+                return False
+        return True
+
+    start = (rotation, x, y)
+    if not fits(*start):
+        return []
+
+    # Для каждого посещенного состояния храним предыдущее состояние и действие
+    parents = {}
+    # Начальные пути к стартовым состояниям обхода
+    prefixes = {}
+    queue = deque()
+    placements = []
+    seen_cells = set()  # Уже найденные итоговые заполнения поля
+
+    # Строки выше самой верхней занятой строки пусты: там фигура свободно
+    # поворачивается и сдвигается, поэтому обход начинается у поверхности стопки
+    top = board.top()
+    free_y = [top - state.height for state in states]  # Нижняя свободная позиция для поворота
+    band = min(free_y)
+    if (band >= y and all(shifted[k][x + 3] is not None for k in range(count))):
+        for r in range(count):
+            turns = [ROTATE] * ((r - rotation) % count)
+            for px in range(-3, width):
+                if shifted[r][px + 3] is None:
+                    continue
+                shift = [RIGHT if px > x else LEFT] * abs(px - x)
+                for py in range(band, free_y[r] + 1):
+                    state = (r, px, py)
+                    parents[state] = None
+                    prefixes[state] = turns + shift + [DOWN] * (py - y)
+                    queue.append(state)
+    else:
+        parents[start] = None
+        prefixes[start] = []
+        queue.append(start)
+
+    while queue:
+        state = queue.popleft()
+        r, px, py = state
+
+        # Соседние состояния: сдвиги, поворот и шаг вниз
+        for action, nr, nx, ny in ((LEFT, r, px - 1, py),
+                                   (RIGHT, r, px + 1, py),
+                                   (ROTATE, (r + 1) % count, px, py),
+                                   (DOWN, r, px, py + 1)):
+            nxt = (nr, nx, ny)
+            if nxt not in parents and fits(nr, nx, ny):
+                parents[nxt] = (state, action)
+                queue.append(nxt)
+
+        # Если фигура не может опуститься, это положение фиксации
+        if not fits(r, px, py + 1):
+            # Разные повороты могут давать одинаковое заполнение (например, у O)
+            cells = (py, shifted[r][px + 3])
+            if cells in seen_cells:
+                continue
+            seen_cells.add(cells)
+            placements.append(Placement(r, px, py, build_path(parents, prefixes, state)))
+
+    return placements
+
+
+def flood_placements(board, shape_idx, x, y, rotation):
+    """
+    Те же положения, что и у generate_placements, но без путей: достижимые
+    столбцы для каждой пары (поворот, строка) хранятся одной битовой маской
+    (бит px + 3), и сдвиги влево-вправо обрабатываются сразу для всей строки
+    """
+    states = ROTATIONS[shape_idx]
+    count = len(states)
+    rows = board.rows
+    height = board.height
+    width = board.width
+    shifted = shifted_masks(shape_idx, width)
+    # Столбцы, в которых поворот не выходит за боковые границы
+    inside = [sum(1 << i for i, masks in enumerate(shifted[r]) if masks is not None) for r in range(count)]
+    top = board.top()
+    fit_cache = {}
+
+    def fit(r, py):
+        """Маска столбцов, в которых поворот r помещается в строке py"""
+        key = (r, py)
+        result = fit_cache.get(key)
+        if result is None:
+            result = inside[r]
+            for dy, mask in states[r].row_masks:
+                row = py + dy
+                if row >= height:
+                    result = 0
+                    break
+                # Строки выше стопки пусты и ничего не ограничивают
+                if row >= top:
+                    result &= free_columns(mask, rows[row], width)
+            fit_cache[key] = result
+        return result
+
+    if x < -3 or x >= width or not fit(rotation, y) >> (x + 3) & 1:
+        return []
+
+    # Как и в generate_placements, над стопкой фигура свободно поворачивается
+    # и сдвигается, поэтому обход начинается с полных строк у поверхности
+    band = min(top - state.height for state in states)
+    open_top = band >= y and all(inside[r] >> (x + 3) & 1 for r in range(count))
+    if open_top and sealed_holes(board):
+        return surface_placements(board, shape_idx, inside)
+    if open_top:
+        reach = {(r, band): inside[r] for r in range(count)}  # (поворот, строка) -> достижимые столбцы
+    else:
+        reach = {(rotation, y): 1 << (x + 3)}
+    queue = deque(reach)
+    while queue:
+        r, py = key = queue.popleft()
+        allowed = fit(r, py)
+        # Растекаемся по строке влево и вправо в пределах свободных столбцов
+        current = reach[key]
+        while True:
+            spread = current | ((current << 1 | current >> 1) & allowed)
+            if spread == current:
+                break
+            current = spread
+        reach[key] = current
+
+        # Шаг вниз и поворот переносят достижимые столбцы в соседние пары
+        for nxt in ((r, py + 1), ((r + 1) % count, py)):
+            moved = current & fit(*nxt)
+            old = reach.get(nxt, 0)
+            if moved & ~old:
+                reach[nxt] = old | moved
+                queue.append(nxt)
+
+    placements = []
+    seen_cells = set()  # Уже найденные итоговые заполнения поля
+    for (r, py), columns in reach.items():
+        # Положения, из которых фигура не может опуститься
+        locked = columns & ~fit(r, py + 1)
+        while locked:
+            low = locked & -locked
+            locked ^= low
+            px = low.bit_length() - 4
+            cells = (py, shifted[r][px + 3])
+            if cells in seen_cells:
+                continue
+            seen_cells.add(cells)
+            placements.append(Placement(r, px, py, None))
+    return placements
+
+
+def sealed_holes(board):
+    """
+    Проверка, что ни одна фигура не может занять дыры - пустые ячейки под верхами
+    столбцов: ни одна дыра не граничит сбоку с открытой сверху ячейкой (сверху
+    и снизу у дыры - ее же столбец), а связные группы дыр меньше 4 ячеек, так что
+    фигура не помещается в них и поворотом. Для поиска положений такое поле не
+    отличается от поля с заполненными дырами
+    """
+    holes = board.holes()
+    if holes == 0:
+        return True
+    full_mask = board.full_mask
+    covered = 0  # Столбцы, в которых уже встретилась занятая ячейка
+    cells = set()
+    for y, row in enumerate(board.rows):
+        hole = covered & ~row
+        if hole:
+            if (hole << 1 | hole >> 1) & ~(covered | row) & full_mask:
+                return False
+            cells.update((x, y) for x in range(board.width) if hole >> x & 1)
+        covered |= row
+    if holes < 4:
+        return True
+
+    # Размеры связных групп дыр
+    while cells:
+        stack = [cells.pop()]
+        size = 1
+        while stack:
+            x, y = stack.pop()
+            for cell in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if cell in cells:
+                    cells.remove(cell)
+                    stack.append(cell)
+                    size += 1
+        if size >= 4:
+            return False
+    return True
+
+
+def surface_placements(board, shape_idx, inside):
+    """
+    Положения flood_placements для поля, над которым фигура свободно поворачивается
+    и сдвигается и дыры которого недостижимы (sealed_holes): фигура не может
+    оказаться ниже поверхности, и каждое положение - падение поворота в столбце
+    до высот столбцов. Порядок тот же, что у обхода flood_placements (по строкам,
+    затем по поворотам и столбцам)
+    inside: маски столбцов (бит px + 3), в которых повороты не выходят за границы
+    """
+    height = board.height
+    heights = board.heights
+    shifted = shifted_masks(shape_idx, board.width)
+    landings = []
+    for r, state in enumerate(ROTATIONS[shape_idx]):
+        bottoms = state.bottoms
+        columns = inside[r]
+        while columns:
+            low = columns & -columns
+            columns ^= low
+            px = low.bit_length() - 4
+            py = min(height - heights[px + dx] - 1 - bottom for dx, bottom in bottoms)
+            landings.append((py, r, px))
+    landings.sort()
+
+    placements = []
+    seen_cells = set()  # Уже найденные итоговые заполнения поля
+    for py, r, px in landings:
+        cells = (py, shifted[r][px + 3])
+        if cells in seen_cells:
+            continue
+        seen_cells.add(cells)
+        placements.append(Placement(r, px, py, None))
+    return placements
+
+
+def build_path(parents, prefixes, state):
+    """Восстановление последовательности действий до состояния по родительским ссылкам"""
+    actions = [HARD_DROP]  # Фигура в конечном положении фиксируется мгновенным падением
+    link = parents[state]
+    while link is not None:
+        state, action = link
+        actions.append(action)
+        link = parents[state]
+    actions.reverse()
+    return prefixes[state] + actions
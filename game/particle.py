@@ -3,13 +3,111 @@
 import pygame
 import random
 import math
+from sprites import prepare  # Импортируем перевод спрайтов в формат экрана
+
+# NumPy необязателен: без него используется система частиц на списке объектов
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Ускорение свободного падения и замедление частиц за кадр
+GRAVITY = 0.1
+DRAG = 0.98
+
+# Начальная емкость массивов NumPy-системы частиц (при нехватке удваивается)
+PARTICLE_CAPACITY = 1024
+
+# Наибольшее количество живых частиц: новые частицы сверх него не создаются
+MAX_PARTICLES = 16384
+
+# Наименьший и наибольший радиус частиц
+MIN_SIZE = 2
+MAX_SIZE = 6
+
+# Количество ступеней прозрачности спрайтов частиц
+ALPHA_STEPS = 32
+
+
+def main_color(color):
+    """Основной цвет RGB из цветовой схемы тетрамино (пара (цвет, тень)) или самого цвета"""
+    if isinstance(color, tuple) and len(color) == 2:
+        return color[0]  # Берем основной цвет
+    if isinstance(color, tuple) and len(color) >= 3:
+        return color[:3]  # Берем только RGB компоненты
+    return (255, 255, 255)  # Белый по умолчанию
+
+
+class ParticleSprites:
+    """
+    Спрайты частиц: круг радиуса size цвета color на ступенях прозрачности.
+    Прозрачность уже вписана в альфа-канал спрайта, поэтому частица
+    выводится готовой поверхностью, а не рисуется каждый кадр на новой.
+    Размеров частиц пять, а цветов - столько же, сколько цветов фигур,
+    поэтому кэш остается небольшим.
+    Спрайты всех размеров и ступеней одного цвета лежат подряд в плоском
+    списке sprites, так что номер спрайта частицы считается арифметикой
+    (см. index) и для массивов частиц получается одним векторным шагом.
+    """
+
+    def __init__(self, steps=ALPHA_STEPS):
+        """
+        Инициализация кэша
+        steps: количество ступеней прозрачности
+        """
+        self.steps = steps
+        self.sprites = []  # Спрайты по номерам (номер цвета, размер, ступень прозрачности)
+        self.color_ids = {}  # Цвет -> номер цвета
+
+    def color_id(self, color):
+        """Номер цвета color (при первом обращении рисуются все его спрайты)"""
+        color_id = self.color_ids.get(color)
+        if color_id is None:
+            color_id = self.color_ids[color] = len(self.color_ids)
+            for size in range(MIN_SIZE, MAX_SIZE + 1):
+                self.sprites.extend(self.build(size, color))
+        return color_id
+
+    def step(self, alpha):
+        """Ближайшая ступень прозрачности alpha (0-255; число или массив NumPy)"""
+        if np is not None and isinstance(alpha, np.ndarray):
+            alpha = np.minimum(alpha, 255)
+        else:
+            alpha = min(alpha, 255)
+        return (alpha * (self.steps - 1) + 127) // 255
+
+    def index(self, color_id, size, step):
+        """Номер спрайта в sprites (числа или массивы NumPy)"""
+        return ((color_id * (MAX_SIZE - MIN_SIZE + 1) + size - MIN_SIZE) * self.steps) + step
+
+    def get(self, size, color, alpha):
+        """Спрайт частицы радиуса size цвета color с прозрачностью alpha (0-255, больше - непрозрачно)"""
+        return self.sprites[self.index(self.color_id(color), size, self.step(alpha))]
+
+    def build(self, size, color):
+        """Рисование спрайтов частицы для всех ступеней прозрачности"""
+        circle = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        pygame.draw.circle(circle, color, (size, size), size)
+        ladder = []
+        for step in range(self.steps):
+            sprite = circle.copy()
+            # Умножаем альфа-канал круга на прозрачность ступени
+            sprite.fill((255, 255, 255, 255 * step // (self.steps - 1)), special_flags=pygame.BLEND_RGBA_MULT)
+            ladder.append(prepare(sprite))
+        return ladder
 
 
 class Particle:
     """Класс для одной частицы"""
 
+    __slots__ = ('x', 'y', 'color', 'size', 'speed_x', 'speed_y', 'life', 'max_life', 'gravity')
+
     def __init__(self, x, y, color):
         """Инициализация частицы"""
+        self.reset(x, y, color)
+
+    def reset(self, x, y, color):
+        """Заполнение частицы заново (погасшие частицы используются повторно)"""
         self.x = x
         self.y = y
         # Убедимся, что цвет в правильном формате (RGB)
@@ -17,12 +115,12 @@ class Particle:
             self.color = color[:3]  # Берем только RGB компоненты
         else:
             self.color = (255, 255, 255)  # Белый по умолчанию
-        self.size = random.randint(2, 6)
+        self.size = random.randint(MIN_SIZE, MAX_SIZE)
         self.speed_x = random.uniform(-3, 3)
         self.speed_y = random.uniform(-3, 3)
         self.life = random.randint(20, 40)  # Время жизни в кадрах
         self.max_life = self.life
-        self.gravity = 0.1
+        self.gravity = GRAVITY
 
     def update(self):
         """Обновление частицы"""
@@ -32,32 +130,12 @@ class Particle:
         self.life -= 1
 
         # Замедление
-        self.speed_x *= 0.98
-        self.speed_y *= 0.98
-
-    def draw(self, screen):
-        """Отрисовка частицы"""
-        if self.life > 0:
-            # Изменяем прозрачность в зависимости от времени жизни
-            alpha = int(255 * (self.life / self.max_life))
+        self.speed_x *= DRAG
+        self.speed_y *= DRAG
 
-            # Создаем цвет с альфа-каналом правильно
-            if len(self.color) >= 3:
-                color_with_alpha = (self.color[0], self.color[1], self.color[2], alpha)
-            else:
-                color_with_alpha = (255, 255, 255, alpha)
-
-            # Создаем временную поверхность для частицы с прозрачностью
-            temp_surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-
-            # Рисуем круг на временной поверхности (без альфа-канала в цвете)
-            pygame.draw.circle(temp_surface, self.color, (self.size, self.size), self.size)
-
-            # Устанавливаем прозрачность всей поверхности
-            temp_surface.set_alpha(alpha)
-
-            # Отображаем поверхность на экране
-            screen.blit(temp_surface, (int(self.x - self.size), int(self.y - self.size)))
+    def alpha(self):
+        """Прозрачность частицы в зависимости от времени жизни"""
+        return int(255 * (self.life / self.max_life))
 
     def is_alive(self):
         """Проверка, жива ли частица"""
@@ -67,43 +145,58 @@ class Particle:
 class ParticleSystem:
     """Система частиц для создания эффектов"""
 
-    def __init__(self):
-        """Инициализация системы частиц"""
+    def __init__(self, max_particles=MAX_PARTICLES):
+        """
+        Инициализация системы частиц
+        max_particles: наибольшее количество живых частиц
+        """
+        self.max_particles = max_particles
         self.particles = []
+        self.pool = []  # Погасшие частицы для повторного использования
+        self.sprites = ParticleSprites()
+
+    def __len__(self):
+        """Количество живых частиц"""
+        return len(self.particles)
+
+    def spawn(self, x, y, color):
+        """
+        Новая живая частица (из пула погасших, если он не пуст)
+        Возвращает None, если живых частиц уже max_particles
+        """
+        if len(self.particles) >= self.max_particles:
+            return None
+        if self.pool:
+            particle = self.pool.pop()
+            particle.reset(x, y, color)
+        else:
+            particle = Particle(x, y, color)
+        self.particles.append(particle)
+        return particle
 
     def add_particles(self, x, y, color, count=10):
         """Добавление частиц в систему"""
         # Извлекаем основной цвет из цветовой схемы тетрамино
-        if isinstance(color, tuple) and len(color) == 2:
-            main_color = color[0]  # Берем основной цвет
-        elif isinstance(color, tuple):
-            main_color = color
-        else:
-            main_color = (255, 255, 255)
-
+        color = main_color(color)
         for _ in range(count):
-            self.particles.append(Particle(x, y, main_color))
+            self.spawn(x, y, color)
 
     def add_line_clear_effect(self, x, y, color):
         """Добавление эффекта очистки линии"""
         # Извлекаем основной цвет из цветовой схемы тетрамино
-        if isinstance(color, tuple) and len(color) == 2:
-            main_color = color[0]  # Берем основной цвет
-        elif isinstance(color, tuple):
-            main_color = color
-        else:
-            main_color = (255, 255, 255)
+        color = main_color(color)
 
         # Создаем больше частиц для эффекта очистки линии
         for _ in range(30):
-            particle = Particle(x + random.randint(-50, 50), y, main_color)
+            particle = self.spawn(x + random.randint(-50, 50), y, color)
+            if particle is None:
+                break
             # Частицы разлетаются в стороны
             angle = random.uniform(0, 2 * math.pi)
             speed = random.uniform(1, 5)
             particle.speed_x = math.cos(angle) * speed
             particle.speed_y = math.sin(angle) * speed
             particle.life = random.randint(30, 60)
-            self.particles.append(particle)
 
     def update(self):
         """Обновление всех частиц"""
@@ -111,10 +204,154 @@ class ParticleSystem:
         for particle in self.particles:
             particle.update()
 
-        # Удаляем мертвые частицы
-        self.particles = [p for p in self.particles if p.is_alive()]
+        # Удаляем мертвые частицы, возвращая их в пул
+        alive = []
+        for particle in self.particles:
+            (alive if particle.is_alive() else self.pool).append(particle)
+        self.particles = alive
 
     def draw(self, screen):
-        """Отрисовка всех частиц"""
-        for particle in self.particles:
-            particle.draw(screen)
\ No newline at end of file
+        """
+        Отрисовка всех частиц одним вызовом blits
+        Возвращает список измененных прямоугольников экрана
+        """
+        sprites = self.sprites
+        return screen.blits([(sprites.get(p.size, p.color, p.alpha()), (int(p.x - p.size), int(p.y - p.size)))
+                             for p in self.particles])
+
+
+class ArrayParticleSystem:
+    """
+    Система частиц на массивах NumPy: координаты, скорости, время жизни,
+    размер и цвет всех частиц хранятся в отдельных заранее выделенных
+    массивах, первые count элементов которых - живые частицы. Движение
+    считается одним векторным шагом для всех частиц, а погасшие частицы
+    заменяются частицами из конца массивов, поэтому живые остаются подряд.
+    Поведение частиц то же, что у ParticleSystem.
+    """
+
+    def __init__(self, capacity=PARTICLE_CAPACITY, max_particles=MAX_PARTICLES):
+        """
+        Инициализация системы частиц
+        capacity: начальная емкость массивов
+        max_particles: наибольшее количество живых частиц
+        """
+        self.rng = np.random.default_rng()
+        self.max_particles = max_particles
+        self.count = 0  # Количество живых частиц
+        self.sprites = ParticleSprites()
+        self.allocate(min(capacity, max_particles))
+
+    def allocate(self, capacity):
+        """Выделение массивов емкостью capacity с переносом живых частиц"""
+        old = getattr(self, 'arrays', None)
+        self.arrays = {
+            'x': np.zeros(capacity, dtype=np.float32),  # Координаты центра
+            'y': np.zeros(capacity, dtype=np.float32),
+            'speed_x': np.zeros(capacity, dtype=np.float32),  # Скорости
+            'speed_y': np.zeros(capacity, dtype=np.float32),
+            'life': np.zeros(capacity, dtype=np.int32),  # Оставшееся время жизни в кадрах
+            'max_life': np.zeros(capacity, dtype=np.int32),  # Начальное время жизни для прозрачности
+            'size': np.zeros(capacity, dtype=np.int32),  # Радиус
+            'color_id': np.zeros(capacity, dtype=np.int32),  # Номер цвета в спрайтах частиц
+        }
+        if old is not None:
+            for name, array in old.items():
+                self.arrays[name][:self.count] = array[:self.count]
+        for name, array in self.arrays.items():
+            setattr(self, name, array)
+
+    def __len__(self):
+        """Количество живых частиц"""
+        return self.count
+
+    def spawn(self, count):
+        """
+        Место для count новых частиц; возвращает срез их индексов
+        (короче count, если иначе живых частиц стало бы больше max_particles)
+        """
+        start = self.count
+        count = max(0, min(count, self.max_particles - start))
+        if start + count > len(self.x):
+            self.allocate(min(max(2 * len(self.x), start + count), self.max_particles))
+        self.count += count
+        return slice(start, start + count)
+
+    def add_particles(self, x, y, color, count=10):
+        """Добавление частиц в систему"""
+        rng = self.rng
+        new = self.spawn(count)
+        count = new.stop - new.start
+        self.x[new] = x
+        self.y[new] = y
+        # Извлекаем основной цвет из цветовой схемы тетрамино
+        self.color_id[new] = self.sprites.color_id(main_color(color))
+        self.size[new] = rng.integers(MIN_SIZE, MAX_SIZE + 1, count)
+        self.speed_x[new] = rng.uniform(-3, 3, count)
+        self.speed_y[new] = rng.uniform(-3, 3, count)
+        life = rng.integers(20, 41, count)  # Время жизни в кадрах
+        self.life[new] = life
+        self.max_life[new] = life
+
+    def add_line_clear_effect(self, x, y, color, count=30):
+        """Добавление эффекта очистки линии"""
+        rng = self.rng
+        new = self.spawn(count)
+        count = new.stop - new.start
+        self.x[new] = x + rng.integers(-50, 51, count)
+        self.y[new] = y
+        self.color_id[new] = self.sprites.color_id(main_color(color))
+        self.size[new] = rng.integers(MIN_SIZE, MAX_SIZE + 1, count)
+        # Частицы разлетаются в стороны
+        angle = rng.uniform(0, 2 * math.pi, count)
+        speed = rng.uniform(1, 5, count)
+        self.speed_x[new] = np.cos(angle) * speed
+        self.speed_y[new] = np.sin(angle) * speed
+        # Прозрачность, как и у ParticleSystem, считается от обычного времени жизни
+        self.max_life[new] = rng.integers(20, 41, count)
+        self.life[new] = rng.integers(30, 61, count)
+
+    def update(self):
+        """Обновление всех частиц одним векторным шагом"""
+        n = self.count
+        speed_x, speed_y = self.speed_x[:n], self.speed_y[:n]
+        self.x[:n] += speed_x
+        self.y[:n] += speed_y
+        speed_y += GRAVITY
+        self.life[:n] -= 1
+
+        # Замедление
+        speed_x *= DRAG
+        speed_y *= DRAG
+
+        # Удаляем мертвые частицы: на места погасших внутри новой длины
+        # переносятся живые частицы из хвоста
+        alive = self.life[:n] > 0
+        live = int(np.count_nonzero(alive))
+        if live < n:
+            holes = np.flatnonzero(~alive[:live])
+            movers = np.flatnonzero(alive[live:]) + live
+            for array in self.arrays.values():
+                array[holes] = array[movers]
+            self.count = live
+
+    def draw(self, screen):
+        """
+        Отрисовка всех частиц одним вызовом blits
+        Возвращает список измененных прямоугольников экрана
+        """
+        n = self.count
+        sprites = self.sprites
+        size = self.size[:n]
+        # Изменяем прозрачность в зависимости от времени жизни
+        step = sprites.step(255 * self.life[:n] // self.max_life[:n])
+        index = sprites.index(self.color_id[:n], size, step).tolist()
+        position = np.stack((self.x[:n] - size, self.y[:n] - size), axis=1).astype(np.int32).tolist()
+        return screen.blits(list(zip(map(sprites.sprites.__getitem__, index), position)))
+
+
+def create_particle_system():
+    """Система частиц на массивах NumPy, если он установлен, иначе на списке объектов"""
+    if np is not None:
+        return ArrayParticleSystem()
+    return ParticleSystem()
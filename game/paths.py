@@ -0,0 +1,34 @@
+# paths.py - Каталоги пользователя для записей игр и кэша
+
+# Импортируем необходимые модули
+import os
+import sys
+
+# Имя приложения в путях каталогов пользователя
+APP_NAME = 'Tetris'
+
+
+def user_data_dir():
+    """
+    Каталог данных игры для текущего пользователя (не зависит от текущего
+    каталога, поэтому игра, запущенная откуда угодно, пишет в одно место)
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(base, APP_NAME)
+
+
+def user_cache_dir():
+    """Каталог кэша игры для текущего пользователя (содержимое можно удалить в любой момент)"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, APP_NAME, 'Cache')
+    if sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, APP_NAME)
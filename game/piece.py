@@ -0,0 +1,69 @@
+# piece.py - Логика игровой фигуры без графики
+
+# Импортируем модуль для генерации случайных чисел и константы
+import random
+from constants import SHAPES, COLORS_3D  # Импортируем формы и цвета из констант
+from rotations import ROTATIONS  # Импортируем предвычисленные таблицы поворотов
+
+
+class Piece:
+    """Класс для представления положения и поворота фигуры без отрисовки"""
+
+    def __init__(self, x, y, rng=None, shape_idx=None):
+        """
+        Инициализация фигуры
+        x: начальная координата X (горизонтальная позиция)
+        y: начальная координата Y (вертикальная позиция)
+        rng: генератор случайных чисел (если None, используется глобальный модуль random)
+        shape_idx: индекс формы (если None, форма выбирается случайно)
+        """
+        self.x = x  # Текущая X-координата фигуры
+        self.y = y  # Текущая Y-координата фигуры
+
+        # Генерируем случайный индекс для выбора формы фигуры
+        if shape_idx is None:
+            shape_idx = (rng or random).randint(0, len(SHAPES) - 1)
+        self.shape_idx = shape_idx
+
+        # Выбираем таблицу состояний поворота по случайному индексу
+        self.states = ROTATIONS[self.shape_idx]
+
+        # Выбираем цвет фигуры по тому же индексу
+        self.color = COLORS_3D[self.shape_idx]
+
+        self.rotation = 0  # Текущий индекс состояния поворота
+        self.state = self.states[0]  # Текущее состояние поворота
+
+    @property
+    def shape(self):
+        """Текущая форма фигуры (кортеж кортежей)"""
+        return self.state.shape
+
+    def set_rotation(self, rotation):
+        """Установка состояния поворота по индексу"""
+        self.rotation = rotation
+        self.state = self.states[rotation]
+
+    def rotate(self):
+        """
+        Поворот фигуры на 90 градусов по часовой стрелке
+        Возвращает индекс состояния поворота после поворота
+        """
+        # Все повороты посчитаны заранее, поэтому достаточно сдвинуть индекс
+        return (self.rotation + 1) % len(self.states)
+
+    def get_positions(self):
+        """
+        Получение всех позиций ячеек фигуры относительно игрового поля
+        Возвращает список кортежей (x, y) с координатами занятых ячеек
+        """
+        x0, y0 = self.x, self.y
+        # Смещения ячеек берутся из предвычисленной таблицы
+        return [(x0 + dx, y0 + dy) for dx, dy in self.state.cells]
+
+    def get_row_masks(self):
+        """
+        Получение битовых масок строк фигуры для проверок на битовом поле
+        Возвращает кортеж пар (dy, mask), где бит x маски соответствует столбцу x фигуры
+        """
+        return self.state.row_masks
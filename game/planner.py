@@ -0,0 +1,455 @@
+# planner.py - Поиск лучшего хода с просмотром нескольких фигур вперед
+
+# Импортируем стандартные модули и игровые модули
+import argparse
+import time
+from collections import OrderedDict, namedtuple
+from operator import itemgetter, sub
+from concurrent.futures import ProcessPoolExecutor
+from rotations import ROTATIONS  # Импортируем таблицы поворотов
+from movegen import Placement, generate_placements, sealed_holes, shifted_masks  # Импортируем генератор положений
+from core import GameCore, HARD_DROP  # Импортируем игровую логику и действие мгновенного падения
+
+# NumPy необязателен: без него листья поиска оцениваются по одному положению
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Признаки поля в порядке весов: очищенные линии, дыры, неровность,
+# суммарная высота столбцов и суммарная глубина колодцев
+FEATURES = ('lines', 'holes', 'bumpiness', 'aggregate_height', 'well_depth')
+
+# Веса признаков по умолчанию (линии поощряются, остальное штрафуется)
+DEFAULT_WEIGHTS = (0.76, -0.36, -0.18, -0.51, -0.1)
+
+# Верхние ячейки столбцов каждого поворота: COLUMN_TOPS[форма][поворот] - пары (dx, dy)
+# самой верхней ячейки каждого занятого столбца (по ним обновляются высоты столбцов)
+COLUMN_TOPS = tuple(tuple(tuple(sorted({dx: min(dy for cx, dy in state.cells if cx == dx)
+                                        for dx, _ in state.cells}.items()))
+                          for state in states)
+                    for states in ROTATIONS)
+
+
+# Все повороты и столбцы всех форм для оценки листьев поиска массивами NumPy (K положений):
+# shape, rotation, x (K,) - форма, поворот и столбец; bottom_columns, bottom_dy (K, 4) - столбцы
+# и нижние ячейки фигуры (для строки падения); tops (K, ширина) - верхняя ячейка фигуры
+# в каждом столбце (ROW_LIMIT, если столбец не занят); row_dy, row_masks (K, 4) - строки
+# фигуры и их сдвинутые маски (маска 0 - пустое место); cells (K,) - количество ячеек;
+# starts - границы положений каждой формы (форма i - от starts[i] до starts[i + 1]);
+# spawn_inside - помещается ли форма во всех поворотах в столбце появления;
+# index - словарь (форма, поворот, x) -> номер положения
+LeafTable = namedtuple('LeafTable', ['shape', 'rotation', 'x', 'bottom_columns', 'bottom_dy', 'tops',
+                                     'row_dy', 'row_masks', 'cells', 'starts', 'spawn_inside', 'index'])
+
+# Верхняя ячейка для незанятых столбцов: высота от нее всегда ниже любой высоты столбца
+ROW_LIMIT = 1 << 30
+
+# Кэш таблиц листьев: ширина поля -> LeafTable
+LEAF_TABLES = {}
+
+
+def leaf_table(width):
+    """Таблица положений всех форм для поля ширины width (строится один раз)"""
+    table = LEAF_TABLES.get(width)
+    if table is not None:
+        return table
+    columns = {name: [] for name in LeafTable._fields[:-3]}
+    starts = []
+    spawn_inside = []
+    index = {}
+    for shape_idx, states in enumerate(ROTATIONS):
+        shifted = shifted_masks(shape_idx, width)
+        starts.append(len(columns['shape']))
+        spawn_inside.append(all(shifted[r][width // 2 - 1 + 3] is not None for r in range(len(states))))
+        for r, state in enumerate(states):
+            for px in range(-3, width):
+                masks = shifted[r][px + 3]
+                if masks is None:
+                    continue
+                bottoms = list(state.bottoms) + [state.bottoms[0]] * (4 - len(state.bottoms))
+                tops = [ROW_LIMIT] * width
+                for dx, dy in COLUMN_TOPS[shape_idx][r]:
+                    tops[px + dx] = dy
+                rows = list(masks) + [(0, 0)] * (4 - len(masks))
+                index[shape_idx, r, px] = len(columns['shape'])
+                columns['shape'].append(shape_idx)
+                columns['rotation'].append(r)
+                columns['x'].append(px)
+                columns['bottom_columns'].append([px + dx for dx, _ in bottoms])
+                columns['bottom_dy'].append([dy for _, dy in bottoms])
+                columns['tops'].append(tops)
+                columns['row_dy'].append([dy for dy, _ in rows])
+                columns['row_masks'].append([mask for _, mask in rows])
+                columns['cells'].append(len(state.cells))
+    starts.append(len(columns['shape']))
+    arrays = {name: np.array(values, dtype=np.uint64 if name == 'row_masks' else np.int64)
+              for name, values in columns.items()}
+    table = LEAF_TABLES[width] = LeafTable(starts=starts, spawn_inside=spawn_inside, index=index, **arrays)
+    return table
+
+
+def height_features(heights, height):
+    """
+    Признаки поля по высотам столбцов heights (height - высота поля)
+    Возвращает кортеж (неровность, суммарная высота, глубина колодцев)
+    """
+    # Соседние пары столбцов сравниваются map по спискам высот, без цикла по индексам
+    bumpiness = sum(map(abs, map(sub, heights[:-1], heights[1:])))
+    # Стены считаются бесконечно высокими соседями
+    left = [height] + heights[:-1]
+    right = heights[1:] + [height]
+    wells = sum(depth for depth in map(sub, map(min, left, right), heights) if depth > 0)
+    return bumpiness, sum(heights), wells
+
+
+def board_features(board):
+    """
+    Подсчет признаков поля по высотам столбцов, которые поле поддерживает само
+    Возвращает кортеж (дыры, неровность, суммарная высота, глубина колодцев)
+    """
+    return (board.holes(),) + height_features(board.heights, board.height)
+
+
+def features_value(weights, holes, bumpiness, aggregate_height, wells):
+    """Взвешенная сумма признаков поля (вес линий weights[0] не используется)"""
+    return (weights[1] * holes + weights[2] * bumpiness +
+            weights[3] * aggregate_height + weights[4] * wells)
+
+
+def evaluate_board(board, weights):
+    """Оценка поля по признакам board_features (вес линий weights[0] не используется)"""
+    return features_value(weights, *board_features(board))
+
+
+class Planner:
+    """
+    Планировщик ходов с просмотром вперед.
+    Значение хода - сумма weights[0] * очищенные линии на каждом шаге плюс оценка
+    итогового поля функцией heuristic(board, weights). Неизвестные будущие фигуры
+    усредняются по всем формам. Значения поддеревьев кэшируются в LRU-таблице
+    транспозиций, а ходы корня могут распределяться по процессам.
+    Бюджет времени на ход (одно ядро, замер - python planner.py): при depth=3
+    и beam=6 в среднем около 30 мс, на высоких полях с открытыми навесами -
+    до 60-70 мс; без NumPy - в 3-4 раза медленнее. Без луча (beam=None) ход
+    занимает порядка секунды и для игры в реальном времени не подходит.
+    """
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, heuristic=evaluate_board, depth=None,
+                 beam=6, table_size=100000, workers=1):
+        """
+        Инициализация планировщика
+        weights: веса признаков в порядке FEATURES
+        heuristic: функция оценки поля heuristic(board, weights)
+        depth: количество фигур для просмотра (None - только известные фигуры)
+        beam: сколько лучших ходов раскрывать глубже (None - все ходы)
+        table_size: максимальный размер таблицы транспозиций
+        workers: количество процессов для разбора ходов корня
+        """
+        self.weights = tuple(weights)
+        self.heuristic = heuristic
+        self.depth = depth
+        self.beam = beam
+        self.table_size = table_size
+        self.workers = workers
+        self.table = OrderedDict()  # Таблица транспозиций: ключ поля и очереди -> значение
+        self.executor = None  # Пул процессов создается при первом параллельном поиске
+
+    def __getstate__(self):
+        """Пул процессов и кэш не передаются в другие процессы"""
+        state = self.__dict__.copy()
+        state['executor'] = None
+        state['table'] = OrderedDict()
+        return state
+
+    def settings(self):
+        """Параметры поиска, от которых зависят значения в таблице транспозиций"""
+        return (self.weights, self.heuristic, self.depth, self.beam, self.table_size)
+
+    def __call__(self, core, rng=None):
+        """
+        Стратегия для runner.play_game: действия для лучшего хода текущей фигуры
+        rng: генератор стратегии (не используется - поиск детерминирован)
+        """
+        piece = core.current_piece
+        queue = [piece.shape_idx, core.next_piece.shape_idx]
+        best = self.best_placement(core.board, queue, (piece.x, piece.y, piece.rotation))
+        return best.actions if best is not None else [HARD_DROP]
+
+    def best_placement(self, board, queue, start=None):
+        """
+        Поиск лучшего положения для первой фигуры очереди
+        board: игровое поле, queue: индексы форм известных фигур (первая - текущая)
+        start: начальное состояние (x, y, rotation) текущей фигуры (None - точка появления)
+        Возвращает Placement или None, если фигуру некуда поставить
+        """
+        depth = self.depth or len(queue)
+        x, y, rotation = start if start is not None else (None, 0, 0)
+        placements = generate_placements(board, queue[0], x, y, rotation)
+        children = self.expand(board, queue[0], placements, queue[1:2])
+        if not children:
+            return None
+
+        rest = tuple(queue[1:])
+        if depth == 1:
+            values = [estimate for estimate, _, _, _ in children]
+        elif self.workers > 1 and len(children) > 1:
+            # Поддеревья ходов корня считаются в отдельных процессах
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers)
+            tasks = [(self, child, rest, depth - 1) for _, child, _, _ in children]
+            subtree = self.executor.map(evaluate_root_child, tasks)
+            values = [lines_reward + value for (_, _, lines_reward, _), value in zip(children, subtree)]
+        else:
+            values = [lines_reward + self.value(child, rest, depth - 1)
+                      for _, child, lines_reward, _ in children]
+
+        best = max(range(len(children)), key=values.__getitem__)
+        return children[best][3]
+
+    def child_board(self, board, shape_idx, placement):
+        """Поле после фиксации фигуры в положении placement и очистки заполненных линий"""
+        child = board.copy(colors=False)
+        full = child.place(ROTATIONS[shape_idx][placement.rotation].row_masks, placement.x, placement.y, shape_idx)
+        if full:
+            child.clear_rows(full)
+        return child, len(full)
+
+    def estimates(self, board, shape_idx, placements, upcoming):
+        """
+        Оценки положений фигуры (награда за линии плюс оценка дочернего поля)
+        upcoming: кортеж с формой следующей фигуры (пустой, если она неизвестна)
+        Возвращает список (оценка, дочернее поле или None, награда за линии, положение)
+        без проигрышных ходов, после которых следующая фигура не появляется.
+        С оценкой evaluate_board положения без очистки линий оцениваются по
+        высотам столбцов без копирования поля (дочернее поле - None, его строит
+        expand только для ходов, которые раскрываются глубже); иначе поле строится
+        """
+        weights = self.weights
+        spawn_x = board.width // 2 - 1
+        if upcoming:
+            spawn = ROTATIONS[upcoming[0]][0].row_masks
+            spawn_masks = shifted_masks(upcoming[0], board.width)[0][spawn_x + 3]
+        if self.heuristic is not evaluate_board:
+            children = []
+            for placement in placements:
+                child, lines = self.child_board(board, shape_idx, placement)
+                # Ход, после которого следующая фигура не появляется, проигрышный
+                if upcoming and not child.fits(spawn, spawn_x, 0):
+                    continue
+                lines_reward = weights[0] * lines
+                children.append((lines_reward + self.heuristic(child, weights), child, lines_reward, placement))
+            return children
+
+        rows = board.rows
+        height = board.height
+        full_mask = board.full_mask
+        heights = board.heights
+        filled = board.filled
+        shifted = shifted_masks(shape_idx, board.width)
+        tops = COLUMN_TOPS[shape_idx]
+        children = []
+        for placement in placements:
+            r, px, py = placement.rotation, placement.x, placement.y
+            masks = shifted[r][px + 3]
+            # Очистка линий и ячейки выше поля меняют поле целиком - его строим
+            if py < 0 or any(rows[py + dy] | mask == full_mask for dy, mask in masks):
+                child, lines = self.child_board(board, shape_idx, placement)
+                if upcoming and not child.fits(spawn, spawn_x, 0):
+                    continue
+                lines_reward = weights[0] * lines
+                children.append((lines_reward + evaluate_board(child, weights), child, lines_reward, placement))
+                continue
+
+            # Следующая фигура появляется в верхних строках: сверяем их со строками после фиксации
+            if upcoming:
+                placed = {py + dy: mask for dy, mask in masks}
+                if spawn_masks is None or any(dy >= height or (rows[dy] | placed.get(dy, 0)) & mask
+                                              for dy, mask in spawn_masks):
+                    continue
+
+            child_heights = heights[:]
+            for dx, dy in tops[r]:
+                level = height - py - dy
+                if child_heights[px + dx] < level:
+                    child_heights[px + dx] = level
+            cells = sum(mask.bit_count() for _, mask in masks)
+            holes = sum(child_heights) - filled - cells
+            estimate = features_value(weights, holes, *height_features(child_heights, height))
+            children.append((estimate, None, 0.0, placement))
+        return children
+
+    def expand(self, board, shape_idx, placements, upcoming):
+        """
+        Построение дочерних полей для положений фигуры
+        upcoming: кортеж с формой следующей фигуры (пустой, если она неизвестна)
+        Возвращает список (оценка, поле, награда за линии, положение), отсортированный по убыванию
+        оценки и обрезанный до ширины луча
+        """
+        children = self.estimates(board, shape_idx, placements, upcoming)
+        children.sort(key=itemgetter(0), reverse=True)
+        if self.beam is not None:
+            del children[self.beam:]
+        return [(estimate, child if child is not None else self.child_board(board, shape_idx, placement)[0],
+                 lines_reward, placement)
+                for estimate, child, lines_reward, placement in children]
+
+    def value(self, board, queue, depth):
+        """
+        Лучшее значение для поля при оставшейся очереди фигур
+        queue: кортеж известных будущих фигур, depth: сколько фигур еще поставить
+        """
+        if depth == 0:
+            return self.heuristic(board, self.weights)
+
+        key = (board.key(), queue[:depth], depth)
+        cached = self.table.get(key)
+        if cached is not None:
+            self.table.move_to_end(key)
+            return cached
+
+        if queue:
+            result = self.best_value(board, queue[0], queue[1:], depth)
+        elif depth == 1:
+            # Последняя фигура неизвестна - усредняем лучшие оценки всех форм
+            result = sum(self.leaf_values(board)) / len(ROTATIONS)
+        else:
+            # Следующая фигура неизвестна - усредняем по всем формам
+            result = sum(self.best_value(board, shape, (), depth)
+                         for shape in range(len(ROTATIONS))) / len(ROTATIONS)
+
+        self.table[key] = result
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+        return result
+
+    def best_value(self, board, shape_idx, rest, depth):
+        """Лучшее значение среди положений фигуры shape_idx с последующим поиском"""
+        # Во внутренних узлах нужны только положения: пути действий строятся лишь для корня
+        placements = generate_placements(board, shape_idx, paths=False)
+        if depth == 1:
+            # Глубже не смотрим: нужна только лучшая оценка, дочерние поля не строятся
+            return max((estimate for estimate, _, _, _ in self.estimates(board, shape_idx, placements, rest[:1])),
+                       default=float('-inf'))
+        children = self.expand(board, shape_idx, placements, rest[:1])
+        if not children:
+            return float('-inf')
+        return max(lines_reward + self.value(child, rest, depth - 1)
+                   for _, child, lines_reward, _ in children)
+
+    def leaf_values(self, board):
+        """
+        Лучшие оценки положений каждой формы на поле board без просмотра дальше
+        (то же, что best_value(board, форма, (), 1) для всех форм)
+        Оценки положений всех форм считаются сразу массивами NumPy по высотам
+        столбцов; положения с очисткой линий оцениваются по построенному полю.
+        Когда над стопкой фигура свободна, а дыры недостижимы, положения - падения
+        в каждом повороте и столбце, и их строки тоже считаются массивами;
+        иначе положения формы ищутся обходом
+        """
+        shapes = range(len(ROTATIONS))
+        if np is None or self.heuristic is not evaluate_board or board.width > 64:
+            return [self.best_value(board, shape, (), 1) for shape in shapes]
+
+        table = leaf_table(board.width)
+        height = board.height
+        heights = np.array(board.heights)
+        drops = (height - 1 - heights[table.bottom_columns] - table.bottom_dy).min(axis=1)
+        surface = sealed_holes(board)
+        top = board.top()
+        index_parts = []
+        landing_parts = []
+        bounds = [0]  # Границы положений каждой формы в index и landing
+        for shape_idx, states in enumerate(ROTATIONS):
+            start, end = table.starts[shape_idx], table.starts[shape_idx + 1]
+            if surface and table.spawn_inside[shape_idx] and top >= max(state.height for state in states):
+                index_parts.append(np.arange(start, end))
+                landing_parts.append(drops[start:end])
+            else:
+                placements = generate_placements(board, shape_idx, paths=False)
+                index_parts.append(np.array([table.index[shape_idx, p.rotation, p.x] for p in placements],
+                                            dtype=np.int64))
+                landing_parts.append(np.array([p.y for p in placements], dtype=np.int64))
+            bounds.append(bounds[-1] + len(index_parts[-1]))
+        index = np.concatenate(index_parts)
+        landing = np.concatenate(landing_parts)
+
+        # Высоты столбцов после фиксации и признаки дочерних полей (дыры - как Board.holes)
+        child_heights = np.maximum(heights, height - landing[:, None] - table.tops[index])
+        aggregate_height = child_heights.sum(axis=1)
+        holes = aggregate_height - board.filled - table.cells[index]
+        bumpiness = np.abs(np.diff(child_heights, axis=1)).sum(axis=1)
+        # Стены считаются бесконечно высокими соседями
+        wall = np.full((len(index), 1), height)
+        left = np.concatenate((wall, child_heights[:, :-1]), axis=1)
+        right = np.concatenate((child_heights[:, 1:], wall), axis=1)
+        depth = np.minimum(left, right) - child_heights
+        wells = np.where(depth > 0, depth, 0).sum(axis=1)
+        weights = self.weights
+        estimates = (weights[1] * holes + weights[2] * bumpiness +
+                     weights[3] * aggregate_height + weights[4] * wells)
+
+        # Положения, заполняющие строки (или выше поля), оцениваются по построенному полю
+        rows = np.array(board.rows, dtype=np.uint64)
+        row_masks = table.row_masks[index]
+        piece_rows = np.clip(landing[:, None] + table.row_dy[index], 0, height - 1)
+        full = ((rows[piece_rows] | row_masks) == np.uint64(board.full_mask)) & (row_masks != 0)
+        for i in np.flatnonzero(full.any(axis=1) | (landing < 0)).tolist():
+            k = index[i]
+            placement = Placement(int(table.rotation[k]), int(table.x[k]), int(landing[i]), None)
+            child, lines = self.child_board(board, int(table.shape[k]), placement)
+            estimates[i] = weights[0] * lines + evaluate_board(child, weights)
+
+        return [float(estimates[start:end].max()) if end > start else float('-inf')
+                for start, end in zip(bounds, bounds[1:])]
+
+    def close(self):
+        """Завершение пула процессов"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+# Планировщик процесса пула: сохраняется между задачами, чтобы не терять таблицу транспозиций
+worker_planner = None
+
+
+def evaluate_root_child(task):
+    """Оценка поддерева одного хода корня (выполняется в процессе пула)"""
+    global worker_planner
+    planner, board, queue, depth = task
+    if worker_planner is None or worker_planner.settings() != planner.settings():
+        worker_planner = planner
+    return worker_planner.value(board, queue, depth)
+
+
+def main():
+    """Замер времени на ход планировщика в игре из командной строки"""
+    parser = argparse.ArgumentParser(description="Замер скорости планировщика Тетриса")
+    parser.add_argument('--depth', type=int, default=3, help="количество фигур для просмотра")
+    parser.add_argument('--beam', type=int, default=6, help="ширина луча (0 - без ограничения)")
+    parser.add_argument('--moves', type=int, default=100, help="количество ходов")
+    parser.add_argument('--seed', type=int, default=0, help="начальное значение генератора фигур")
+    args = parser.parse_args()
+
+    core = GameCore(seed=args.seed)
+    planner = Planner(depth=args.depth, beam=args.beam or None)
+    times = []
+    while not core.game_over and core.pieces < args.moves:
+        start = time.perf_counter()
+        actions = planner(core)
+        times.append(time.perf_counter() - start)
+        pieces = core.pieces
+        for action in actions:
+            core.step(action)
+            if core.pieces != pieces:
+                break
+    times.sort()
+    print(f"Ходов: {len(times)}, счет: {core.score}, линии: {core.lines_cleared}")
+    print(f"Время на ход: среднее {sum(times) / len(times) * 1000:.1f} мс, "
+          f"90% {times[len(times) * 9 // 10] * 1000:.1f} мс, наибольшее {times[-1] * 1000:.1f} мс")
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# replay.py - Игровая сессия с записью действий по тикам и воспроизведение записей
+
+# Импортируем стандартные модули и игровые модули
+import argparse
+import os
+import struct
+import time
+from collections import deque
+from core import GameCore, EVENT_LOCK, TICK_RATE  # Импортируем игровую логику
+from piece import Piece  # Импортируем логику фигуры
+
+# Дополнительные действия записи (после ACTIONS игровой логики)
+UNDO = 5  # Отмена ходов до начала предыдущей фигуры
+END = 255  # Конец записи
+
+# Сколько фигур назад можно отменить ходы
+UNDO_DEPTH = 1000
+
+# Заголовок файла записи: сигнатура, версия формата, seed, ширина и высота поля
+LOG_MAGIC = b'TTRP'
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct('<4sBQHH')
+
+# seed записи хранится 64-битным числом без знака: допустимы seed от 0 до SEED_LIMIT - 1
+SEED_LIMIT = 2 ** 64
+
+
+def write_varint(buffer, value):
+    """Запись неотрицательного числа по 7 бит в байте (старший бит - признак продолжения)"""
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, i):
+    """Чтение числа, записанного write_varint, с позиции i; возвращает (число, новая позиция)"""
+    value = 0
+    shift = 0
+    while data[i] & 0x80:
+        value |= (data[i] & 0x7F) << shift
+        shift += 7
+        i += 1
+    return value | data[i] << shift, i + 1
+
+
+class InputLog:
+    """
+    Компактная двоичная запись действий игрока.
+    Каждое действие - разница тиков с предыдущим действием (varint) и байт действия,
+    поэтому типичная игра занимает несколько килобайт.
+    """
+
+    def __init__(self, seed, width, height, data=b''):
+        """
+        Инициализация записи
+        seed: начальное значение генератора фигур игры
+        width, height: размеры поля
+        data: уже записанные действия (при чтении из файла)
+        """
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.data = bytearray(data)  # Закодированные действия
+        self.last_tick = 0  # Тик последнего записанного действия
+
+    def record(self, tick, action):
+        """Запись действия action на тике tick (тики не убывают)"""
+        write_varint(self.data, tick - self.last_tick)
+        self.last_tick = tick
+        self.data.append(action)
+
+    def finish(self, tick):
+        """Отметка конца записи на тике tick"""
+        self.record(tick, END)
+
+    def inputs(self):
+        """Генерирует пары (тик, действие) в порядке записи"""
+        data = self.data
+        tick = 0
+        i = 0
+        while i < len(data):
+            delta, i = read_varint(data, i)
+            tick += delta
+            yield tick, data[i]
+            i += 1
+
+    def to_bytes(self):
+        """Содержимое файла записи"""
+        if not 0 <= self.seed < SEED_LIMIT:
+            raise ValueError(f"seed записи должен быть от 0 до {SEED_LIMIT - 1}: {self.seed}")
+        return LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, self.seed, self.width, self.height) + self.data
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Чтение записи из содержимого файла"""
+        magic, version, seed, width, height = LOG_HEADER.unpack_from(data)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError("Неизвестный формат записи")
+        return cls(seed, width, height, data[LOG_HEADER.size:])
+
+    def save(self, path):
+        """Атомарная запись в файл"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Чтение записи из файла"""
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class Session:
+    """
+    Игровая сессия поверх GameCore: счетчик тиков, история снимков для отмены
+    ходов и запись всех действий. Игра в окне и воспроизведение записи идут
+    через одну и ту же сессию, поэтому запись повторяет игру в точности.
+    """
+
+    def __init__(self, core, record=True):
+        """
+        Инициализация сессии
+        core: игровая логика
+        record: записывать ли действия в InputLog
+        """
+        self.core = core
+        self.record = record
+        self.seed = None  # Начальное значение генератора текущей игры
+        self.ticks = 0  # Тиков с начала игры
+        self.history = deque(maxlen=UNDO_DEPTH)  # Снимки игры на начало каждой фигуры
+        self.log = None  # Запись текущей игры
+        self.finished = False  # Отмечен ли конец записи
+
+    def reset(self, seed=None):
+        """
+        Начало новой игры
+        seed: начальное значение генератора (если None, выбирается случайно)
+        """
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), 'little')
+        self.core.reset(seed)
+        self.seed = seed
+        self.ticks = 0
+        self.history.clear()
+        self.history.append(self.core.snapshot())
+        self.log = InputLog(seed, self.core.width, self.core.height) if self.record else None
+        self.finished = False
+
+    def restore(self, snapshot, ticks):
+        """
+        Продолжение игры со снимка snapshot, сделанного на тике ticks
+        (история отмены начинается с этого снимка, запись не ведется)
+        """
+        self.core.restore(snapshot)
+        self.ticks = ticks
+        self.history.clear()
+        self.history.append(snapshot)
+        self.log = None
+
+    def apply(self, action):
+        """
+        Действие игрока на текущем тике (одно из ACTIONS или UNDO)
+        Возвращает список событий игровой логики
+        """
+        if self.log is not None and not self.finished:
+            self.log.record(self.ticks, action)
+        if action == UNDO:
+            self.undo()
+            return []
+        return self.remember(self.core.step(action))
+
+    def tick(self):
+        """Один игровой тик; возвращает список событий"""
+        self.ticks += 1
+        return self.remember(self.core.tick())
+
+    def remember(self, events):
+        """После фиксации запоминаем состояние на начало новой фигуры"""
+        if any(event.kind == EVENT_LOCK for event in events) and not self.core.game_over:
+            self.history.append(self.core.snapshot())
+        return events
+
+    def undo(self):
+        """
+        Отмена ходов до начала предыдущей фигуры
+        Возвращает True, если в истории было куда вернуться
+        """
+        if self.core.game_over:
+            # Фиксация, закончившая игру, снимок не добавляет: последний снимок - начало
+            # той самой фигуры, и возврат к нему отменяет ровно одну фигуру, как и во время игры
+            self.core.restore(self.history[-1])
+            return True
+        if len(self.history) < 2:
+            return False
+        self.history.pop()
+        self.core.restore(self.history[-1])
+        return True
+
+    def finish(self):
+        """Отметка конца записи; возвращает InputLog (или None, если запись не велась)"""
+        if self.log is not None and not self.finished:
+            self.log.finish(self.ticks)
+            self.finished = True
+        return self.log
+
+
+def replay_events(session, log):
+    """
+    Применение действий записи log к сессии session, начатой с seed записи
+    Генерирует списки событий каждого тика и каждого действия по порядку
+    """
+    for tick, action in log.inputs():
+        while session.ticks < tick:
+            yield session.tick()
+        if action == END:
+            return
+        yield session.apply(action)
+
+
+def play_log(log, piece_factory=Piece):
+    """
+    Воспроизведение записи без графики с максимальной скоростью
+    Возвращает сессию в конечном состоянии
+    """
+    session = Session(GameCore(log.width, log.height, piece_factory), record=False)
+    session.reset(log.seed)
+    deque(replay_events(session, log), maxlen=0)  # Проходим события, не сохраняя их
+    return session
+
+
+def play_rendered(log):
+    """Воспроизведение записи в окне в реальном времени"""
+    import pygame
+    from game import TetrisGame  # Импорт здесь, чтобы воспроизведение без графики не требовало pygame
+
+    pygame.init()
+    game = TetrisGame(replay=log)
+    game.run()
+
+
+def main():
+    """Воспроизведение записи из командной строки"""
+    parser = argparse.ArgumentParser(description="Воспроизведение записи игры Тетрис")
+    parser.add_argument('path', help="файл записи")
+    parser.add_argument('--render', action='store_true', help="показать игру в окне в реальном времени")
+    parser.add_argument('--repeat', type=int, default=1, help="сколько раз повторить (для замеров)")
+    args = parser.parse_args()
+
+    log = InputLog.load(args.path)
+    if args.render:
+        play_rendered(log)
+        return
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        session = play_log(log)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    core = session.core
+    print(f"Счет: {core.score}, линии: {core.lines_cleared}, фигур: {core.pieces}, "
+          f"тиков: {session.ticks} ({session.ticks / TICK_RATE:.0f} с игры)")
+    print(f"Время: {elapsed * 1000 / args.repeat:.1f} мс на прогон, "
+          f"тиков/с: {session.ticks * args.repeat / elapsed:.0f}")
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
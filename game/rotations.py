@@ -0,0 +1,53 @@
+# rotations.py - Предвычисленные таблицы поворотов тетрамино
+
+# Импортируем стандартный модуль для неизменяемых записей и формы фигур
+from collections import namedtuple
+from constants import SHAPES  # Импортируем формы из констант
+
+# Одно состояние поворота фигуры:
+# shape - форма в виде кортежа кортежей (для отрисовки)
+# cells - смещения (dx, dy) занятых ячеек
+# row_masks - пары (dy, mask) для непустых строк, бит x маски - столбец x
+# width, height - размеры формы в ячейках
+# bottoms - пары (dx, dy) самой нижней ячейки каждого занятого столбца (для расчета падения)
+PieceState = namedtuple('PieceState', ['shape', 'cells', 'row_masks', 'width', 'height', 'bottoms'])
+
+
+def rotate_shape(shape):
+    """
+    Поворот формы на 90 градусов по часовой стрелке
+    Возвращает новую форму в виде кортежа кортежей
+    """
+    rows = len(shape)  # Количество строк исходной формы
+    cols = len(shape[0])  # Количество столбцов исходной формы
+    # Новая позиция [c][rows-1-r] = старая позиция [r][c]
+    return tuple(tuple(shape[rows - 1 - r][c] for r in range(rows)) for c in range(cols))
+
+
+def build_state(shape):
+    """Построение состояния поворота по форме фигуры"""
+    shape = tuple(tuple(row) for row in shape)
+    cells = tuple((x, y) for y, row in enumerate(shape) for x, cell in enumerate(row) if cell)
+    row_masks = []
+    for dy, row in enumerate(shape):
+        mask = sum(1 << x for x, cell in enumerate(row) if cell)
+        if mask:
+            row_masks.append((dy, mask))
+    bottoms = {}
+    for x, y in cells:
+        bottoms[x] = max(bottoms.get(x, y), y)
+    return PieceState(shape, cells, tuple(row_masks), len(shape[0]), len(shape),
+                      tuple(sorted(bottoms.items())))
+
+
+def build_rotations(shape):
+    """Построение всех четырех состояний поворота для одной формы"""
+    states = []
+    for _ in range(4):
+        states.append(build_state(shape))
+        shape = rotate_shape(shape)
+    return tuple(states)
+
+
+# ROTATIONS[shape_idx][rotation] - состояние фигуры SHAPES[shape_idx] после rotation поворотов
+ROTATIONS = tuple(build_rotations(shape) for shape in SHAPES)
@@ -0,0 +1,125 @@
+# runner.py - Параллельный запуск игр с воспроизводимыми последовательностями фигур
+
+# Импортируем стандартные модули для процессов, времени и разбора аргументов
+import argparse
+import random
+import time
+from collections import namedtuple
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from core import GameCore, LEFT, RIGHT, ROTATE, HARD_DROP  # Импортируем игровую логику и действия
+
+# Итог одной игры: начальное значение генератора, счет, линии, уровень,
+# количество фигур и длительность игры в секундах
+GameRecord = namedtuple('GameRecord', ['seed', 'score', 'lines', 'level', 'pieces', 'duration'])
+
+
+def policy_rng(seed):
+    """
+    Генератор случайных решений стратегии для игры с начальным значением seed
+    Он выводится из seed, но отделен от генератора фигур core.rng, поэтому
+    последовательность фигур одна и та же при любой стратегии
+    """
+    return random.Random(f"policy:{seed}")
+
+
+def random_policy(core, rng):
+    """
+    Простейшая стратегия: случайный поворот и сдвиг, затем мгновенное падение
+    rng: генератор стратегии (policy_rng), поэтому результат зависит только от seed
+    Возвращает список действий для текущей фигуры
+    """
+    actions = [ROTATE] * rng.randint(0, 3)
+    shift = rng.randint(-core.width // 2, core.width // 2)
+    actions += [RIGHT if shift > 0 else LEFT] * abs(shift)
+    actions.append(HARD_DROP)
+    return actions
+
+
+def play_game(seed, policy=random_policy, max_pieces=None):
+    """
+    Проведение одной игры до конца или до лимита фигур
+    seed: начальное значение генератора фигур
+    policy: функция policy(core, rng), возвращающая список действий для текущей фигуры
+    (rng - генератор стратегии из policy_rng(seed))
+    max_pieces: максимальное количество фигур (None - без ограничения)
+    Возвращает GameRecord
+    """
+    start = time.perf_counter()
+    core = GameCore(seed=seed)
+    rng = policy_rng(seed)
+    while not core.game_over and (max_pieces is None or core.pieces < max_pieces):
+        pieces = core.pieces
+        for action in policy(core, rng):
+            core.step(action)
+            # Фигура зафиксирована - остальные действия относились к ней
+            if core.pieces != pieces:
+                break
+        else:
+            # Стратегия не зафиксировала фигуру - роняем ее, чтобы игра продвигалась
+            core.step(HARD_DROP)
+    duration = time.perf_counter() - start
+    return GameRecord(seed, core.score, core.lines_cleared, core.level, core.pieces, duration)
+
+
+def run_games(seeds, policy=random_policy, workers=None, max_pieces=None, chunksize=16):
+    """
+    Параллельный запуск игр в пуле процессов
+    seeds: последовательность начальных значений (по одной игре на значение)
+    workers: количество процессов (None - по числу ядер)
+    Генерирует GameRecord по мере завершения игр (порядок не гарантирован)
+    """
+    task = partial(play_game, policy=policy, max_pieces=max_pieces)
+    with Pool(workers or cpu_count()) as pool:
+        for record in pool.imap_unordered(task, seeds, chunksize):
+            yield record
+
+
+class RunStats:
+    """Накопление статистики по завершенным играм"""
+
+    def __init__(self):
+        """Инициализация пустой статистики"""
+        self.games = 0  # Количество игр
+        self.pieces = 0  # Общее количество фигур
+        self.lines = 0  # Общее количество линий
+        self.total_score = 0  # Суммарный счет
+        self.best_score = 0  # Лучший счет
+        self.start = time.perf_counter()  # Время начала запуска
+
+    def add(self, record):
+        """Учет результата одной игры"""
+        self.games += 1
+        self.pieces += record.pieces
+        self.lines += record.lines
+        self.total_score += record.score
+        self.best_score = max(self.best_score, record.score)
+
+    def summary(self):
+        """Строка с итоговой статистикой и пропускной способностью"""
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        mean_score = self.total_score / self.games if self.games else 0
+        return (f"Игр: {self.games}, фигур: {self.pieces}, линий: {self.lines}, "
+                f"средний счет: {mean_score:.1f}, лучший счет: {self.best_score}, "
+                f"игр/с: {self.games / elapsed:.1f}, фигур/с: {self.pieces / elapsed:.0f}")
+
+
+def main():
+    """Запуск серии игр из командной строки"""
+    parser = argparse.ArgumentParser(description="Параллельный запуск игр Тетриса")
+    parser.add_argument('--games', type=int, default=1000, help="количество игр")
+    parser.add_argument('--seed', type=int, default=0, help="начальное значение для первой игры")
+    parser.add_argument('--workers', type=int, default=None, help="количество процессов")
+    parser.add_argument('--max-pieces', type=int, default=None, help="лимит фигур в одной игре")
+    args = parser.parse_args()
+
+    stats = RunStats()
+    seeds = range(args.seed, args.seed + args.games)
+    for record in run_games(seeds, workers=args.workers, max_pieces=args.max_pieces):
+        stats.add(record)
+    print(stats.summary())
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# solver.py - Поиск последовательности ходов для идеальной очистки поля или очистки N линий
+
+# Импортируем стандартный модуль разбора аргументов и игровые модули
+import argparse
+import time
+from rotations import ROTATIONS  # Импортируем таблицы поворотов
+from movegen import generate_placements, placement_cells  # Импортируем генератор положений
+from board import Board  # Импортируем битовое поле
+
+# Буквенные обозначения фигур в порядке SHAPES (для запуска из командной строки)
+PIECE_LETTERS = 'ITLJOSZ'
+
+
+def column_parity(cells):
+    """Разность количества ячеек в четных и нечетных столбцах"""
+    return sum(1 if x % 2 == 0 else -1 for x, _ in cells)
+
+
+# Возможные вклады каждой формы в разность четных и нечетных столбцов
+# (сдвиг фигуры на один столбец меняет знак вклада)
+PARITY_CHOICES = tuple(
+    frozenset(value for state in states for value in (column_parity(state.cells), -column_parity(state.cells)))
+    for states in ROTATIONS
+)
+
+
+def count_holes(board):
+    """Количество пустых ячеек под занятыми"""
+    covered = 0
+    holes = 0
+    for row in board.rows:
+        covered |= row
+        holes += (covered & ~row).bit_count()
+    return holes
+
+
+class SearchLimit(Exception):
+    """Превышен лимит узлов поиска"""
+
+
+class Solver:
+    """
+    Поиск в глубину по битовым полям с запоминанием проигрышных состояний
+    (поле, номер фигуры в очереди, очищенные линии). Ветви отсекаются по
+    количеству пустых ячеек: для идеальной очистки их число должно делиться
+    на 4 и не превышать объем оставшихся фигур, причем отдельно по обе стороны
+    от каждой границы столбцов, которую не может пересечь ни одна фигура. Кроме того, разность
+    пустых ячеек в четных и нечетных столбцах (она не меняется при очистке
+    линий) должна набираться вкладами фигур, которые заполнят область.
+    Для очистки N линий самые пустые строки должны быть заполнимы оставшимися фигурами.
+    """
+
+    def __init__(self, board, queue, lines=None, start=None, max_nodes=None):
+        """
+        Инициализация поиска
+        board: игровое поле, queue: индексы форм фигур в порядке появления
+        lines: сколько линий очистить (None - идеальная очистка всего поля)
+        start: начальное состояние (x, y, rotation) первой фигуры (None - точка появления)
+        max_nodes: лимит просмотренных узлов (None - без ограничения)
+        """
+        self.board = board.copy(colors=False)
+        self.queue = tuple(queue)
+        self.lines = lines
+        self.start = start
+        self.max_nodes = max_nodes
+        self.nodes = 0  # Количество просмотренных узлов
+        self.slice_nodes = None  # Через сколько узлов приостанавливать пошаговый поиск
+        self.result = None  # Результат последнего поиска
+        self.failed = set()  # Проигрышные состояния
+        self.limit_row = 0  # Верхняя допустимая строка для идеальной очистки
+        self.parity_sets = {}  # (номер фигуры, количество фигур) -> достижимые разности четности
+        self.even_mask = sum(1 << x for x in range(0, board.width, 2))  # Маска четных столбцов
+
+    def solve(self):
+        """
+        Поиск решения
+        Возвращает список Placement или None, если решения нет (или превышен лимит узлов)
+        """
+        for _ in self.steps():
+            pass
+        return self.result
+
+    def steps(self, slice_nodes=None):
+        """
+        Пошаговый поиск: генератор приостанавливается после каждых slice_nodes
+        просмотренных узлов (None - без остановок), чтобы поиск можно было
+        распределить по кадрам игры. По окончании результат solve() лежит в self.result
+        """
+        self.slice_nodes = slice_nodes
+        self.result = None
+        try:
+            if self.lines is not None:
+                self.result = self.with_actions((yield from self.search_steps(self.board, 0, 0)))
+                return
+
+            # Для идеальной очистки перебираем высоту области, которую нужно заполнить целиком
+            board = self.board
+            width, height = board.width, board.height
+            filled = board.filled
+            top = board.top()
+            for area in range(max(height - top, 1), height + 1):
+                empty = area * width - filled
+                if empty > 4 * len(self.queue):
+                    break
+                if empty % 4:
+                    continue
+                self.limit_row = height - area
+                self.failed.clear()
+                result = yield from self.search_steps(board, 0, 0)
+                if result is not None:
+                    self.result = self.with_actions(result)
+                    return
+        except SearchLimit:
+            pass
+
+    def with_actions(self, placements):
+        """
+        Восстановление последовательностей действий для найденного решения
+        (во время поиска пути не строятся, чтобы не тратить на них время)
+        """
+        if placements is None:
+            return None
+        board = self.board.copy(colors=False)
+        result = []
+        for index, placement in enumerate(placements):
+            shape_idx = self.queue[index]
+            x, y, rotation = self.start if index == 0 and self.start else (None, 0, 0)
+            # Поиск шел по положениям без путей, индекс поворота которых у симметричных
+            # фигур может отличаться, поэтому положение ищется по заполнению поля
+            cells = placement_cells(shape_idx, board.width, placement)
+            for candidate in generate_placements(board, shape_idx, x, y, rotation):
+                if placement_cells(shape_idx, board.width, candidate) == cells:
+                    result.append(candidate)
+                    break
+            else:
+                raise RuntimeError(f"Не найден путь к положению {placement[:3]} фигуры {shape_idx}")
+            state = ROTATIONS[shape_idx][placement.rotation]
+            full = board.place(state.row_masks, placement.x, placement.y, shape_idx)
+            if full:
+                board.clear_rows(full)
+        return result
+
+    def reachable_parity(self, index, count):
+        """Множество разностей четности, которые дают count фигур очереди начиная с index"""
+        key = (index, count)
+        result = self.parity_sets.get(key)
+        if result is None:
+            if count == 0:
+                result = frozenset((0,))
+            else:
+                rest = self.reachable_parity(index + 1, count - 1)
+                result = frozenset(a + b for a in PARITY_CHOICES[self.queue[index]] for b in rest)
+            self.parity_sets[key] = result
+        return result
+
+    def bound_ok(self, board, index, cleared):
+        """Проверка, может ли оставшаяся очередь в принципе достичь цели"""
+        pieces = len(self.queue) - index
+        width = board.width
+        if self.lines is None:
+            # Вся область ниже limit_row (с учетом очищенных линий) должна быть заполнена
+            rows = board.rows[self.limit_row + cleared:]
+            empty = len(rows) * width - sum(row.bit_count() for row in rows)
+            if empty % 4 or empty > 4 * pieces:
+                return False
+            # Область заполнят ровно empty / 4 следующих фигур
+            full_mask, even = board.full_mask, self.even_mask
+            parity = sum((even & ~row).bit_count() - (full_mask & ~(even | row)).bit_count() for row in rows)
+            if parity not in self.reachable_parity(index, empty // 4):
+                return False
+            # Фигура, пересекающая границу между столбцами c и c + 1, занимает обе ячейки
+            # некоторой строки по сторонам границы. Если таких пар пустых ячеек нет ни в одной
+            # строке области, граница закрыта навсегда (очистка линий только удаляет строки),
+            # и каждая сторона заполняется целыми фигурами
+            open_pairs = 0
+            for row in rows:
+                free = full_mask & ~row
+                open_pairs |= free & (free >> 1)
+            segment = 0  # Маска столбцов текущего участка между закрытыми границами
+            for x in range(width):
+                segment |= 1 << x
+                if x == width - 1 or not open_pairs >> x & 1:
+                    if sum((segment & ~row).bit_count() for row in rows) % 4:
+                        return False
+                    segment = 0
+            return True
+        # Нужно заполнить самые пустые из оставшихся строк
+        need = self.lines - cleared
+        empties = sorted(width - row.bit_count() for row in board.rows)
+        return sum(empties[:need]) <= 4 * pieces
+
+    def search(self, board, index, cleared):
+        """Рекурсивный поиск решения с фигуры index без остановок"""
+        steps = self.search_steps(board, index, cleared)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def search_steps(self, board, index, cleared):
+        """
+        Рекурсивный поиск решения с фигуры index (генератор, который
+        приостанавливается через каждые slice_nodes узлов и возвращает решение)
+        """
+        if self.lines is None:
+            # Пустое поле - цель, если поставлена хотя бы одна фигура
+            if index > 0 and not any(board.rows):
+                return []
+        elif cleared >= self.lines:
+            return []
+        if index == len(self.queue):
+            return None
+
+        key = (board.key(), index, cleared)
+        if key in self.failed:
+            return None
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchLimit()
+        if self.slice_nodes and self.nodes % self.slice_nodes == 0:
+            yield
+        if not self.bound_ok(board, index, cleared):
+            self.failed.add(key)
+            return None
+
+        shape_idx = self.queue[index]
+        states = ROTATIONS[shape_idx]
+        x, y, rotation = self.start if index == 0 and self.start else (None, 0, 0)
+        children = []
+        for placement in generate_placements(board, shape_idx, x, y, rotation, paths=False):
+            # При идеальной очистке фигура не должна выходить за верх области
+            if self.lines is None and placement.y < self.limit_row + cleared:
+                continue
+            child = board.copy(colors=False)
+            full = child.place(states[placement.rotation].row_masks, placement.x, placement.y, shape_idx)
+            if full:
+                child.clear_rows(full)
+            children.append((count_holes(child), -placement.y, placement, child, len(full)))
+
+        # Сначала пробуем ходы без закрытых пустых ячеек: они чаще ведут к решению
+        children.sort(key=lambda item: item[:2])
+        for _, _, placement, child, lines in children:
+            rest = yield from self.search_steps(child, index + 1, cleared + lines)
+            if rest is not None:
+                return [placement] + rest
+
+        self.failed.add(key)
+        return None
+
+
+def solve(board, queue, lines=None, start=None, max_nodes=None):
+    """Короткая форма Solver(...).solve()"""
+    return Solver(board, queue, lines, start, max_nodes).solve()
+
+
+def main():
+    """Решение задачи из командной строки на пустом поле"""
+    parser = argparse.ArgumentParser(description="Поиск идеальной очистки поля")
+    parser.add_argument('queue', help="очередь фигур буквами, например ITLJOSZ")
+    parser.add_argument('--lines', type=int, default=None, help="очистить N линий вместо всего поля")
+    args = parser.parse_args()
+
+    queue = [PIECE_LETTERS.index(letter) for letter in args.queue.upper()]
+    start = time.perf_counter()
+    solver = Solver(Board(), queue, args.lines)
+    result = solver.solve()
+    elapsed = time.perf_counter() - start
+    if result is None:
+        print(f"Решение не найдено ({solver.nodes} узлов, {elapsed * 1000:.0f} мс)")
+        return
+    print(f"Решение из {len(result)} фигур ({solver.nodes} узлов, {elapsed * 1000:.0f} мс):")
+    for shape_idx, placement in zip(queue, result):
+        print(f"  {PIECE_LETTERS[shape_idx]}: поворот {placement.rotation}, x={placement.x}, y={placement.y}")
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# sprites.py - Атлас заранее нарисованных спрайтов ячеек тетрамино
+
+# Импортируем необходимые модули и константы
+import math
+import pygame
+from constants import COLORS_3D  # Импортируем цвета фигур
+
+# Количество ступеней яркости пульсации: фаза sin(t * 5) округляется до одной из них
+PHASES = 32
+
+
+def brightness_phase(animation_time):
+    """Номер ступени яркости для времени анимации фигуры"""
+    return int(animation_time * 5 / (2 * math.pi) * PHASES) % PHASES
+
+
+def prepare(surface):
+    """Перевод поверхности в формат экрана (если окно уже создано) для быстрого вывода"""
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+class CellAtlas:
+    """
+    Спрайты ячеек для текущего размера сетки. Каждый спрайт рисуется один раз
+    при первом использовании и хранится до смены размера ячейки, поэтому
+    отрисовка ячейки - это вывод готовой поверхности без создания новых.
+    Ключи: индекс цвета в COLORS_3D и ступень яркости (для падающей фигуры).
+    """
+
+    def __init__(self, grid_size=30):
+        """
+        Инициализация атласа
+        grid_size: размер ячейки в пикселях
+        """
+        self.grid_size = grid_size  # Размер ячейки, для которого нарисованы спрайты
+        self.cells = {}  # (цвет, ступень) -> ячейка падающей фигуры
+        self.shines = {}  # (цвет, ступень) -> блик ячейки падающей фигуры
+        self.blocks = {}  # цвет -> ячейка следующей фигуры с неподвижным бликом
+
+    def resize(self, grid_size):
+        """Смена размера ячейки; спрайты перерисовываются только при изменении"""
+        if grid_size != self.grid_size:
+            self.grid_size = grid_size
+            self.cells.clear()
+            self.shines.clear()
+            self.blocks.clear()
+
+    @staticmethod
+    def bright_color(color_idx, phase):
+        """Основной цвет ячейки на ступени яркости phase"""
+        color = COLORS_3D[color_idx][0]
+        brightness = 1.0 + 0.3 * math.sin((phase + 0.5) / PHASES * 2 * math.pi)  # Пульсация
+        return tuple(min(255, int(c * brightness)) for c in color)
+
+    def cell(self, color_idx, phase):
+        """Ячейка падающей фигуры: основной цвет, градиент и тень"""
+        key = (color_idx, phase)
+        sprite = self.cells.get(key)
+        if sprite is None:
+            size = self.grid_size
+            shadow = COLORS_3D[color_idx][1]
+            sprite = pygame.Surface((size, size))
+            sprite.fill(self.bright_color(color_idx, phase))
+
+            # Добавляем градиент для 3D эффекта
+            gradient_surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            for i in range(size):
+                alpha = int(100 * (1 - i / size))
+                pygame.draw.line(gradient_surface, (*shadow, alpha), (0, i), (size, i))
+            sprite.blit(gradient_surface, (0, 0))
+
+            # Рисуем тень для создания 3D-эффекта
+            pygame.draw.rect(sprite, shadow, sprite.get_rect(), max(1, size // 15))
+            sprite = self.cells[key] = prepare(sprite)
+        return sprite
+
+    def shine(self, color_idx, phase):
+        """Полупрозрачный блик ячейки падающей фигуры (светлый оттенок основного цвета)"""
+        key = (color_idx, phase)
+        sprite = self.shines.get(key)
+        if sprite is None:
+            color = tuple(min(255, c + 50) for c in self.bright_color(color_idx, phase))
+            sprite = self.shines[key] = prepare(self.shine_surface(color))
+        return sprite
+
+    def block(self, color_idx):
+        """Ячейка следующей фигуры: основной цвет, тень и неподвижный блик"""
+        sprite = self.blocks.get(color_idx)
+        if sprite is None:
+            size = self.grid_size
+            color, shadow = COLORS_3D[color_idx]
+            sprite = pygame.Surface((size, size))
+            sprite.fill(color)
+            pygame.draw.rect(sprite, shadow, sprite.get_rect(), max(1, size // 15))
+            # Добавляем эффект блеска для следующей фигуры
+            if size > 10:
+                shine_size = max(1, size // 8)
+                sprite.blit(self.shine_surface(tuple(min(255, c + 50) for c in color)),
+                            (size // 4 - shine_size // 2, size // 4 - shine_size // 2))
+            sprite = self.blocks[color_idx] = prepare(sprite)
+        return sprite
+
+    def shine_surface(self, color):
+        """Круглый блик цвета color с прозрачностью 180"""
+        shine_size = max(1, self.grid_size // 8)
+        surface = pygame.Surface((shine_size * 2, shine_size * 2), pygame.SRCALPHA)
+        pygame.draw.ellipse(surface, (*color, 180), (0, 0, shine_size * 2, shine_size * 2))
+        return surface
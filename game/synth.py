@@ -0,0 +1,273 @@
+# synth.py - Синтез звуков из слоев голосов с огибающими и кэш готовых сэмплов на диске
+
+# Импортируем необходимые модули
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+import pygame
+from paths import user_cache_dir  # Импортируем каталог кэша пользователя
+
+# NumPy необязателен: без него сэмплы считаются в цикле (только при первом запуске,
+# пока кэш не записан)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Огибающая ADSR: время нарастания, спада и затухания в секундах и уровень удержания (0-1)
+Envelope = namedtuple('Envelope', ['attack', 'decay', 'sustain', 'release'])
+
+# Голос - один слой звука: форма волны ('sine', 'square', 'saw', 'triangle' или 'flat' -
+# постоянный уровень), частота в Гц, амплитуда в единицах 16-битного сэмпла, огибающая
+# ADSR (None - без нее) и скорость экспоненциального затухания exp(-t * fade)
+Voice = namedtuple('Voice', ['wave', 'frequency', 'amplitude', 'envelope', 'fade'],
+                   defaults=(None, 0.0))
+
+# Звук: длительность в секундах и голоса, которые складываются
+SoundSpec = namedtuple('SoundSpec', ['duration', 'voices'])
+
+# Файл кэша: сигнатура, версия формата, хэш описаний звуков и параметров микшера,
+# частота, размер сэмпла микшера, количество каналов и количество звуков. Следом идут
+# записи индекса (имя, смещение и размер сэмплов) и сами сэмплы в формате микшера
+SYNTH_MAGIC = b'TTRS'
+SYNTH_VERSION = 2
+CACHE_HEADER = struct.Struct('<4sB20sIbBI')
+CACHE_ENTRY = struct.Struct('<32sQQ')
+
+# Путь к кэшу сэмплов по умолчанию (в каталоге кэша пользователя, а не в текущем каталоге)
+SOUND_CACHE = os.path.join(user_cache_dir(), 'sounds.pcm')
+
+# Форматы сэмплов микшера, отличные от 16 бит со знаком: размер сэмпла pygame ->
+# (код типа array, перевод 16-битного сэмпла со знаком). 32 бита у pygame - float
+SAMPLE_FORMATS = {
+    8: ('B', lambda sample: (sample >> 8) + 128),
+    -8: ('b', lambda sample: sample >> 8),
+    16: ('H', lambda sample: sample + 32768),
+    32: ('f', lambda sample: sample / 32768),
+    -32: ('f', lambda sample: sample / 32768),
+}
+
+
+def frame_count(duration, sample_rate):
+    """Количество кадров звука длительностью duration секунд"""
+    return int(duration * sample_rate)
+
+
+def envelope_level(envelope, t, duration):
+    """Уровень огибающей ADSR в момент t (секунды) звука длительностью duration"""
+    attack, decay, sustain, release = envelope
+    if t < attack:
+        level = t / attack
+    elif t < attack + decay:
+        level = 1 - (1 - sustain) * (t - attack) / decay
+    else:
+        level = sustain
+    release_start = duration - release
+    if release and t >= release_start:
+        level = min(level, sustain * (duration - t) / release)
+    return level
+
+
+def wave_value(wave, phase):
+    """Значение формы волны wave для фазы phase (в периодах)"""
+    if wave == 'sine':
+        return math.sin(2 * math.pi * phase)
+    if wave == 'flat':
+        return 1.0
+    phase %= 1.0
+    if wave == 'square':
+        return 1.0 if phase < 0.5 else -1.0
+    if wave == 'saw':
+        return 2 * phase - 1
+    if wave == 'triangle':
+        return 1 - 4 * abs(phase - 0.5)
+    raise ValueError(f"Неизвестная форма волны: {wave}")
+
+
+def render_python(spec, sample_rate, channels):
+    """Сэмплы звука spec без NumPy (цикл по кадрам)"""
+    frames = frame_count(spec.duration, sample_rate)
+    duration = frames / sample_rate
+    samples = array('h')
+    for i in range(frames):
+        t = i / sample_rate
+        value = 0.0
+        for voice in spec.voices:
+            level = voice.amplitude * wave_value(voice.wave, voice.frequency * t)
+            if voice.envelope is not None:
+                level *= envelope_level(voice.envelope, t, duration)
+            if voice.fade:
+                level *= math.exp(-t * voice.fade)
+            value += level
+        # Обрезаем до диапазона 16-битного сэмпла и повторяем для каждого канала
+        samples.extend([int(max(-32768, min(32767, value)))] * channels)
+    if sys.byteorder != 'little':
+        samples.byteswap()  # Сэмплы микшера - little-endian
+    return samples.tobytes()
+
+
+def render_numpy(spec, sample_rate, channels):
+    """Сэмплы звука spec: волны и огибающие всех голосов считаются над массивами"""
+    frames = frame_count(spec.duration, sample_rate)
+    duration = frames / sample_rate
+    t = np.arange(frames) / sample_rate
+    value = np.zeros(frames)
+    for voice in spec.voices:
+        phase = voice.frequency * t
+        if voice.wave == 'sine':
+            level = np.sin(2 * np.pi * phase)
+        elif voice.wave == 'flat':
+            level = np.ones(frames)
+        elif voice.wave == 'square':
+            level = np.where(phase % 1.0 < 0.5, 1.0, -1.0)
+        elif voice.wave == 'saw':
+            level = 2 * (phase % 1.0) - 1
+        elif voice.wave == 'triangle':
+            level = 1 - 4 * np.abs(phase % 1.0 - 0.5)
+        else:
+            raise ValueError(f"Неизвестная форма волны: {voice.wave}")
+        level *= voice.amplitude
+        if voice.envelope is not None:
+            level *= adsr(voice.envelope, t, duration)
+        if voice.fade:
+            level *= np.exp(-t * voice.fade)
+        value += level
+    # Обрезаем до диапазона 16-битного сэмпла и повторяем для каждого канала
+    samples = np.clip(value, -32768, 32767).astype('<i2')
+    return np.repeat(samples, channels).tobytes()
+
+
+def adsr(envelope, t, duration):
+    """Уровни огибающей ADSR для массива моментов t (то же, что envelope_level)"""
+    attack, decay, sustain, release = envelope
+    level = np.full(len(t), float(sustain))
+    if decay:
+        level = np.where(t < attack + decay, 1 - (1 - sustain) * (t - attack) / decay, level)
+    if attack:
+        level = np.where(t < attack, t / attack, level)
+    if release:
+        level = np.minimum(level, np.where(t >= duration - release, sustain * (duration - t) / release, np.inf))
+    return level
+
+
+def render(spec, sample_rate, channels):
+    """Сэмплы звука spec (16 бит со знаком, каналы чередуются)"""
+    if np is not None:
+        return render_numpy(spec, sample_rate, channels)
+    return render_python(spec, sample_rate, channels)
+
+
+def convert(samples, size):
+    """
+    Перевод сэмплов (16 бит со знаком, little-endian) в формат микшера с размером
+    сэмпла size (как его возвращает pygame.mixer.get_init)
+    """
+    if size == -16:
+        return samples
+    if size not in SAMPLE_FORMATS:
+        raise ValueError(f"Неподдерживаемый размер сэмпла микшера: {size}")
+    typecode, translate = SAMPLE_FORMATS[size]
+    source = array('h')
+    source.frombytes(samples)
+    if sys.byteorder != 'little':
+        source.byteswap()
+    result = array(typecode, map(translate, source))
+    if sys.byteorder != 'little':
+        result.byteswap()  # Сэмплы микшера - little-endian
+    return result.tobytes()
+
+
+def render_all(specs, sample_rate, size, channels):
+    """Сэмплы всех звуков specs в формате микшера: словарь имя -> сэмплы"""
+    return {name: convert(render(spec, sample_rate, channels), size) for name, spec in specs.items()}
+
+
+def cache_digest(specs, sample_rate, size, channels):
+    """Хэш описаний звуков и параметров микшера: при их изменении кэш рисуется заново"""
+    key = repr((SYNTH_VERSION, sample_rate, size, channels, sorted(specs.items())))
+    return hashlib.sha1(key.encode()).digest()
+
+
+def write_cache(path, specs, sample_rate, size, channels):
+    """Синтез звуков specs и запись их в кэш path; возвращает словарь имя -> сэмплы"""
+    pcm = render_all(specs, sample_rate, size, channels)
+    offset = CACHE_HEADER.size + CACHE_ENTRY.size * len(pcm)
+    data = bytearray(CACHE_HEADER.pack(SYNTH_MAGIC, SYNTH_VERSION, cache_digest(specs, sample_rate, size, channels),
+                                       sample_rate, size, channels, len(pcm)))
+    for name, samples in pcm.items():
+        data += CACHE_ENTRY.pack(name.encode(), offset, len(samples))
+        offset += len(samples)
+    for samples in pcm.values():
+        data += samples
+
+    # Пишем во временный файл и подменяем кэш целиком, чтобы не оставить его наполовину записанным
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return pcm
+
+
+def read_cache(path, specs, sample_rate, size, channels, build):
+    """
+    Чтение звуков из кэша path через отображение файла в память
+    build(сэмплы) создает звук из буфера сэмплов
+    Возвращает словарь имя -> звук или None, если кэша нет или он устарел
+    """
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size < CACHE_HEADER.size:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data, memoryview(data) as view:
+            magic, version, digest, rate, stored_size, stored_channels, count = CACHE_HEADER.unpack_from(data, 0)
+            if (magic != SYNTH_MAGIC or version != SYNTH_VERSION or rate != sample_rate or stored_size != size
+                    or stored_channels != channels or digest != cache_digest(specs, sample_rate, size, channels)):
+                return None
+            sounds = {}
+            for i in range(count):
+                name, offset, length = CACHE_ENTRY.unpack_from(data, CACHE_HEADER.size + i * CACHE_ENTRY.size)
+                name = name.rstrip(b'\0').decode()
+                if offset + length > len(data):
+                    return None  # Файл обрезан
+                with view[offset:offset + length] as samples:
+                    sounds[name] = build(samples)
+            return sounds
+
+
+def load_sounds(specs, path=SOUND_CACHE):
+    """
+    Звуки pygame по описаниям specs (имя -> SoundSpec) для текущих параметров микшера
+    Сэмплы берутся из кэша path, а если его нет или описания изменились -
+    синтезируются, переводятся в формат микшера и записываются в кэш
+    """
+    sample_rate, size, channels = pygame.mixer.get_init()
+
+    def build(samples):
+        """Звук из буфера сэмплов (pygame копирует данные)"""
+        return pygame.mixer.Sound(buffer=samples)
+
+    try:
+        sounds = read_cache(path, specs, sample_rate, size, channels, build)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Ошибка чтения кэша звуков: {e}")
+        sounds = None
+    if sounds is not None:
+        return sounds
+
+    try:
+        pcm = write_cache(path, specs, sample_rate, size, channels)
+    except OSError as e:
+        print(f"Ошибка записи кэша звуков: {e}")
+        pcm = render_all(specs, sample_rate, size, channels)
+    return {name: build(samples) for name, samples in pcm.items()}
@@ -0,0 +1,28 @@
+# test_solver.py - Проверка восстановления путей для решений поиска очистки линий
+
+# Импортируем игровые модули
+from board import Board  # Импортируем битовое поле
+from movegen import placement_cells  # Импортируем заполнение поля положением
+from solver import Solver  # Импортируем поиск решения
+
+
+def test_symmetric_piece_keeps_placement():
+    """
+    Z с начальным поворотом 1: поиск без путей выбирает для положения поворот 1,
+    а обход в ширину - поворот 3 с тем же заполнением. Решение не должно терять
+    ход текущей фигуры
+    """
+    board = Board()
+    board.rows[12:] = [0, 923, 189, 503, 767, 511, 947, 895]
+    board.reindex()
+    queue, start = [6, 1], (6, 11, 1)
+
+    searcher = Solver(board, queue, lines=1, start=start)
+    found = searcher.search(searcher.board, 0, 0)
+    result = Solver(board, queue, lines=1, start=start).solve()
+
+    assert found is not None and result is not None
+    assert len(result) == len(found)
+    for shape_idx, placement, solved in zip(queue, found, result):
+        assert placement_cells(shape_idx, board.width, solved) == placement_cells(shape_idx, board.width, placement)
+        assert solved.actions
@@ -0,0 +1,219 @@
+# tuner.py - Параллельный подбор весов эвристики планировщика
+
+# Импортируем стандартные модули и игровые модули
+import argparse
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool, cpu_count
+from runner import play_game  # Импортируем проведение одной игры
+from planner import Planner, DEFAULT_WEIGHTS, FEATURES  # Импортируем планировщик и веса
+
+# Цели оптимизации: счет по таблице очков GameCore.clear_lines или количество линий
+OBJECTIVES = ('score', 'lines')
+
+
+def play_candidate(task):
+    """
+    Одна игра кандидата (выполняется в процессе пула)
+    task: (индекс кандидата, веса, seed, лимит фигур)
+    Возвращает пару (индекс кандидата, GameRecord)
+    """
+    index, weights, seed, max_pieces = task
+    return index, play_game(seed, Planner(weights, depth=1), max_pieces)
+
+
+class Tuner:
+    """
+    Подбор весов эвристики упрощенной эволюционной стратегией в духе CMA-ES
+    с диагональной ковариацией. Каждое поколение играет одинаковый набор
+    seed для всех кандидатов. Игры идут раундами: после каждого раунда
+    безнадежные кандидаты отсеиваются. Средние сравниваются только у кандидатов,
+    сыгравших одни и те же seed: отсеянный раньше всегда ниже отсеянного позже
+    и прошедших все раунды. Состояние сохраняется в файл после
+    каждого поколения, поэтому прерванный подбор продолжается с того же места.
+    """
+
+    def __init__(self, path, population=32, games=16, rounds=2, cutoff=0.5, objective='score',
+                 max_pieces=500, workers=None, seed=0, sigma=0.3, weights=DEFAULT_WEIGHTS):
+        """
+        Инициализация подбора
+        path: файл контрольной точки (если существует, подбор продолжается из него)
+        population: количество кандидатов в поколении
+        games: количество игр на кандидата в поколении
+        rounds: на сколько раундов делятся игры для раннего отсева
+        cutoff: доля от лучшего среднего, ниже которой кандидат отсеивается
+        objective: 'score' или 'lines'
+        max_pieces: лимит фигур в одной игре
+        workers: количество процессов (None - по числу ядер)
+        seed: начальное значение генератора кандидатов и seed игр
+        sigma: начальный разброс весов
+        weights: начальные веса
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Неизвестная цель оптимизации: {objective}")
+        self.path = path
+        self.population = population
+        self.games = games
+        self.rounds = max(1, min(rounds, games))
+        self.cutoff = cutoff
+        self.objective = objective
+        self.max_pieces = max_pieces
+        self.workers = workers or cpu_count()
+
+        # Состояние подбора (сохраняется в контрольной точке)
+        self.seed = seed
+        self.generation = 0
+        self.mean = list(weights)
+        self.sigma = [sigma] * len(self.mean)
+        self.best_weights = list(weights)
+        self.best_fitness = float('-inf')
+        self.history = []  # Средняя и лучшая приспособленность по поколениям
+        self.rng = random.Random(seed)
+
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        """Загрузка состояния из контрольной точки"""
+        with open(self.path, encoding='utf-8') as f:
+            state = json.load(f)
+        self.seed = state['seed']
+        self.generation = state['generation']
+        self.mean = state['mean']
+        self.sigma = state['sigma']
+        self.best_weights = state['best_weights']
+        self.history = state['history']
+        # Лучшая приспособленность по другой цели несравнима с текущей
+        if state['objective'] == self.objective:
+            self.best_fitness = state['best_fitness']
+        version, internal, gauss = state['rng']
+        self.rng.setstate((version, tuple(internal), gauss))
+
+    def save(self):
+        """Атомарная запись состояния в контрольную точку"""
+        state = {
+            'seed': self.seed,
+            'generation': self.generation,
+            'objective': self.objective,
+            'features': FEATURES,
+            'mean': self.mean,
+            'sigma': self.sigma,
+            'best_weights': self.best_weights,
+            'best_fitness': self.best_fitness,
+            'history': self.history,
+            'rng': self.rng.getstate(),
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        # Замена файла целиком, чтобы прерывание не оставило поврежденную точку
+        os.replace(tmp_path, self.path)
+
+    def sample(self):
+        """Генерация кандидатов вокруг текущего среднего"""
+        return [[m + s * self.rng.gauss(0, 1) for m, s in zip(self.mean, self.sigma)]
+                for _ in range(self.population)]
+
+    def evaluate(self, pool, candidates):
+        """
+        Оценка кандидатов с ранним отсевом безнадежных
+        Возвращает списки приспособленности (средняя цель по сыгранным играм)
+        и количества сыгранных игр: кандидат, отсеянный после раунда r, сыграл
+        ровно seed раундов 0..r
+        """
+        base = self.seed * 1000003 + self.generation * self.games
+        seeds = [base + i for i in range(self.games)]
+        totals = [0.0] * len(candidates)
+        played = [0] * len(candidates)
+        alive = list(range(len(candidates)))
+
+        for r in range(self.rounds):
+            round_seeds = seeds[r::self.rounds]
+            tasks = [(i, candidates[i], seed, self.max_pieces) for i in alive for seed in round_seeds]
+            for index, record in pool.imap_unordered(play_candidate, tasks):
+                totals[index] += record.score if self.objective == 'score' else record.lines
+                played[index] += 1
+
+            # Кандидаты, отстающие от лучшего больше чем в 1 / cutoff раз, дальше не играют
+            means = {i: totals[i] / played[i] for i in alive}
+            best = max(means.values())
+            if best > 0:
+                alive = [i for i in alive if means[i] >= self.cutoff * best]
+
+        return [totals[i] / played[i] for i in range(len(candidates))], played
+
+    def update(self, candidates, fitness, played):
+        """
+        Сдвиг среднего к лучшим кандидатам и адаптация разброса
+        Кандидаты упорядочиваются по числу сыгранных игр, а при равном числе
+        (то есть на одинаковых seed) - по средней цели
+        """
+        order = sorted(range(len(candidates)), key=lambda i: (played[i], fitness[i]), reverse=True)
+        mu = max(1, len(candidates) // 2)
+        # Логарифмические веса рекомбинации, как в CMA-ES
+        raw = [math.log(mu + 0.5) - math.log(i + 1) for i in range(mu)]
+        total = sum(raw)
+        recombination = [w / total for w in raw]
+        elite = [candidates[i] for i in order[:mu]]
+
+        old_mean = self.mean
+        self.mean = [sum(w * c[j] for w, c in zip(recombination, elite)) for j in range(len(old_mean))]
+        for j in range(len(old_mean)):
+            spread = math.sqrt(sum(w * (c[j] - old_mean[j]) ** 2 for w, c in zip(recombination, elite)))
+            # Плавное обновление разброса с нижней границей, чтобы поиск не застыл
+            self.sigma[j] = max(1e-3, 0.7 * self.sigma[j] + 0.3 * spread)
+
+        # Лучший кандидат всегда проходит все раунды; средняя по поколению
+        # считается тоже только по сыгравшим все игры
+        if fitness[order[0]] > self.best_fitness:
+            self.best_fitness = fitness[order[0]]
+            self.best_weights = list(candidates[order[0]])
+        complete = [fitness[i] for i in order if played[i] == self.games]
+        self.history.append((sum(complete) / len(complete), fitness[order[0]]))
+
+    def run(self, generations):
+        """Проведение заданного количества поколений с выводом скорости подбора"""
+        start = time.perf_counter()
+        done = 0
+        with Pool(self.workers) as pool:
+            for _ in range(generations):
+                candidates = self.sample()
+                fitness, played = self.evaluate(pool, candidates)
+                self.update(candidates, fitness, played)
+                self.generation += 1
+                self.save()
+
+                done += 1
+                per_minute = done * 60 / (time.perf_counter() - start)
+                mean_fitness, best = self.history[-1]
+                print(f"Поколение {self.generation}: средняя {mean_fitness:.1f}, лучшая {best:.1f}, "
+                      f"поколений/мин: {per_minute:.2f}")
+        return self.best_weights
+
+
+def main():
+    """Запуск подбора весов из командной строки"""
+    parser = argparse.ArgumentParser(description="Подбор весов эвристики Тетриса")
+    parser.add_argument('--checkpoint', default='tuner.json', help="файл контрольной точки")
+    parser.add_argument('--generations', type=int, default=10, help="количество поколений")
+    parser.add_argument('--population', type=int, default=32, help="кандидатов в поколении")
+    parser.add_argument('--games', type=int, default=16, help="игр на кандидата")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='score', help="цель оптимизации")
+    parser.add_argument('--max-pieces', type=int, default=500, help="лимит фигур в одной игре")
+    parser.add_argument('--workers', type=int, default=None, help="количество процессов")
+    parser.add_argument('--seed', type=int, default=0, help="начальное значение генератора")
+    args = parser.parse_args()
+
+    tuner = Tuner(args.checkpoint, population=args.population, games=args.games,
+                  objective=args.objective, max_pieces=args.max_pieces,
+                  workers=args.workers, seed=args.seed)
+    weights = tuner.run(args.generations)
+    print("Лучшие веса:", dict(zip(FEATURES, (round(w, 4) for w in weights))))
+
+
+# Проверяем, запущен ли файл напрямую (а не импортирован как модуль)
+if __name__ == "__main__":
+    main()
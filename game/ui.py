@@ -1,8 +1,50 @@
 # ui.py - Класс для управления интерфейсом пользователя в игре Тетрис
 
 # Импортируем необходимые модули
+import time
 import pygame
+from collections import OrderedDict
 from constants import *  # Импортируем все константы
+from fonts import FontRegistry  # Импортируем реестр шрифтов
+
+# Сколько отрисованных строк текста хранится в кэше
+TEXT_CACHE_SIZE = 256
+
+# Через сколько секунд после последнего изменения размера окна меняются шрифты
+FONT_RESIZE_DELAY = 0.15
+
+
+class TextCache:
+    """
+    Кэш отрисованных строк текста: (шрифт, текст, цвет) -> поверхность.
+    Неизменные надписи рисуются один раз, а строки со счетом - только при
+    изменении значения. Давно не использованные строки вытесняются, поэтому
+    кэш не растет вместе со счетом.
+    """
+
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        """
+        Инициализация кэша
+        size: наибольшее количество хранимых строк
+        """
+        self.size = size
+        self.surfaces = OrderedDict()  # Порядок - от давно использованных к недавним
+
+    def render(self, font, text, color):
+        """Поверхность с текстом text шрифта font цвета color (со сглаживанием)"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = font.render(text, True, color)
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def clear(self):
+        """Очистка кэша (при смене шрифтов)"""
+        self.surfaces.clear()
 
 
 class UI:
@@ -19,32 +61,90 @@ class UI:
         self.screen_width = screen_width  # Ширина экрана
         self.screen_height = screen_height  # Высота экрана
 
-        # Создаем шрифты разных размеров с учетом размера экрана
-        # max() используется для предотвращения слишком маленьких шрифтов
-        self.font = pygame.font.SysFont(None, max(12, int(screen_height * 0.033)))  # Основной шрифт
-        self.small_font = pygame.font.SysFont(None, max(10, int(screen_height * 0.026)))  # Маленький шрифт
-        self.large_font = pygame.font.SysFont(None, max(24, int(screen_height * 0.067)))  # Большой шрифт
+        # Шрифты берутся из реестра по высоте экрана, для которой они подобраны
+        self.fonts = FontRegistry()  # Реестр встроенного шрифта
+        self.font_height = screen_height  # Высота экрана, по которой выбраны размеры шрифтов
+        self.font_update_at = None  # Когда применить новый размер шрифтов (None - не нужно)
+
+        # Готовые экраны меню: (вид экрана, ширина, высота) -> (поверхность, кнопки).
+        # Оверлей, заголовок и кнопки рисуются один раз для размера окна
+        self.layers = {}
+        self.texts = TextCache()  # Отрисованные строки текста
+
+    # Шрифты разных размеров с учетом размера экрана
+    # max() используется для предотвращения слишком маленьких шрифтов
+    @property
+    def font(self):
+        """Основной шрифт"""
+        return self.fonts.get(max(12, int(self.font_height * 0.033)))
+
+    @property
+    def small_font(self):
+        """Маленький шрифт"""
+        return self.fonts.get(max(10, int(self.font_height * 0.026)))
+
+    @property
+    def large_font(self):
+        """Большой шрифт"""
+        return self.fonts.get(max(24, int(self.font_height * 0.067)))
 
     def update_fonts(self):
-        """Обновление размеров шрифтов при изменении размера экрана"""
-        # Пересоздаем шрифты с новыми размерами экрана
-        self.font = pygame.font.SysFont(None, max(12, int(self.screen_height * 0.033)))
-        self.small_font = pygame.font.SysFont(None, max(10, int(self.screen_height * 0.026)))
-        self.large_font = pygame.font.SysFont(None, max(24, int(self.screen_height * 0.067)))
+        """
+        Обновление размеров шрифтов при изменении размера экрана
+        Шрифты ступеней не создаются заново, поэтому строки в кэше текста остаются верными
+        """
+        self.font_height = self.screen_height
+        self.font_update_at = None
+        # Готовые экраны нарисованы прежними шрифтами
+        self.layers.clear()
+
+    def request_font_update(self):
+        """
+        Отложенное обновление шрифтов: пока окно растягивают, события изменения
+        размера идут десятками, и шрифты меняются один раз - после паузы в
+        FONT_RESIZE_DELAY секунд (до этого используются прежние)
+        """
+        self.font_update_at = time.monotonic() + FONT_RESIZE_DELAY
+
+    def poll_fonts(self):
+        """Применение отложенного обновления шрифтов; возвращает True, если шрифты изменились"""
+        if self.font_update_at is None or time.monotonic() < self.font_update_at:
+            return False
+        self.update_fonts()
+        return True
+
+    def text(self, font, text, color):
+        """Отрисованная строка текста из кэша (рисуется только при первом запросе)"""
+        return self.texts.render(font, text, color)
+
+    def layer(self, kind, build):
+        """
+        Готовый экран kind для текущего размера окна
+        build(surface) рисует экран на прозрачной поверхности и возвращает кнопки
+        Возвращает пару (поверхность, кнопки)
+        """
+        key = (kind, self.screen_width, self.screen_height)
+        cached = self.layers.get(key)
+        if cached is None:
+            # Полупрозрачный оверлей для затемнения фона - часть того же слоя
+            surface = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+            surface.fill((*BLACK, 200))
+            cached = self.layers[key] = (surface, build(surface))
+        return cached
 
     def draw_menu(self, game_score=0):
         """Отрисовка главного меню игры"""
-        # Создаем полупрозрачный оверлей для затемнения фона
-        overlay = pygame.Surface((self.screen_width, self.screen_height))  # Создаем поверхность размером с экран
-        overlay.set_alpha(200)  # Устанавливаем прозрачность (0-255, где 255 - непрозрачный)
-        overlay.fill(BLACK)  # Заполняем черным цветом
-        self.screen.blit(overlay, (0, 0))  # Отображаем оверлей на экране
+        surface, buttons = self.layer('menu', self.build_menu)
+        self.screen.blit(surface, (0, 0))  # Отображаем готовый экран меню
+        return buttons  # Возвращаем обе кнопки для обработки событий
 
+    def build_menu(self, surface):
+        """Рисование заголовка и кнопок главного меню на поверхности surface"""
         # Отрисовка заголовка игры
-        title = self.large_font.render("ТЕТРИС", True, CYAN)  # Создаем текст заголовка синим цветом
+        title = self.text(self.large_font, "ТЕТРИС", CYAN)  # Создаем текст заголовка синим цветом
         title_rect = title.get_rect(center=(self.screen_width // 2,
                                             self.screen_height // 3))  # Центрируем по горизонтали и размещаем на 1/3 высоты экрана
-        self.screen.blit(title, title_rect)  # Отображаем заголовок на экране
+        surface.blit(title, title_rect)  # Отображаем заголовок на экране
 
         # Параметры кнопок меню
         button_width = 300  # Ширина кнопок
@@ -56,39 +156,39 @@ class UI:
                                   button_y_start,  # Вертикальная позиция
                                   button_width,  # Ширина
                                   button_height)  # Высота
-        pygame.draw.rect(self.screen, GREEN, play_button,
+        pygame.draw.rect(surface, GREEN, play_button,
                          border_radius=10)  # Рисуем зеленую кнопку с закругленными углами
-        pygame.draw.rect(self.screen, WHITE, play_button, 3, border_radius=10)  # Рисуем белую рамку вокруг кнопки
-        play_text = self.font.render("ИГРАТЬ", True, BLACK)  # Создаем текст на кнопке черным цветом
+        pygame.draw.rect(surface, WHITE, play_button, 3, border_radius=10)  # Рисуем белую рамку вокруг кнопки
+        play_text = self.text(self.font, "ИГРАТЬ", BLACK)  # Создаем текст на кнопке черным цветом
         play_text_rect = play_text.get_rect(center=play_button.center)  # Центрируем текст внутри кнопки
-        self.screen.blit(play_text, play_text_rect)  # Отображаем текст на кнопке
+        surface.blit(play_text, play_text_rect)  # Отображаем текст на кнопке
 
         # Создание и отрисовка кнопки "ЗАКРЫТЬ"
         quit_button = pygame.Rect(self.screen_width // 2 - button_width // 2,  # Центрируем по горизонтали
                                   button_y_start + 100,  # Размещаем ниже первой кнопки
                                   button_width,  # Ширина
                                   button_height)  # Высота
-        pygame.draw.rect(self.screen, RED, quit_button,
+        pygame.draw.rect(surface, RED, quit_button,
                          border_radius=10)  # Рисуем красную кнопку с закругленными углами
-        pygame.draw.rect(self.screen, WHITE, quit_button, 3, border_radius=10)  # Рисуем белую рамку вокруг кнопки
-        quit_text = self.font.render("ЗАКРЫТЬ", True, WHITE)  # Создаем текст на кнопке белым цветом
+        pygame.draw.rect(surface, WHITE, quit_button, 3, border_radius=10)  # Рисуем белую рамку вокруг кнопки
+        quit_text = self.text(self.font, "ЗАКРЫТЬ", WHITE)  # Создаем текст на кнопке белым цветом
         quit_text_rect = quit_text.get_rect(center=quit_button.center)  # Центрируем текст внутри кнопки
-        self.screen.blit(quit_text, quit_text_rect)  # Отображаем текст на кнопке
+        surface.blit(quit_text, quit_text_rect)  # Отображаем текст на кнопке
 
         return play_button, quit_button  # Возвращаем обе кнопки для обработки событий
 
     def draw_pause_menu(self):
         """Отрисовка меню паузы"""
-        # Создаем полупрозрачный оверлей для затемнения фона
-        overlay = pygame.Surface((self.screen_width, self.screen_height))
-        overlay.set_alpha(200)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        surface, buttons = self.layer('pause', self.build_pause_menu)
+        self.screen.blit(surface, (0, 0))  # Отображаем готовый экран паузы
+        return buttons  # Возвращаем кнопки для обработки событий
 
+    def build_pause_menu(self, surface):
+        """Рисование надписи и кнопок меню паузы на поверхности surface"""
         # Отрисовка надписи "ПАУЗА"
-        pause_text = self.large_font.render("ПАУЗА", True, YELLOW)  # Создаем текст желтым цветом
+        pause_text = self.text(self.large_font, "ПАУЗА", YELLOW)  # Создаем текст желтым цветом
         pause_rect = pause_text.get_rect(center=(self.screen_width // 2, self.screen_height // 3))
-        self.screen.blit(pause_text, pause_rect)
+        surface.blit(pause_text, pause_rect)
 
         # Параметры кнопок меню паузы
         button_width = 300
@@ -100,42 +200,42 @@ class UI:
                                     button_y_start,
                                     button_width,
                                     button_height)
-        pygame.draw.rect(self.screen, GREEN, resume_button, border_radius=10)
-        pygame.draw.rect(self.screen, WHITE, resume_button, 3, border_radius=10)
-        resume_text = self.font.render("ПРОДОЛЖИТЬ", True, BLACK)
+        pygame.draw.rect(surface, GREEN, resume_button, border_radius=10)
+        pygame.draw.rect(surface, WHITE, resume_button, 3, border_radius=10)
+        resume_text = self.text(self.font, "ПРОДОЛЖИТЬ", BLACK)
         resume_text_rect = resume_text.get_rect(center=resume_button.center)
-        self.screen.blit(resume_text, resume_text_rect)
+        surface.blit(resume_text, resume_text_rect)
 
         # Создание и отрисовка кнопки "В МЕНЮ"
         menu_button = pygame.Rect(self.screen_width // 2 - button_width // 2,
                                   button_y_start + 100,
                                   button_width,
                                   button_height)
-        pygame.draw.rect(self.screen, BLUE, menu_button, border_radius=10)
-        pygame.draw.rect(self.screen, WHITE, menu_button, 3, border_radius=10)
-        menu_text = self.font.render("В МЕНЮ", True, WHITE)
+        pygame.draw.rect(surface, BLUE, menu_button, border_radius=10)
+        pygame.draw.rect(surface, WHITE, menu_button, 3, border_radius=10)
+        menu_text = self.text(self.font, "В МЕНЮ", WHITE)
         menu_text_rect = menu_text.get_rect(center=menu_button.center)
-        self.screen.blit(menu_text, menu_text_rect)
+        surface.blit(menu_text, menu_text_rect)
 
         return resume_button, menu_button  # Возвращаем кнопки для обработки событий
 
     def draw_game_over(self, score):
         """Отрисовка экрана окончания игры"""
-        # Создаем полупрозрачный оверлей для затемнения фона
-        overlay = pygame.Surface((self.screen_width, self.screen_height))
-        overlay.set_alpha(200)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
-
-        # Отрисовка надписи "ИГРА ОКОНЧЕНА"
-        game_over_text = self.large_font.render("ИГРА ОКОНЧЕНА", True, RED)  # Создаем текст красным цветом
-        game_over_rect = game_over_text.get_rect(center=(self.screen_width // 2, self.screen_height // 3))
-        self.screen.blit(game_over_text, game_over_rect)
+        surface, buttons = self.layer('game_over', self.build_game_over)
+        self.screen.blit(surface, (0, 0))  # Отображаем готовый экран окончания игры
 
-        # Отрисовка счета игрока
-        score_text = self.font.render(f"Счет: {score}", True, WHITE)
+        # Отрисовка счета игрока (текст создается заново только при изменении счета)
+        score_text = self.text(self.font, f"Счет: {score}", WHITE)
         score_rect = score_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2))
         self.screen.blit(score_text, score_rect)
+        return buttons  # Возвращаем кнопки для обработки событий
+
+    def build_game_over(self, surface):
+        """Рисование надписи и кнопок экрана окончания игры на поверхности surface"""
+        # Отрисовка надписи "ИГРА ОКОНЧЕНА"
+        game_over_text = self.text(self.large_font, "ИГРА ОКОНЧЕНА", RED)  # Создаем текст красным цветом
+        game_over_rect = game_over_text.get_rect(center=(self.screen_width // 2, self.screen_height // 3))
+        surface.blit(game_over_text, game_over_rect)
 
         # Параметры кнопок экрана окончания игры
         button_width = 300
@@ -147,21 +247,21 @@ class UI:
                                      button_y_start,
                                      button_width,
                                      button_height)
-        pygame.draw.rect(self.screen, GREEN, restart_button, border_radius=10)
-        pygame.draw.rect(self.screen, WHITE, restart_button, 3, border_radius=10)
-        restart_text = self.font.render("ИГРАТЬ СНОВА", True, BLACK)
+        pygame.draw.rect(surface, GREEN, restart_button, border_radius=10)
+        pygame.draw.rect(surface, WHITE, restart_button, 3, border_radius=10)
+        restart_text = self.text(self.font, "ИГРАТЬ СНОВА", BLACK)
         restart_text_rect = restart_text.get_rect(center=restart_button.center)
-        self.screen.blit(restart_text, restart_text_rect)
+        surface.blit(restart_text, restart_text_rect)
 
         # Создание и отрисовка кнопки "В МЕНЮ"
         menu_button = pygame.Rect(self.screen_width // 2 - button_width // 2,
                                   button_y_start + 100,
                                   button_width,
                                   button_height)
-        pygame.draw.rect(self.screen, BLUE, menu_button, border_radius=10)
-        pygame.draw.rect(self.screen, WHITE, menu_button, 3, border_radius=10)
-        menu_text = self.font.render("В МЕНЮ", True, WHITE)
+        pygame.draw.rect(surface, BLUE, menu_button, border_radius=10)
+        pygame.draw.rect(surface, WHITE, menu_button, 3, border_radius=10)
+        menu_text = self.text(self.font, "В МЕНЮ", WHITE)
         menu_text_rect = menu_text.get_rect(center=menu_button.center)
-        self.screen.blit(menu_text, menu_text_rect)
+        surface.blit(menu_text, menu_text_rect)
 
         return restart_button, menu_button  # Возвращаем кнопки для обработки событий
\ No newline at end of file